@@ -9,8 +9,30 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+
+class AppASGIRequest(ASGIRequest):
+    """
+    Request resolved against settings.ASGI_ROOT_URLCONF, which serves
+    recipe reads and uploads through recipe.async_views
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.urlconf = settings.ASGI_ROOT_URLCONF
+
+
+class AppASGIHandler(ASGIHandler):
+    request_class = AppASGIRequest
+
+
+django.setup(set_prefix=False)
+application = AppASGIHandler()
+
+from core.warmup import warm_up_on_start  # noqa: E402
+
+warm_up_on_start()
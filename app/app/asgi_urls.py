@@ -0,0 +1,26 @@
+"""app URL Configuration for ASGI deployments
+
+Serves the recipe list, detail, export and image upload through the
+async views of recipe.async_views, everything else as in app.urls.
+Selected by settings.ASGI_ROOT_URLCONF.
+"""
+from django.urls import include, path, re_path
+
+from app import urls
+from recipe import async_views
+
+# named as in recipe.urls, reverse() keeps returning the same paths
+async_patterns = [
+    re_path(r'^recipes/$', async_views.recipe_list, name='recipe-list'),
+    re_path(r'^recipes/export/$', async_views.recipe_export,
+            name='recipe-export'),
+    # numeric only, other actions of the router (import) fall through
+    re_path(r'^recipes/(?P<pk>\d+)/$', async_views.recipe_detail,
+            name='recipe-detail'),
+    re_path(r'^recipes/(?P<pk>\d+)/upload-image/$',
+            async_views.recipe_upload_image, name='recipe-upload-image'),
+]
+
+urlpatterns = [
+    path('api/recipe/', include((async_patterns, 'async-recipe'))),
+] + urls.urlpatterns
@@ -37,15 +37,20 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
     'user',
     'recipe',
+    'bench',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,6 +60,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'app.urls'
+# Url configuration of requests served by app/asgi.py
+ASGI_ROOT_URLCONF = 'app.asgi_urls'
 
 TEMPLATES = [
     {
@@ -85,6 +92,67 @@ DATABASES = {
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASS"),
+        # persistent connections, see DB_HEALTH_CHECK_IDLE
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    }
+}
+
+# Read replicas, comma separated hosts of DB_REPLICAS added as aliases
+# replica1, replica2, ... with the credentials of default and the
+# weights of DB_REPLICA_WEIGHTS. A second alias to the same database,
+# e.g. DB_REPLICAS=$DB_HOST, exercises the routing locally
+REPLICA_HOSTS = [
+    host for host in os.environ.get('DB_REPLICAS', '').split(',') if host
+]
+REPLICA_WEIGHTS = [
+    int(weight) for weight in
+    os.environ.get('DB_REPLICA_WEIGHTS', '').split(',') if weight
+]
+REPLICA_WEIGHTS += [1] * (len(REPLICA_HOSTS) - len(REPLICA_WEIGHTS))
+for index, host in enumerate(REPLICA_HOSTS, 1):
+    DATABASES[f'replica{index}'] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Safe requests to views with replica_reads read from a healthy replica
+# (see core.routers and core.middleware), clients that wrote stay on the
+# primary for STICKY_SECONDS. CACHE is the CACHES alias tracking them,
+# it must be shared by all workers. Models of PRIMARY_MODELS are always
+# read from the primary: a token just obtained, with no write pinning
+# its client yet, must authenticate at once. A thread per worker checks
+# the replicas every HEALTH_CHECK_INTERVAL seconds
+REPLICA_ROUTING = {
+    'REPLICAS': {
+        f'replica{index}': weight
+        for index, weight in enumerate(REPLICA_WEIGHTS[:len(REPLICA_HOSTS)], 1)
+    },
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)),
+    'CACHE': 'default',
+    'HEALTH_CHECK_INTERVAL': 5,
+    'PRIMARY_MODELS': ('authtoken.token',),
+}
+
+# Persistent connections idle for longer than this many seconds are
+# checked before a request uses them, see core.db.check_connections
+DB_HEALTH_CHECK_IDLE = 10
+
+# Run core.warmup in each process as app/wsgi.py or app/asgi.py loads.
+# Connections are opened in the loading thread, so do not combine with
+# servers that fork after loading the application (gunicorn --preload)
+WARMUP_ON_START = os.environ.get('DJANGO_WARMUP', '') == '1'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory by default, set CACHE_BACKEND / CACHE_LOCATION to share
+# the cache between workers (e.g. memcached or redis)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'drf-recipe'),
     }
 }
 
@@ -132,9 +200,158 @@ MEDIA_ROOT = '/vol/web/media'
 
 STATIC_ROOT = '/vol/web/static'
 
+# Hand media transfers to the front-end server after the permission check
+# in recipe.media: 'x-accel-redirect' (nginx, with an internal location
+# MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or 'x-sendfile' (Apache,
+# lighttpd). Empty streams files from Django
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Hash uploads while they stream in, recipe images are stored by digest
+FILE_UPLOAD_HANDLERS = [
+    'core.storage.HashingMemoryFileUploadHandler',
+    'core.storage.HashingTemporaryFileUploadHandler',
+]
+
+# Resized variants generated for recipe images, see recipe.images
+# name: maximum width and height in pixels
+RECIPE_IMAGE_VARIANTS = {
+    'thumb': 150,
+    'medium': 600,
+    'large': 1200,
+}
+RECIPE_IMAGE_FORMAT = 'WEBP'
+RECIPE_IMAGE_QUALITY = 80
+# Size of the process pool generating variants, 0 generates them inline
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+# Seconds an unreferenced image file is kept after it was last written,
+# it is checked again and deleted once they have passed
+RECIPE_IMAGE_RELEASE_GRACE = 300
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "core.User"
+
+# Serve recipe list and detail from values() rows instead of the
+# serializers, see recipe.readers
+RECIPE_FAST_READS = True
+
+# Recipe ?search=, see recipe.search. CONFIG is the PostgreSQL text
+# search configuration, LIMIT the number of matches returned unless the
+# client asks for page_size (at most MAX_LIMIT)
+RECIPE_SEARCH_CONFIG = 'english'
+RECIPE_SEARCH_LIMIT = 50
+RECIPE_SEARCH_MAX_LIMIT = 500
+
+# Tag and ingredient autocomplete, see recipe.autocomplete. CACHE_USERS
+# is the number of users whose names each process keeps in memory,
+# 0 serves every suggestion from the database
+RECIPE_AUTOCOMPLETE = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 50,
+    'CACHE_USERS': int(os.environ.get('RECIPE_AUTOCOMPLETE_CACHE_USERS',
+                                      1000)),
+}
+
+# Per-route request metrics served at /metrics, see core.metrics.
+# Workers of a host sharing DIRECTORY, emptied on deploy, are added up,
+# without it /metrics shows the answering process only. AUTH_TOKEN, if
+# set, is required as "Authorization: Bearer <token>", without it only
+# staff users logged in to the admin get the metrics
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': os.environ.get('METRICS_DIR'),
+    'FLUSH_INTERVAL': 5.0,
+    'SERVER_TIMING': True,
+    'AUTH_TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Opt-in request profiling, see core.profiling. Requests to the recipe
+# API views are profiled with cProfile when they carry a HEADER signed
+# by 'manage.py profiles --token', or at random with SAMPLE_RATE. The
+# last MAX_PROFILES of all workers are kept in DIRECTORY
+PROFILING = {
+    'ENABLED': os.environ.get('DJANGO_PROFILING', '') == '1',
+    'HEADER': 'X-Profile',
+    'TOKEN_MAX_AGE': 3600,
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+    'DIRECTORY': os.environ.get('PROFILING_DIR', '/vol/web/profiles'),
+    'MAX_PROFILES': 200,
+}
+
+# Statements running THRESHOLD seconds or longer are logged with their
+# plan as JSON lines by the core.slowlog logger, see core.slowlog, each
+# fingerprint at most once per RATE_LIMIT seconds per process. PARAMS
+# adds the statement's parameters, which hold user data, except for
+# statements on tokens and passwords. 'manage.py slow_queries'
+# summarizes LOG_FILE, without it the log goes to stderr
+SLOW_QUERIES = {
+    'ENABLED': True,
+    'THRESHOLD': float(os.environ.get('SLOW_QUERY_SECONDS', 0.2)),
+    'EXPLAIN': True,
+    'RATE_LIMIT': 60,
+    'PARAMS': os.environ.get('SLOW_QUERY_PARAMS', '') == '1',
+    'LOG_FILE': os.environ.get('SLOW_QUERY_LOG'),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.slowlog.JSONFormatter'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': SLOW_QUERIES['LOG_FILE'],
+            'delay': True,
+            'formatter': 'json',
+        } if SLOW_QUERIES['LOG_FILE'] else {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'core.slowlog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Async recipe views served under ASGI, see recipe.async_views.
+# MAX_CONCURRENCY worker threads (each may hold a database connection)
+# run the views, up to MAX_QUEUE requests wait QUEUE_TIMEOUT seconds
+# for one, others are answered 503 with Retry-After
+ASYNC_VIEWS = {
+    'MAX_CONCURRENCY': int(os.environ.get('ASYNC_VIEWS_CONCURRENCY', 16)),
+    'MAX_QUEUE': int(os.environ.get('ASYNC_VIEWS_QUEUE', 256)),
+    'QUEUE_TIMEOUT': 5.0,
+    'RETRY_AFTER': 1,
+}
+
+# Cache of token -> user lookups used by user.authentication.
+# BACKEND is an optional CACHES alias shared by all workers, where
+# entries live TTL seconds and deleted tokens or deactivated users are
+# rejected at once. Without it each process keeps its own LRU, which
+# other workers' invalidations do not reach: there a deleted token or
+# deactivated user keeps authenticating for up to LOCAL_TTL seconds
+TOKEN_AUTH_CACHE = {
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300)),
+    'LOCAL_TTL': int(os.environ.get('TOKEN_AUTH_CACHE_LOCAL_TTL', 5)),
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'BACKEND': os.environ.get('TOKEN_AUTH_CACHE_BACKEND'),
+}
+
+# Rendered list/detail responses of the recipe API, see recipe.cache
+RECIPE_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': os.environ.get('RECIPE_RESPONSE_CACHE_ALIAS', 'default'),
+    'TIMEOUT': 300,
+    # Larger bodies are not cached
+    'MAX_BYTES': 1024 * 1024,
+}
@@ -15,12 +15,17 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
 
-# Media path not present by default
+from core.views import metrics
+from recipe.media import MediaView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Media is only served to its owners, see recipe.media
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+         MediaView.as_view(), name='media'),
+    path('metrics', metrics, name='metrics'),
+]
@@ -0,0 +1,173 @@
+import asyncio
+import re
+import time
+import urllib.request
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class LoadResult:
+    """
+    Latencies and status codes of the requests of one load run
+    """
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.connects = 0
+        self.elapsed = 0.0
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    def percentile(self, percent):
+        """
+        Return the latency in seconds below which percent of the
+        requests completed, nearest rank
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(int(round(percent / 100 * len(ordered))), 1)
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+def build_request(url, headers, method='GET', body=b''):
+    """
+    Return the bytes of a keep-alive HTTP/1.1 request of url
+    """
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {parts.netloc}',
+             'Connection: keep-alive']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    if body:
+        lines.append(f'Content-Length: {len(body)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin1') + body
+
+
+async def read_response(reader):
+    """
+    Read one response, return its status and whether the server keeps
+    the connection open
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin1').split('\r\n')
+    version, status = status_line.split(' ', 2)[:2]
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return int(status), False
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' and (
+        version == 'HTTP/1.1' or connection == 'keep-alive')
+    return int(status), keep_alive
+
+
+async def _client(url, requests, offset, deadline, result, timeout):
+    """
+    Send requests back to back over one connection until deadline,
+    cycling through requests from offset and reconnecting when the
+    server closes the connection
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    ssl = parts.scheme == 'https' or None
+    writer = None
+    try:
+        while time.monotonic() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(parts.hostname, port,
+                                                ssl=ssl), timeout)
+                    result.connects += 1
+                request = requests[offset % len(requests)]
+                offset += 1
+                start = time.perf_counter()
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(
+                    read_response(reader), timeout)
+                result.latencies.append(time.perf_counter() - start)
+                result.statuses[status] += 1
+            except (OSError, ValueError, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError):
+                result.errors += 1
+                keep_alive = False
+            if not keep_alive and writer is not None:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def _run(url, requests, connections, duration, timeout):
+    result = LoadResult()
+    start = time.monotonic()
+    await asyncio.gather(*(
+        _client(url, requests, offset, start + duration, result, timeout)
+        for offset in range(connections)
+    ))
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def run_requests(url, requests, connections, duration, timeout=10.0):
+    """
+    Hold connections keep-alive connections to the host of url for
+    duration seconds, each sending the requests built by build_request
+    back to back, and return the LoadResult. A single event loop drives
+    all connections, so the client stays cheap next to the server
+    under test
+    """
+    return asyncio.run(_run(url, list(requests), connections, duration,
+                            timeout))
+
+
+def run_load(url, connections, duration, headers=None, timeout=10.0):
+    """
+    run_requests with GET requests of url
+    """
+    return run_requests(url, [build_request(url, headers or {})],
+                        connections, duration, timeout)
+
+
+METRIC_LINE = re.compile(
+    r'^drf_recipe_(requests_total|db_queries_sum)\{route="([^"]*)"'
+    r'[^}]*\} (\S+)$')
+
+
+def metrics_totals(url, token=None, timeout=10.0):
+    """
+    Return (requests, queries) served so far according to the /metrics
+    endpoint of core.metrics at url, leaving out its own requests
+    """
+    request = urllib.request.Request(url)
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        text = response.read().decode()
+    totals = {'requests_total': 0, 'db_queries_sum': 0.0}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match and match.group(2) != 'metrics':
+            totals[match.group(1)] += float(match.group(3))
+    return int(totals['requests_total']), totals['db_queries_sum']
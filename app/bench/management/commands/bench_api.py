@@ -0,0 +1,219 @@
+import json
+import random
+import subprocess
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from bench.load import build_request, metrics_totals, run_requests
+from bench.seed import BENCH_PASSWORD, bench_users
+from core.models import Tag, Ingredient, Recipe
+
+SCENARIOS = (
+    'recipe-list', 'recipe-detail', 'recipe-filter', 'recipe-search',
+    'tag-list', 'ingredient-list', 'ingredient-autocomplete',
+    'user-profile', 'user-token', 'media',
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command load testing the API of a running server on the
+    dataset of bench_seed
+    """
+    help = (
+        "Drive each --scenario of the recipe, user and media endpoints of "
+        "the server at --url for --duration seconds over --connections "
+        "keep-alive connections, as --clients users seeded by bench_seed, "
+        "and print throughput, p50/p95/p99 latency and, from the /metrics "
+        "endpoint, queries per request. --output saves the results with "
+        "the git commit as JSON, --compare prints the change against such "
+        "a file of an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--clients', type=int, default=100)
+        parser.add_argument('--connections', type=int, default=100)
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument('--scenario', action='append',
+                            choices=SCENARIOS)
+        parser.add_argument('--metrics-token',
+                            default=settings.METRICS['AUTH_TOKEN'])
+        parser.add_argument('--output')
+        parser.add_argument('--compare')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        url = options['url'].rstrip('/')
+        clients = self.clients(options['prefix'], options['clients'],
+                               random.Random(options['seed']))
+        if not clients:
+            raise CommandError(
+                f"No users of prefix {options['prefix']!r}, "
+                f"run bench_seed first")
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        results = {}
+        for scenario in options['scenario'] or SCENARIOS:
+            requests = [
+                self.request(url, scenario, client) for client in clients
+            ]
+            requests = [request for request in requests if request]
+            if not requests:
+                self.stdout.write(f"-- {scenario}: no data, skipped")
+                continue
+            results[scenario] = self.run(url, scenario, requests, options)
+            self.report(scenario, results[scenario], previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'commit': git_commit(),
+                    'created': datetime.now(timezone.utc).isoformat(),
+                    'url': url,
+                    'clients': len(clients),
+                    'connections': options['connections'],
+                    'duration': options['duration'],
+                    'recipes': Recipe.objects.filter(
+                        user__in=bench_users(options['prefix'])).count(),
+                    'scenarios': results,
+                }, f, indent=2)
+            self.stdout.write(f"Saved {options['output']}")
+
+    def clients(self, prefix, count, rng):
+        """
+        Return what the requests of each of count seeded users need
+        """
+        clients = []
+        tokens = Token.objects.filter(user__in=bench_users(prefix))\
+            .select_related('user').order_by('user_id')[:count]
+        for token in tokens:
+            recipes = list(Recipe.objects.filter(user=token.user)
+                           .order_by('id').values('id', 'title', 'image')[:50])
+            if not recipes:
+                continue
+            recipe = rng.choice(recipes)
+            tag = Tag.objects.filter(user=token.user).values_list(
+                'id', flat=True).order_by('id').first()
+            ingredient = Ingredient.objects.filter(user=token.user)\
+                .values_list('name', flat=True).order_by('id').last()
+            clients.append({
+                'token': token.key,
+                'email': token.user.email,
+                'recipe': recipe['id'],
+                'word': recipe['title'].split()[0],
+                'tag': tag,
+                'ingredient': ingredient or '',
+                'images': [row['image'] for row in recipes if row['image']],
+            })
+        return clients
+
+    def request(self, url, scenario, client):
+        """
+        Return the request of scenario for client, None if the client
+        has no data for it
+        """
+        headers = {'Authorization': f"Token {client['token']}",
+                   'Accept': 'application/json'}
+        paths = {
+            'recipe-list': '/api/recipe/recipes/',
+            'recipe-detail': f"/api/recipe/recipes/{client['recipe']}/",
+            'recipe-filter': '/api/recipe/recipes/?' + urlencode(
+                {'tags': client['tag'] or '', 'max_price': 50}),
+            'recipe-search': '/api/recipe/recipes/?' + urlencode(
+                {'search': client['word']}),
+            'tag-list': '/api/recipe/tags/',
+            'ingredient-list': '/api/recipe/ingredients/',
+            'ingredient-autocomplete':
+                '/api/recipe/ingredients/autocomplete/?' + urlencode(
+                    {'q': client['ingredient'][:2]}),
+            'user-profile': '/api/user/profile/',
+        }
+        if scenario in paths:
+            return build_request(url + paths[scenario], headers)
+        if scenario == 'user-token':
+            body = json.dumps({'email': client['email'],
+                               'password': BENCH_PASSWORD}).encode()
+            return build_request(
+                url + '/api/user/token/',
+                {'Content-Type': 'application/json'}, 'POST', body)
+        if not client['images']:
+            return None
+        return build_request(
+            f"{url}{settings.MEDIA_URL}{client['images'][0]}", headers)
+
+    def run(self, url, scenario, requests, options):
+        """
+        Drive scenario and return its results
+        """
+        before = self.metrics(url, options)
+        result = run_requests(url, requests, options['connections'],
+                              options['duration'], options['timeout'])
+        after = self.metrics(url, options)
+        served = after[0] - before[0] if before and after else 0
+        return {
+            'requests': result.requests,
+            'errors': result.errors,
+            'throughput': result.requests / result.elapsed,
+            'p50_ms': result.percentile(50) * 1000,
+            'p95_ms': result.percentile(95) * 1000,
+            'p99_ms': result.percentile(99) * 1000,
+            'statuses': {str(status): count
+                         for status, count in sorted(result.statuses.items())},
+            # counts one worker only unless METRICS DIRECTORY is shared
+            'queries_per_request':
+                (after[1] - before[1]) / served if served else None,
+        }
+
+    def metrics(self, url, options):
+        """
+        Return (requests, queries) of the server, None if its metrics
+        endpoint is not reachable
+        """
+        try:
+            return metrics_totals(url + '/metrics', options['metrics_token'])
+        except OSError as exc:
+            self.stderr.write(f"No queries per request, /metrics: {exc}")
+            return None
+
+    def report(self, scenario, result, previous):
+        queries = result['queries_per_request']
+        queries = '-' if queries is None else f'{queries:.1f}'
+        line = (
+            f"-- {scenario}: {result['throughput']:.0f} req/s, "
+            f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+            f"p99 {result['p99_ms']:.1f} ms, {queries} queries/request, "
+            f"statuses {result['statuses']}, {result['errors']} errors"
+        )
+        old = (previous or {}).get('scenarios', {}).get(scenario)
+        if old:
+            commit = previous.get('commit') or 'unknown commit'
+            line += (
+                f" (was {old['throughput']:.0f} req/s, "
+                f"p95 {old['p95_ms']:.1f} ms at {commit[:12]})"
+            )
+        self.stdout.write(line)
+
+
+def git_commit():
+    """
+    Return the commit of the working tree, marked -dirty when it has
+    uncommitted changes, None outside a git checkout
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'describe', '--always', '--dirty', '--abbrev=40'],
+            capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit or None
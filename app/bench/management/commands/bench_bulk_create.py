@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from bench.seed import create_bench_user
+
+
+class Command(BaseCommand):
+    """
+    Django command comparing N single POSTs with one bulk POST
+    on the tag and ingredient endpoints
+    """
+    help = (
+        "Create --count tags and ingredients for a throwaway user, once "
+        "with one POST per item and once with a single bulk POST, and "
+        "print wall time and query counts of both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=300)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        user = create_bench_user()
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        try:
+            for name in ('tag', 'ingredient'):
+                url = reverse(f'recipe:{name}-list')
+                items = [{'name': f'{name} {index}'}
+                         for index in range(count)]
+
+                single = self.measure(
+                    lambda: [client.post(url, item, format='json')
+                             for item in items])
+                user.tag_set.all().delete()
+                user.ingredient_set.all().delete()
+                bulk = self.measure(
+                    lambda: client.post(url, items, format='json'))
+
+                self.report(name, count, single, bulk)
+        finally:
+            user.delete()
+
+    def measure(self, func):
+        """
+        Return (seconds, queries) taken by func
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def report(self, name, count, single, bulk):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {count} {name}s"))
+        self.stdout.write(
+            f"single POSTs: {single[0] * 1000:.1f} ms, {single[1]} queries")
+        self.stdout.write(
+            f"bulk POST:    {bulk[0] * 1000:.1f} ms, {bulk[1]} queries")
+        if bulk[0]:
+            self.stdout.write(f"speedup:      {single[0] / bulk[0]:.1f}x")
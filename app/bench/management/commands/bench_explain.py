@@ -0,0 +1,130 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+from bench.seed import analyze, create_bench_user, seed_user_data
+from core.models import Tag, Ingredient, Recipe
+
+# Migrations adding the indexes for per-user access paths
+INDEX_MIGRATIONS = (
+    '0006_access_path_indexes',
+    '0009_recipe_filter_indexes',
+    '0011_name_autocomplete_indexes',
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to show query plans and timings for the hot
+    per-user queries, optionally before and after the index migrations
+    """
+    help = (
+        "Seed a throwaway user and print EXPLAIN plans and timings of "
+        "the per-user list queries. With --compare the core index "
+        "migrations are temporarily unapplied to show the plans before "
+        "them, do not use --compare on a production database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=100)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--compare', action='store_true')
+
+    def handle(self, *args, **options):
+        user = create_bench_user()
+        try:
+            seed_user_data(
+                user,
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+            )
+            analyze(self.tables())
+
+            if options['compare']:
+                self.unapply_indexes()
+                self.report(user, 'before indexes', options['repeat'])
+                self.apply_indexes()
+                analyze(self.tables())
+                self.report(user, 'after indexes', options['repeat'])
+            else:
+                self.report(user, 'current schema', options['repeat'])
+        finally:
+            user.delete()
+
+    def tables(self):
+        """
+        Models whose tables are read by the hot queries
+        """
+        return (Tag, Ingredient, Recipe, Recipe.tags.through,
+                Recipe.ingredients.through)
+
+    def queries(self, user):
+        """
+        Return (label, queryset) for each hot query of the recipe API
+        """
+        tag = Tag.objects.filter(user=user).order_by('id').first()
+        ingredient = Ingredient.objects.filter(user=user)\
+            .order_by('id').first()
+        return (
+            ('tag list', Tag.objects.filter(user=user)
+                .order_by('-name', 'id')[:50]),
+            ('ingredient list', Ingredient.objects.filter(user=user)
+                .order_by('-name', 'id')[:50]),
+            ('recipe list', Recipe.objects.filter(user=user)
+                .order_by('-id')[:50]),
+            ('recipes by tag', Recipe.tags.through.objects
+                .filter(tag=tag).values('recipe_id')),
+            ('recipes by ingredient', Recipe.ingredients.through.objects
+                .filter(ingredient=ingredient).values('recipe_id')),
+        )
+
+    def report(self, user, title, repeat):
+        """
+        Print plan and mean execution time of each hot query
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {title}"))
+        for label, queryset in self.queries(user):
+            timings = []
+            for _ in range(max(repeat, 1)):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            mean_ms = sum(timings) / len(timings) * 1000
+            self.stdout.write(f"-- {label}: {mean_ms:.2f} ms")
+            self.stdout.write(queryset.explain())
+
+    def migrations(self):
+        """
+        Return loader and the loaded index migrations
+        """
+        loader = MigrationLoader(connection)
+        return loader, [loader.get_migration('core', name)
+                        for name in INDEX_MIGRATIONS]
+
+    def unapply_indexes(self):
+        """
+        Drop the indexes added by the index migrations, leaving the
+        migration history untouched
+        """
+        loader, migrations = self.migrations()
+        for migration in reversed(migrations):
+            state = loader.project_state(
+                ('core', migration.name), at_end=True)
+            with connection.schema_editor(atomic=False) as editor:
+                migration.unapply(state, editor)
+
+    def apply_indexes(self):
+        """
+        Recreate the indexes dropped by unapply_indexes
+        """
+        loader, migrations = self.migrations()
+        for migration in migrations:
+            state = loader.project_state(
+                ('core', migration.name), at_end=False)
+            with connection.schema_editor(atomic=False) as editor:
+                migration.apply(state, editor)
@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bench.seed import analyze, create_bench_user, seed_user_data
+from core.models import Tag, Ingredient, Recipe
+from recipe.filters import filter_recipes
+
+
+class Command(BaseCommand):
+    """
+    Django command timing the recipe list filters on a seeded dataset
+    """
+    help = (
+        "Seed a throwaway user with --recipes recipes and print timing, "
+        "and with --explain the query plan, of a first page of the recipe "
+        "list for each combination of the tags, ingredients, max_price, "
+        "max_time and match filters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--tags', type=int, default=100)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--explain', action='store_true')
+
+    def handle(self, *args, **options):
+        user = create_bench_user()
+        try:
+            seed_user_data(
+                user,
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+            )
+            analyze((Tag, Ingredient, Recipe, Recipe.tags.through,
+                     Recipe.ingredients.through))
+            for label, params in self.combinations(user):
+                self.report(user, label, params, options)
+        finally:
+            user.delete()
+
+    def combinations(self, user):
+        """
+        Return (label, query parameters) of the benchmarked filters.
+        The first tags and ingredients are the most used ones, the
+        last the rarest (see bench.seed)
+        """
+        tags = list(Tag.objects.filter(user=user)
+                    .order_by('id').values_list('id', flat=True))
+        ingredients = list(Ingredient.objects.filter(user=user)
+                           .order_by('id').values_list('id', flat=True))
+
+        def ids(values):
+            return ','.join(map(str, values))
+
+        return (
+            ('no filter', {}),
+            ('common tag', {'tags': ids(tags[:1])}),
+            ('rare tag', {'tags': ids(tags[-1:])}),
+            ('any of 3 tags', {'tags': ids(tags[:3])}),
+            ('all of 2 tags', {'tags': ids(tags[:2]), 'match': 'all'}),
+            ('any of 3 ingredients', {'ingredients': ids(ingredients[:3])}),
+            ('all of 3 ingredients',
+             {'ingredients': ids(ingredients[:3]), 'match': 'all'}),
+            ('max_price', {'max_price': '20'}),
+            ('max_time', {'max_time': '15'}),
+            ('tag + max_price + max_time',
+             {'tags': ids(tags[:1]), 'max_price': '50', 'max_time': '60'}),
+            ('all tags + ingredients + max_price', {
+                'tags': ids(tags[:2]),
+                'ingredients': ids(ingredients[:2]),
+                'max_price': '100',
+                'match': 'all',
+            }),
+        )
+
+    def report(self, user, label, params, options):
+        """
+        Print mean time, and plan, of the first page for params
+        """
+        queryset = filter_recipes(
+            Recipe.objects.filter(user=user), params
+        ).order_by('-id').values_list('id', flat=True)[:options['page_size']]
+        timings = []
+        for _ in range(max(options['repeat'], 1)):
+            start = time.perf_counter()
+            rows = len(list(queryset.all()))
+            timings.append(time.perf_counter() - start)
+        mean_ms = sum(timings) / len(timings) * 1000
+        self.stdout.write(f"-- {label}: {mean_ms:.2f} ms, {rows} rows")
+        if options['explain']:
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bench.load import run_load
+
+
+class Command(BaseCommand):
+    """
+    Django command comparing deployments under many concurrent
+    keep-alive connections
+    """
+    help = (
+        "Hold --connections keep-alive connections to each --target "
+        "name=url for --duration seconds and print throughput, latency "
+        "percentiles and the number of 503 answers. Start the deployments "
+        "to compare first, e.g. the WSGI application with "
+        "'gunicorn app.wsgi -w 4 -k gthread --threads 16 -b :8000' and "
+        "the ASGI one, which serves the recipe views of "
+        "recipe.async_views, with "
+        "'uvicorn app.asgi:application --workers 4 --port 8001', then run "
+        "'bench_load --token KEY --target wsgi=http://127.0.0.1:8000"
+        "/api/recipe/recipes/ --target asgi=http://127.0.0.1:8001"
+        "/api/recipe/recipes/'. Raise the open file limit (ulimit -n) of "
+        "both sides above --connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help="name=url, may be repeated")
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=30.0)
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument('--token',
+                            help="API token sent as Authorization")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith(('http://', 'https://')):
+                raise CommandError(f"Expected name=url, got {target!r}")
+            targets.append((name, url))
+
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f"Token {options['token']}"
+
+        for name, url in targets:
+            result = run_load(url, options['connections'],
+                              options['duration'], headers,
+                              options['timeout'])
+            self.report(name, url, result)
+
+    def report(self, name, url, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} {url}"))
+        rate = result.requests / result.elapsed if result.elapsed else 0
+        self.stdout.write(f"requests:  {result.requests} "
+                          f"({rate:.0f}/s), {result.connects} connects, "
+                          f"{result.errors} errors")
+        for percent in (50, 95, 99):
+            self.stdout.write(
+                f"p{percent}:       "
+                f"{result.percentile(percent) * 1000:.1f} ms")
+        self.stdout.write(f"503:       {result.statuses.get(503, 0)}")
+        statuses = ', '.join(f'{status}: {count}' for status, count
+                             in sorted(result.statuses.items()))
+        self.stdout.write(f"statuses:  {statuses}")
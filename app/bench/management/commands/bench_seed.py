@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+
+from bench.seed import analyze, bench_users, create_bench_users, \
+    seed_images, seed_user_data, split_recipes
+from core.models import Tag, Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    """
+    Django command seeding a dataset for bench_api
+    """
+    help = (
+        "Bulk insert --users users with API tokens and password "
+        "bench-password, --recipes recipes split over them so that a few "
+        "users own most, per user --tags tags and --ingredients "
+        "ingredients linked to recipes by popularity, and --images recipe "
+        "images. The defaults give 10k users, 1M recipes and about 5M "
+        "through rows. --clear first deletes the users of earlier runs "
+        "with the same --prefix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=80)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=4)
+        parser.add_argument('--images', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            deleted, _ = bench_users(prefix).delete()
+            self.stdout.write(f"Deleted {deleted} rows of earlier runs")
+
+        users = create_bench_users(prefix, options['users'],
+                                   batch_size=options['batch_size'])
+        counts = split_recipes(options['recipes'], len(users))
+        report_every = max(len(users) // 10, 1)
+        for index, (user, count) in enumerate(zip(users, counts), 1):
+            seed_user_data(
+                user, count,
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+                tags_per_recipe=options['tags_per_recipe'],
+                ingredients_per_recipe=options['ingredients_per_recipe'],
+                batch_size=options['batch_size'],
+                seed=options['seed'] + index,
+            )
+            if index % report_every == 0:
+                self.stdout.write(f"Seeded {index}/{len(users)} users")
+
+        # one image for the first recipe of the heaviest users
+        recipe_ids = [
+            Recipe.objects.filter(user=user).order_by('id')
+            .values_list('id', flat=True).first()
+            for user in users[:options['images']]
+        ]
+        storage = Recipe._meta.get_field('image').storage
+        seed_images([pk for pk in recipe_ids if pk is not None], storage)
+
+        analyze((Tag, Ingredient, Recipe, Recipe.tags.through,
+                 Recipe.ingredients.through))
+        recipes = Recipe.objects.filter(user__in=bench_users(prefix))
+        links = sum(
+            through.objects.filter(recipe__in=recipes).count()
+            for through in (Recipe.tags.through, Recipe.ingredients.through)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {prefix} users now own "
+            f"{recipes.count()} recipes and {links} through rows"))
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from bench.seed import analyze, create_bench_user, seed_user_data
+from core.models import Recipe
+from recipe.prefetch import plan_queryset
+from recipe.readers import recipe_rows, serialize_recipes
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    """
+    Django command comparing RecipeSerializer with the values() read
+    path of recipe.readers on large recipe lists
+    """
+    help = (
+        "Seed a throwaway user per --sizes and print the time to load, "
+        "serialize and render the recipe list with RecipeSerializer and "
+        "with recipe.readers, checking that both render the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        for size in options['sizes']:
+            user = create_bench_user()
+            try:
+                seed_user_data(user, recipes=size)
+                analyze((Recipe, Recipe.tags.through,
+                         Recipe.ingredients.through))
+                queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+                def serializer_path():
+                    planned = plan_queryset(queryset, RecipeSerializer)
+                    return renderer.render(
+                        RecipeSerializer(planned, many=True).data)
+
+                def values_path():
+                    return renderer.render(
+                        serialize_recipes(list(recipe_rows(queryset))))
+
+                if serializer_path() != values_path():
+                    raise CommandError(f"Output differs at {size} rows")
+                self.report(size, self.measure(serializer_path,
+                                               options['repeat']),
+                            self.measure(values_path, options['repeat']))
+            finally:
+                user.delete()
+
+    def measure(self, func, repeat):
+        """
+        Return the best wall time of func over repeat runs
+        """
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def report(self, size, serializer, values):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {size} recipes"))
+        self.stdout.write(f"serializers: {serializer * 1000:.1f} ms")
+        self.stdout.write(f"values():    {values * 1000:.1f} ms")
+        if values:
+            self.stdout.write(f"speedup:     {serializer / values:.1f}x")
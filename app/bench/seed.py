@@ -0,0 +1,216 @@
+import io
+import random
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingredient, Recipe
+from core.storage import content_addressed_name, file_digest
+from recipe.bulk import bulk_create_returning
+
+BENCH_PASSWORD = 'bench-password'
+
+# Most used first, see _zipf_weights
+TAG_NAMES = (
+    'Dinner', 'Quick', 'Vegetarian', 'Healthy', 'Lunch', 'Breakfast',
+    'Dessert', 'Vegan', 'Comfort food', 'Italian', 'Baking', 'Spicy',
+    'Gluten free', 'Soup', 'Salad', 'Mexican', 'Indian', 'Snack', 'Grill',
+    'Thai',
+)
+INGREDIENT_NAMES = (
+    'Salt', 'Olive oil', 'Garlic', 'Onion', 'Butter', 'Black pepper',
+    'Egg', 'Sugar', 'Flour', 'Milk', 'Tomato', 'Lemon', 'Chicken',
+    'Parsley', 'Rice', 'Potato', 'Carrot', 'Cheese', 'Basil', 'Ginger',
+    'Chili', 'Cream', 'Coriander', 'Cumin', 'Mushroom', 'Spinach', 'Beef',
+    'Honey', 'Lime', 'Bacon', 'Paprika', 'Thyme', 'Pasta', 'Bell pepper',
+    'Chickpeas', 'Coconut milk', 'Soy sauce', 'Yogurt', 'Cinnamon',
+    'Salmon',
+)
+DISHES = (
+    'soup', 'salad', 'curry', 'stew', 'pie', 'pasta', 'risotto', 'tart',
+    'bowl', 'stir fry', 'roast', 'cake', 'bake', 'skewers', 'omelette',
+)
+
+
+def create_bench_user(prefix='bench'):
+    """
+    Create a throwaway user to own benchmark data
+    """
+    return get_user_model().objects.create_user(
+        email=f'{prefix}-{uuid.uuid4().hex[:12]}@bench.local',
+        password=None,
+        name='Benchmark'
+    )
+
+
+def seed_user_data(user, recipes, tags=50, ingredients=200,
+                   tags_per_recipe=3, ingredients_per_recipe=8,
+                   batch_size=5000, seed=0):
+    """
+    Bulk insert tags, ingredients and recipes with linked through rows
+    for user. Tag and ingredient popularity follow a Zipf-like
+    distribution so that a few names are linked to most recipes
+    """
+    rng = random.Random(seed)
+    tag_ids = _insert_named(Tag, user, TAG_NAMES, tags, batch_size)
+    ingredient_names = _names(INGREDIENT_NAMES, ingredients)
+    ingredient_ids = _insert_named(
+        Ingredient, user, INGREDIENT_NAMES, ingredients, batch_size)
+    tag_weights = _zipf_weights(len(tag_ids))
+    ingredient_weights = _zipf_weights(len(ingredient_ids))
+
+    TagLink = Recipe.tags.through
+    IngredientLink = Recipe.ingredients.through
+
+    created = 0
+    while created < recipes:
+        size = min(batch_size, recipes - created)
+        batch = []
+        links = []
+        for _ in range(size):
+            recipe_tags = _pick(rng, tag_ids, tag_weights, tags_per_recipe)
+            recipe_ingredients = _pick(
+                rng, range(len(ingredient_ids)), ingredient_weights,
+                ingredients_per_recipe)
+            # the rarest ingredient names the dish
+            main = max(recipe_ingredients, default=None)
+            title = rng.choice(DISHES).capitalize() if main is None \
+                else f'{ingredient_names[main]} {rng.choice(DISHES)}'
+            batch.append(Recipe(
+                user=user,
+                title=title,
+                time_minutes=rng.randint(5, 240),
+                price=Decimal(rng.randint(100, 99999)) / 100,
+            ))
+            links.append((recipe_tags, recipe_ingredients))
+        recipe_ids = [recipe.pk for recipe in
+                      bulk_create_returning(Recipe, user, batch, batch_size)]
+
+        tag_links = []
+        ingredient_links = []
+        for recipe_id, (recipe_tags, recipe_ingredients) in zip(recipe_ids,
+                                                                links):
+            for tag_id in recipe_tags:
+                tag_links.append(TagLink(recipe_id=recipe_id, tag_id=tag_id))
+            for index in recipe_ingredients:
+                ingredient_links.append(IngredientLink(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_ids[index]))
+        TagLink.objects.bulk_create(tag_links, batch_size)
+        IngredientLink.objects.bulk_create(ingredient_links, batch_size)
+        created += size
+
+    return created
+
+
+def analyze(models):
+    """
+    Refresh planner statistics after a bulk load
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(
+                f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+
+def create_bench_users(prefix, count, password=BENCH_PASSWORD,
+                       batch_size=5000):
+    """
+    Bulk insert count users sharing password, each with an API token,
+    and return them
+    """
+    User = get_user_model()
+    hashed = make_password(password)
+    email_prefix = f'{prefix}-{uuid.uuid4().hex[:8]}-'
+    User.objects.bulk_create([
+        User(email=f'{email_prefix}{index}@bench.local',
+             name='Benchmark', password=hashed)
+        for index in range(count)
+    ], batch_size)
+    users = list(User.objects.filter(email__startswith=email_prefix)
+                 .order_by('id'))
+    Token.objects.bulk_create([
+        Token(user=user, key=Token.generate_key()) for user in users
+    ], batch_size)
+    return users
+
+
+def bench_users(prefix):
+    """
+    Return the users created by create_bench_users with prefix
+    """
+    return get_user_model().objects.filter(
+        email__startswith=f'{prefix}-', email__endswith='@bench.local')
+
+
+def split_recipes(recipes, users):
+    """
+    Split recipes over users like tag popularity, a few heavy users own
+    most recipes and most users a handful
+    """
+    weights = _zipf_weights(users)
+    total = sum(weights)
+    counts = [int(recipes * weight / total) for weight in weights]
+    for index in range(recipes - sum(counts)):
+        counts[index % users] += 1
+    return counts
+
+
+def seed_images(recipe_ids, storage, size=64):
+    """
+    Store a distinct small JPEG for each recipe and link it without
+    sending signals, return the stored names
+    """
+    names = []
+    for index, recipe_id in enumerate(recipe_ids):
+        buffer = io.BytesIO()
+        color = ((index * 37) % 256, (index * 91) % 256, (index // 256) % 256)
+        Image.new('RGB', (size, size), color).save(buffer, 'JPEG')
+        content = ContentFile(buffer.getvalue())
+        name = storage.save(content_addressed_name(
+            'uploads/recipe/', file_digest(content), 'jpg'), content)
+        Recipe.objects.filter(pk=recipe_id).update(image=name)
+        names.append(name)
+    return names
+
+
+def _names(words, count):
+    """
+    Return count distinct names, words first and then numbered words
+    """
+    return [words[index % len(words)] if index < len(words)
+            else f'{words[index % len(words)]} {index // len(words) + 1}'
+            for index in range(count)]
+
+
+def _insert_named(model, user, words, count, batch_size):
+    """
+    Insert count named rows of model for user and return their ids
+    """
+    objs = [model(user=user, name=name) for name in _names(words, count)]
+    return [obj.pk for obj in
+            bulk_create_returning(model, user, objs, batch_size)]
+
+
+def _zipf_weights(count):
+    """
+    Weights where the n-th item is picked 1/n as often as the first
+    """
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def _pick(rng, ids, weights, count):
+    """
+    Pick up to count distinct ids using weights
+    """
+    if not ids or not count:
+        return set()
+    return set(rng.choices(ids, weights, k=count))
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import LiveServerTestCase, TransactionTestCase, \
+    override_settings
+
+from core.models import Recipe, User
+
+
+class TestBenchCommands(TransactionTestCase):
+    def test_bench_explain_compare(self):
+        """
+        Test that bench_explain prints plans before and after the
+        index migrations and removes its data
+        """
+        out = StringIO()
+        call_command('bench_explain', recipes=20, tags=5, ingredients=5,
+                     repeat=1, compare=True, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('before indexes', output)
+        self.assertIn('after indexes', output)
+        self.assertIn('recipes by tag', output)
+        self.assertFalse(User.objects.exists())
+
+    def test_bench_bulk_create(self):
+        """
+        Test that bench_bulk_create reports both strategies
+        """
+        out = StringIO()
+        call_command('bench_bulk_create', count=3, stdout=out)
+
+        self.assertIn('single POSTs', out.getvalue())
+        self.assertIn('bulk POST', out.getvalue())
+        self.assertFalse(User.objects.exists())
+
+    def test_bench_serializers(self):
+        """
+        Test that bench_serializers compares both read paths
+        """
+        out = StringIO()
+        call_command('bench_serializers', sizes=[20], repeat=1, stdout=out)
+
+        self.assertIn('20 recipes', out.getvalue())
+        self.assertIn('values()', out.getvalue())
+        self.assertFalse(User.objects.exists())
+
+    def test_bench_filters(self):
+        """
+        Test that bench_filters times every filter combination
+        """
+        out = StringIO()
+        call_command('bench_filters', recipes=20, tags=5, ingredients=5,
+                     repeat=1, explain=True, stdout=out)
+
+        self.assertIn('all of 2 tags', out.getvalue())
+        self.assertIn('max_price', out.getvalue())
+        self.assertFalse(User.objects.exists())
+
+
+class TestBenchLoad(LiveServerTestCase):
+    def test_bench_load(self):
+        """
+        Test that bench_load reports latencies of a running server
+        """
+        out = StringIO()
+        call_command('bench_load', connections=4, duration=0.5,
+                     target=[f'live={self.live_server_url}/api/recipe/'],
+                     stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('== live', output)
+        self.assertIn('p99:', output)
+        self.assertIn('200: ', output)
+
+
+class TestBenchApi(LiveServerTestCase):
+    def setUp(self) -> None:
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        # bench_api reads /metrics with the token
+        overrides = override_settings(
+            MEDIA_ROOT=self.media.name,
+            METRICS=dict(settings.METRICS, AUTH_TOKEN='bench'))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_seed_and_drive_api(self):
+        """
+        Test that bench_seed seeds users with recipes and images and
+        bench_api reports every scenario into a JSON file
+        """
+        out = StringIO()
+        call_command('bench_seed', users=3, recipes=30, tags=5,
+                     ingredients=10, images=2, stdout=out)
+
+        self.assertIn('Seeded 3 users', out.getvalue())
+        self.assertEqual(Recipe.objects.count(), 30)
+        self.assertEqual(Recipe.objects.exclude(image='').count(), 2)
+
+        output = os.path.join(self.media.name, 'results.json')
+        out = StringIO()
+        call_command('bench_api', url=self.live_server_url, clients=3,
+                     connections=2, duration=0.2, output=output,
+                     stdout=out)
+        call_command('bench_api', url=self.live_server_url, clients=3,
+                     connections=2, duration=0.2, compare=output,
+                     scenario=['recipe-list'], stdout=out)
+
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(results['recipes'], 30)
+        scenarios = results['scenarios']
+        self.assertIn('media', scenarios)
+        self.assertEqual(set(scenarios['recipe-list']['statuses']), {'200'})
+        self.assertEqual(set(scenarios['media']['statuses']), {'200'})
+        self.assertEqual(set(scenarios['user-token']['statuses']), {'200'})
+        self.assertGreater(scenarios['recipe-list']['queries_per_request'], 0)
+        self.assertIn('p95', out.getvalue())
+        self.assertIn('(was ', out.getvalue())
@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def probe_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Open the connection of alias if needed and run a trivial query.
+    Raises OperationalError while the database does not accept queries
+    """
+    connection = connections[alias]
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def backoff_delays(base, maximum, rng=random):
+    """
+    Yield exponentially growing delays capped at maximum, each drawn
+    uniformly below its cap so that restarting workers spread out
+    """
+    cap = base
+    while True:
+        yield rng.uniform(0, cap)
+        cap = min(cap * 2, maximum)
+
+
+def check_connections(**kwargs):
+    """
+    Close persistent connections that broke while idle, before a request
+    uses them. Django 3.2 only drops a connection after an error inside
+    a request, so a database restart would fail the first request of
+    every worker. Connections used within settings.DB_HEALTH_CHECK_IDLE
+    seconds are trusted without a round trip
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        idle_since = getattr(connection, 'idle_since', None)
+        if idle_since is not None and \
+                now - idle_since < settings.DB_HEALTH_CHECK_IDLE:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def mark_connections_idle(**kwargs):
+    """
+    Record when the open connections were last used by a request
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.idle_since = now
@@ -0,0 +1,42 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.importer import RecipeImporter
+
+
+class Command(BaseCommand):
+    """
+    Django command to import recipes for a user from a
+    newline-delimited JSON file
+    """
+    help = (
+        "Import recipes from a newline-delimited JSON file ('-' for "
+        "stdin), one recipe per line with tags and ingredients by name."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        importer = RecipeImporter(user, chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            summary = importer.run(sys.stdin.buffer)
+        else:
+            with open(options['path'], 'rb') as lines:
+                summary = importer.run(lines)
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} recipes, "
+            f"{summary['failed']} failed"
+        ))
@@ -0,0 +1,114 @@
+import io
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import get_store, profile_token
+
+SORTS = ('cumulative', 'tottime', 'calls')
+
+
+class Command(BaseCommand):
+    """
+    Django command listing and summarizing the request profiles of
+    core.profiling
+    """
+    help = (
+        "List the saved request profiles, newest or with --slowest "
+        "slowest first. --show NAME (or 'latest') prints the top --limit "
+        "functions by --sort and the slowest queries of a profile, "
+        "--summary the same over all profiles of --route along with their "
+        "time per route. --token prints a value of the PROFILING HEADER "
+        "asking the server to profile a request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', help="e.g. recipe:recipe-list")
+        parser.add_argument('--slowest', action='store_true')
+        parser.add_argument('--show', metavar='NAME')
+        parser.add_argument('--summary', action='store_true')
+        parser.add_argument('--sort', choices=SORTS, default='cumulative')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--token', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(profile_token())
+            return
+        store = get_store()
+        infos = [store.info(name) for name in store.names()]
+        if options['route']:
+            infos = [info for info in infos
+                     if info['route'] == options['route']]
+        if options['show']:
+            self.show(store, infos, options)
+        elif options['summary']:
+            self.summary(store, infos, options)
+        else:
+            self.list(infos, options)
+
+    def list(self, infos, options):
+        if options['slowest']:
+            infos = sorted(infos, key=lambda info: info['duration'])
+        for info in reversed(infos[-options['limit']:]):
+            created = time.strftime('%Y-%m-%d %H:%M:%S',
+                                    time.localtime(info['created']))
+            sql = sum(query['duration'] for query in info['queries'])
+            self.stdout.write(
+                f"{info['name']}  {created}  {info['status']}  "
+                f"{info['duration'] * 1000:8.1f} ms  "
+                f"{len(info['queries']):3} queries {sql * 1000:7.1f} ms  "
+                f"{info['method']} {info['path']}")
+
+    def show(self, store, infos, options):
+        name = options['show']
+        if name == 'latest':
+            if not infos:
+                raise CommandError("No profiles saved")
+            info = infos[-1]
+        else:
+            info = next((info for info in infos if info['name'] == name),
+                        None)
+            if info is None:
+                raise CommandError(f"No profile {name!r}")
+        self.stdout.write(
+            f"{info['method']} {info['path']} ({info['route']}): "
+            f"{info['status']} in {info['duration'] * 1000:.1f} ms")
+        self.print_stats(store, [info['name']], options)
+        self.print_queries(info['queries'], options['limit'])
+
+    def summary(self, store, infos, options):
+        if not infos:
+            raise CommandError("No profiles saved")
+        routes = defaultdict(list)
+        for info in infos:
+            routes[info['route']].append(info)
+        for route, route_infos in sorted(routes.items(), key=str):
+            durations = sorted(info['duration'] for info in route_infos)
+            queries = sum(len(info['queries']) for info in route_infos)
+            self.stdout.write(
+                f"{route}: {len(durations)} profiles, "
+                f"mean {sum(durations) / len(durations) * 1000:.1f} ms, "
+                f"max {durations[-1] * 1000:.1f} ms, "
+                f"{queries / len(durations):.1f} queries")
+        self.print_stats(store, [info['name'] for info in infos], options)
+        self.print_queries(
+            [query for info in infos for query in info['queries']],
+            options['limit'])
+
+    def print_stats(self, store, names, options):
+        output = io.StringIO()
+        stats = store.stats(names[0], stream=output)
+        for name in names[1:]:
+            stats.add(store.path(name, 'prof'))
+        stats.strip_dirs().sort_stats(options['sort'])\
+            .print_stats(options['limit'])
+        self.stdout.write(output.getvalue(), ending='')
+
+    def print_queries(self, queries, limit):
+        self.stdout.write(self.style.MIGRATE_HEADING("Slowest queries"))
+        for query in sorted(queries, key=lambda query: query['duration'],
+                            reverse=True)[:limit]:
+            self.stdout.write(
+                f"{query['duration'] * 1000:8.2f} ms  {query['sql']}")
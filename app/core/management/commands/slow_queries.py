@@ -0,0 +1,97 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORTS = ('total', 'count', 'max')
+
+
+class Command(BaseCommand):
+    """
+    Django command summarizing the slow-query log of core.slowlog
+    """
+    help = (
+        "Group the statements of the slow-query logs --log (by default "
+        "SLOW_QUERIES LOG_FILE) by fingerprint and print the --limit "
+        "groups with the most --sort time, with their views, the tables "
+        "their plans read in full and, with --plans, the plan of their "
+        "slowest statement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', action='append')
+        parser.add_argument('--sort', choices=SORTS, default='total')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--plans', action='store_true')
+
+    def handle(self, *args, **options):
+        paths = options['log'] or [settings.SLOW_QUERIES['LOG_FILE']]
+        if not all(paths):
+            raise CommandError("Pass --log or set SLOW_QUERY_LOG")
+        groups = {}
+        for path in paths:
+            try:
+                with open(path) as f:
+                    for line in f:
+                        self.add(groups, line)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+
+        key = {
+            'total': lambda group: group['total'],
+            'count': lambda group: group['count'],
+            'max': lambda group: group['slowest']['duration'],
+        }[options['sort']]
+        ranked = sorted(groups.values(), key=key, reverse=True)
+        self.stdout.write(f"{len(groups)} fingerprints")
+        for group in ranked[:options['limit']]:
+            self.report(group, options['plans'])
+
+    def add(self, groups, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(record, dict) or 'fingerprint' not in record:
+            return
+        group = groups.get(record['fingerprint'])
+        if group is None:
+            group = groups[record['fingerprint']] = {
+                'fingerprint': record['fingerprint'],
+                'statement': record['statement'],
+                'logged': 0,
+                'count': 0,
+                'total': 0.0,
+                'views': Counter(),
+                'full_scans': set(),
+                'slowest': record,
+            }
+        group['logged'] += 1
+        # statements held back by the rate limit count without a time
+        group['count'] += 1 + record.get('suppressed', 0)
+        group['total'] += record['duration']
+        group['views'][record.get('view') or '-'] += 1
+        group['full_scans'].update(record.get('full_scans') or ())
+        if record['duration'] > group['slowest']['duration']:
+            group['slowest'] = record
+
+    def report(self, group, plans):
+        slowest = group['slowest']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{group['fingerprint']}  {group['count']} times, "
+            f"mean {group['total'] / group['logged'] * 1000:.1f} ms, "
+            f"max {slowest['duration'] * 1000:.1f} ms"))
+        self.stdout.write(f"  {group['statement']}")
+        views = ', '.join(f'{view} ({count})' for view, count
+                          in group['views'].most_common(5))
+        self.stdout.write(f"  views: {views}")
+        if slowest.get('serializer') or slowest.get('location'):
+            self.stdout.write(f"  slowest from: {slowest.get('location')} "
+                              f"serializer {slowest.get('serializer')}")
+        if group['full_scans']:
+            self.stdout.write(self.style.WARNING(
+                f"  full scans: {', '.join(sorted(group['full_scans']))}"))
+        if plans and slowest.get('plan'):
+            for line in slowest['plan'].splitlines():
+                self.stdout.write(f"    {line}")
@@ -1,22 +1,56 @@
 import time
 
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import backoff_delays, probe_database
+from core.warmup import warm_up
 
 
 class Command(BaseCommand):
     """
     Django command to wait till db is ready
     """
+    help = (
+        "Wait until the database answers a query, retrying with jittered "
+        "exponential backoff up to --timeout seconds. With --warmup, "
+        "then run core.warmup and print the time of each step. The "
+        "command's process exits afterwards, so this only checks that "
+        "the warmup works and how long it takes; servers warm their own "
+        "processes with DJANGO_WARMUP=1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=60.0)
+        parser.add_argument('--max-delay', type=float, default=5.0)
+        parser.add_argument('--warmup', action='store_true')
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for db")
-        db_conn = None
-        while not db_conn:
+        alias = options['database']
+        deadline = time.monotonic() + options['timeout']
+        delays = backoff_delays(0.1, options['max_delay'])
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write("DB unavailable , wait for 1 sec")
-                time.sleep(1)
+                probe_database(alias)
+                break
+            except OperationalError as exc:
+                # drop the half open connection before the next attempt
+                connections[alias].close()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"DB unavailable after {options['timeout']}s: {exc}")
+                delay = min(next(delays), remaining)
+                self.stdout.write(
+                    f"DB unavailable, wait for {delay:.2f} sec")
+                time.sleep(delay)
 
         self.stdout.write(self.style.SUCCESS("DB available"))
+
+        if options['warmup']:
+            for name, seconds in warm_up():
+                self.stdout.write(f"Warmed up {name} in "
+                                  f"{seconds * 1000:.1f} ms")
@@ -0,0 +1,311 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+PREFIX = 'drf_recipe_'
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name, help, upper bounds of the buckets
+HISTOGRAMS = (
+    ('request_duration_seconds', 'Wall time of requests.', SECONDS_BUCKETS),
+    ('db_queries', 'Database queries per request.', QUERY_BUCKETS),
+    ('db_duration_seconds', 'Database time per request.', SECONDS_BUCKETS),
+    ('serializer_duration_seconds',
+     'Serializer time per request, including the queries it runs.',
+     SECONDS_BUCKETS),
+    ('response_size_bytes', 'Response body size.', BYTES_BUCKETS),
+)
+
+
+class RequestStats:
+    """
+    Query and serializer measurements of the request being served
+    """
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def collect_stats():
+    """
+    Collect the measurements of the block, and of the threads the block
+    hands its context to, into a new RequestStats
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current stats,
+    installed on every connection by core.signals
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def time_serializer():
+    """
+    Add the time of the block to the current serializer time, once for
+    nested blocks
+    """
+    stats = _current.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+        stats.serializing = False
+
+
+class RouteMetrics:
+    """
+    Request counts by status and histograms of one route
+    """
+    __slots__ = ('requests', 'counts', 'sums')
+
+    def __init__(self):
+        self.requests = {}
+        self.counts = [[0] * (len(buckets) + 1)
+                       for _name, _help, buckets in HISTOGRAMS]
+        self.sums = [0.0] * len(HISTOGRAMS)
+
+    def record(self, status, values):
+        self.requests[status] = self.requests.get(status, 0) + 1
+        for index, value in enumerate(values):
+            self.counts[index][bisect_left(HISTOGRAMS[index][2], value)] += 1
+            self.sums[index] += value
+
+    def snapshot(self):
+        return {
+            'requests': dict(self.requests),
+            'counts': [list(counts) for counts in self.counts],
+            'sums': list(self.sums),
+        }
+
+
+def merge_snapshots(total, snapshot):
+    """
+    Add the route metrics of snapshot to total
+    """
+    for route, metrics in snapshot.items():
+        merged = total.get(route)
+        if merged is None:
+            total[route] = {
+                'requests': dict(metrics['requests']),
+                'counts': [list(counts) for counts in metrics['counts']],
+                'sums': list(metrics['sums']),
+            }
+            continue
+        for status, count in metrics['requests'].items():
+            merged['requests'][status] = \
+                merged['requests'].get(status, 0) + count
+        for index, counts in enumerate(metrics['counts']):
+            merged['counts'][index] = [
+                a + b for a, b in zip(merged['counts'][index], counts)]
+            merged['sums'][index] += metrics['sums'][index]
+    return total
+
+
+class MetricsRegistry:
+    """
+    Per-route metrics of this process. Each thread records into its own
+    shard, so recording takes no lock; readers merge the shards. With a
+    directory, the process writes its totals there every flush_interval
+    seconds and collect() adds up the files of all workers
+    """
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.path = None
+        if directory:
+            self.path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, route, status, values):
+        """
+        Record a request to route, values in the order of HISTOGRAMS
+        """
+        shard = self._shard()
+        metrics = shard.get(route)
+        if metrics is None:
+            metrics = shard[route] = RouteMetrics()
+        metrics.record(str(status), values)
+        if self.path and \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        """
+        Return the merged metrics of this process
+        """
+        with self._shards_lock:
+            shards = list(self._shards)
+        total = {}
+        for shard in shards:
+            merge_snapshots(total, {
+                route: metrics.snapshot()
+                for route, metrics in list(shard.items())
+            })
+        return total
+
+    def flush(self):
+        """
+        Write the metrics of this process to its file in directory
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            os.makedirs(self.directory, exist_ok=True)
+            temp = f'{self.path}.{uuid.uuid4().hex}.tmp'
+            with open(temp, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp, self.path)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """
+        Return the metrics of all workers writing to directory, those
+        of this process live
+        """
+        total = {}
+        if self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if not name.endswith('.json') or path == self.path:
+                    continue
+                try:
+                    with open(path) as f:
+                        merge_snapshots(total, json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return merge_snapshots(total, self.snapshot())
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    Return the registry configured by settings.METRICS
+    """
+    global _registry
+    if _registry is None:
+        config = settings.METRICS
+        _registry = MetricsRegistry(config['DIRECTORY'],
+                                    config['FLUSH_INTERVAL'])
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_registry(setting, **kwargs):
+    """
+    Start over when settings are overridden in tests
+    """
+    global _registry
+    if setting == 'METRICS':
+        _registry = None
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"')\
+        .replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(snapshot):
+    """
+    Return snapshot in the Prometheus text exposition format
+    """
+    routes = sorted(snapshot.items())
+    lines = [
+        f'# HELP {PREFIX}requests_total Requests by route and status.',
+        f'# TYPE {PREFIX}requests_total counter',
+    ]
+    for route, metrics in routes:
+        for status, count in sorted(metrics['requests'].items()):
+            lines.append(f'{PREFIX}requests_total{{route="{_label(route)}",'
+                         f'status="{status}"}} {count}')
+
+    for index, (name, help_text, buckets) in enumerate(HISTOGRAMS):
+        lines.append(f'# HELP {PREFIX}{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{name} histogram')
+        for route, metrics in routes:
+            label = f'route="{_label(route)}"'
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',),
+                                    metrics['counts'][index]):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{{{label},'
+                             f'le="{_number(bound)}"}} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{{{label}}} '
+                         f'{_number(metrics["sums"][index])}')
+            lines.append(f'{PREFIX}{name}_count{{{label}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(duration, stats):
+    """
+    Return the Server-Timing header value of a request
+    """
+    return (f'db;dur={stats.db_time * 1000:.2f};'
+            f'desc="{stats.queries} queries", '
+            f'ser;dur={stats.serializer_time * 1000:.2f}, '
+            f'total;dur={duration * 1000:.2f}')
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from core.metrics import collect_stats, get_registry, server_timing
+from core.profiling import capture_request, get_store, profile_wanted
+from core.routers import get_replica_pool, reads_from
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'primary_until'
+
+
+def replica_view(request):
+    """
+    Return whether the view of request opted in to replica reads with
+    a replica_reads attribute
+    """
+    try:
+        match = resolve(request.path_info,
+                        getattr(request, 'urlconf', None))
+    except Resolver404:
+        return False
+    view = getattr(match.func, 'cls', match.func)
+    return getattr(view, 'replica_reads', False)
+
+
+def client_key(request):
+    """
+    Return the cache key of the client of request, by its token or
+    session, None for anonymous clients
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or \
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'primary-until:{digest}'
+
+
+class ReadYourWrites:
+    """
+    Keep clients on the primary for STICKY_SECONDS after they wrote,
+    longer than the replicas lag. Token clients are tracked in the
+    REPLICA_ROUTING cache, which must be shared by all workers, browsers
+    also by a cookie
+    """
+    def __init__(self, config):
+        self.cache = caches[config['CACHE']]
+        self.seconds = config['STICKY_SECONDS']
+
+    def is_sticky(self, request):
+        try:
+            if float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        key = client_key(request)
+        return key is not None and self.cache.get(key) is not None
+
+    def stick(self, request, response):
+        until = time.time() + self.seconds
+        key = client_key(request)
+        if key is not None:
+            self.cache.set(key, until, self.seconds)
+        response.set_cookie(STICKY_COOKIE, f'{until:.0f}',
+                            max_age=self.seconds, httponly=True,
+                            samesite='Lax')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe requests to views with replica_reads to a
+    healthy replica, see core.routers, unless the client wrote recently
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with reads_from(self.choose_alias(request)):
+            response = self.get_response(request)
+        self.process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        alias = await sync_to_async(
+            self.choose_alias, thread_sensitive=False)(request)
+        with reads_from(alias):
+            response = await self.get_response(request)
+        await sync_to_async(
+            self.process_response, thread_sensitive=False)(request, response)
+        return response
+
+    def choose_alias(self, request):
+        """
+        Return the replica alias for request, None for the primary
+        """
+        pool = get_replica_pool()
+        if not pool.weights or request.method not in SAFE_METHODS:
+            return None
+        if not replica_view(request):
+            return None
+        if ReadYourWrites(settings.REPLICA_ROUTING).is_sticky(request):
+            return None
+        return pool.choose()
+
+    def process_response(self, request, response):
+        # failed writes may have written too
+        if request.method not in SAFE_METHODS and get_replica_pool().weights:
+            ReadYourWrites(settings.REPLICA_ROUTING).stick(request, response)
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, queries, database and serializer time and body
+    size of every request by resolved route into core.metrics, and
+    report them in a Server-Timing header
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with collect_stats() as stats:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with collect_stats() as stats:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unresolved'
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        get_registry().record(route, response.status_code, (
+            duration, stats.queries, stats.db_time, stats.serializer_time,
+            size,
+        ))
+        if settings.METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(duration, stats)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests with a signed PROFILING header, or sampled at
+    SAMPLE_RATE, and save those that reached a view profiled with
+    recipe.mixins.ProfiledViewMixin to the store of core.profiling
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not profile_wanted(request):
+            return self.get_response(request)
+        start = time.perf_counter()
+        with capture_request() as capture:
+            response = self.get_response(request)
+        self.save(request, response, time.perf_counter() - start, capture)
+        return response
+
+    async def __acall__(self, request):
+        if not profile_wanted(request):
+            return await self.get_response(request)
+        start = time.perf_counter()
+        with capture_request() as capture:
+            response = await self.get_response(request)
+        await sync_to_async(self.save, thread_sensitive=False)(
+            request, response, time.perf_counter() - start, capture)
+        return response
+
+    def save(self, request, response, duration, capture):
+        if not capture.profiled:
+            return
+        match = getattr(request, 'resolver_match', None)
+        get_store().save(capture, {
+            'created': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match is not None else None,
+            'status': response.status_code,
+            'duration': duration,
+        })
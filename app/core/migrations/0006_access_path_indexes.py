@@ -0,0 +1,42 @@
+# Indexes are built concurrently so the migration can run against large
+# live tables, which requires running outside a transaction.
+
+from django.db import migrations, models
+
+import core.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_tag_user_name_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_ingr_user_name_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='core_recipe_user_id_idx'),
+        ),
+        core.operations.AddThroughIndexConcurrently(
+            model_name='recipe',
+            field_name='tags',
+            fields=['tag', 'recipe'],
+            name='core_rcp_tags_tag_rcp_idx',
+        ),
+        core.operations.AddThroughIndexConcurrently(
+            model_name='recipe',
+            field_name='ingredients',
+            fields=['ingredient', 'recipe'],
+            name='core_rcp_ingr_ingr_rcp_idx',
+        ),
+    ]
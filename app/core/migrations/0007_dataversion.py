@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to='core.user')),
+                ('version', models.BigIntegerField(default=0)),
+                ('modified', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Indexes are built concurrently, see 0006_access_path_indexes.
+
+from django.db import migrations, models
+
+import core.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_content_addressed_images'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price'], name='core_recipe_user_price_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minutes'], name='core_recipe_user_time_idx'),
+        ),
+    ]
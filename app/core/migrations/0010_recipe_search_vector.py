@@ -0,0 +1,49 @@
+# The GIN index is built concurrently and only on PostgreSQL, other
+# databases search without the vector (see recipe.search). Existing
+# recipes are backfilled first, in batches each committed on its own.
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+import core.operations
+
+BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from recipe.search import update_search_vectors
+
+    Recipe = apps.get_model('core', 'Recipe')
+    last_id = 0
+    while True:
+        ids = list(Recipe.objects.filter(id__gt=last_id).order_by('id')
+                   .values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        update_search_vectors(ids)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        core.operations.AddPostgresIndexConcurrently(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Indexes for tag and ingredient autocomplete (see recipe.autocomplete),
+# PostgreSQL only and built concurrently:
+# - (user, upper(name) text_pattern_ops) serves name__istartswith, which
+#   Django compiles to UPPER(name::text) LIKE UPPER('prefix%')
+# - GIN (user, name gin_trgm_ops) serves name__trigram_similar
+# The extensions are left installed on reverse.
+
+from django.db import migrations
+
+import core.operations
+
+
+def index_sql(table, name):
+    prefix = (
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}_prefix_idx '
+        f'ON {table} (user_id, upper(name::text) text_pattern_ops)'
+    )
+    trigram = (
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}_trgm_idx '
+        f'ON {table} USING gin (user_id, name gin_trgm_ops)'
+    )
+    return [
+        core.operations.RunPostgresSQL(
+            prefix, f'DROP INDEX CONCURRENTLY IF EXISTS {name}_prefix_idx'),
+        core.operations.RunPostgresSQL(
+            trigram, f'DROP INDEX CONCURRENTLY IF EXISTS {name}_trgm_idx'),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        core.operations.RunPostgresSQL(
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm', migrations.RunSQL.noop),
+        core.operations.RunPostgresSQL(
+            'CREATE EXTENSION IF NOT EXISTS btree_gin', migrations.RunSQL.noop),
+        *index_sql('core_tag', 'core_tag_name'),
+        *index_sql('core_ingredient', 'core_ingr_name'),
+    ]
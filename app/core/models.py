@@ -1,20 +1,38 @@
 import uuid
 import os
 
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 
 from django.conf import settings
 
+from core.storage import ContentAddressedStorage, content_addressed_name, \
+    file_digest
+
 
 def recipe_image_file_path(instance, file_name):
     """
-    Generate file path for new recipe image
+    Generate file path for new recipe image, named by the digest of
+    its content in sharded directories. The content is the file being
+    saved with the recipe, falls back to a random name when it is not
+    at hand
     """
     ext = file_name.split('.')[-1]
-    file_name = f'{uuid.uuid4()}.{ext}'
-    return os.path.join('uploads/recipe/', file_name)
+    image = getattr(instance, 'image', None)
+    try:
+        content = image.file if image else None
+    except (ValueError, OSError):
+        content = None
+    if content is None:
+        file_name = f'{uuid.uuid4()}.{ext}'
+        return os.path.join('uploads/recipe/', file_name)
+    return content_addressed_name(
+        'uploads/recipe/', file_digest(content), ext)
 
 
 class UserManager(BaseUserManager):
@@ -73,6 +91,13 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        # Per-user list ordering, see recipe.pagination
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_tag_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -87,6 +112,12 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_ingr_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -108,7 +139,77 @@ class Recipe(models.Model):
 
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(null=True, upload_to=recipe_image_file_path,
+                              storage=ContentAddressedStorage())
+    # Title, tag and ingredient names, kept on PostgreSQL only
+    # (see recipe.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'],
+                         name='core_recipe_user_id_idx'),
+            # Reference counting of shared image files
+            models.Index(fields=['image'], name='core_recipe_image_idx'),
+            # Price and time filters, see recipe.filters
+            models.Index(fields=['user', 'price'],
+                         name='core_recipe_user_price_idx'),
+            models.Index(fields=['user', 'time_minutes'],
+                         name='core_recipe_user_time_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='core_recipe_search_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored image to release it once replaced
+        if 'image' in field_names:
+            instance._stored_image = values[field_names.index('image')]
+        return instance
 
     def __str__(self):
         return self.title
+
+
+class DataVersionManager(models.Manager):
+    """
+    Provides helper functions to bump per-user data versions
+    """
+    def bump(self, user_id, create=True):
+        """
+        Increment the data version of the user, creating it when missing
+        unless create is False
+        """
+        now = timezone.now()
+        updated = self.filter(user_id=user_id)\
+            .update(version=F('version') + 1, modified=now)
+        if updated or not create:
+            return
+        try:
+            with transaction.atomic():
+                self.create(user_id=user_id, version=1, modified=now)
+        except IntegrityError:
+            # created concurrently
+            self.filter(user_id=user_id)\
+                .update(version=F('version') + 1, modified=now)
+
+
+class DataVersion(models.Model):
+    """
+    Version of a user's tags, ingredients and recipes,
+    bumped on every write to them (see core.signals)
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='data_version',
+    )
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField()
+
+    objects = DataVersionManager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.version}'
@@ -0,0 +1,137 @@
+from django.contrib.postgres import operations as pg_operations
+from django.db import models
+from django.db.migrations.operations import RunSQL
+from django.db.migrations.operations.base import Operation
+
+
+def _index_kwargs(schema_editor):
+    """
+    Build indexes concurrently on PostgreSQL, other backends (sqlite used
+    for local test runs) do not support it
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        return {'concurrently': True}
+    return {}
+
+
+class AddIndexConcurrently(pg_operations.AddIndexConcurrently):
+    """
+    Create an index with CREATE INDEX CONCURRENTLY on PostgreSQL so that
+    large live tables are not locked for writes, and with a plain
+    CREATE INDEX on other databases.
+    Migrations using it must set atomic = False
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **_index_kwargs(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **_index_kwargs(schema_editor))
+
+
+class AddPostgresIndexConcurrently(AddIndexConcurrently):
+    """
+    AddIndexConcurrently for PostgreSQL specific indexes (GIN, GiST),
+    skipped on other databases
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+
+
+class AddThroughIndexConcurrently(pg_operations.NotInTransactionMixin,
+                                  Operation):
+    """
+    Concurrently create an index on the auto-created through table of
+    a many-to-many field.
+    Auto-created through models have no Meta.indexes, so the index only
+    exists in the database and the migration state is left untouched
+    """
+    reversible = True
+    atomic = False
+
+    def __init__(self, model_name, field_name, fields, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.fields = fields
+        self.name = name
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'field_name': self.field_name,
+            'fields': self.fields,
+            'name': self.name,
+        }
+        return self.__class__.__qualname__, [], kwargs
+
+    def describe(self):
+        return 'Concurrently create index %s on field(s) %s of %s.%s' % (
+            self.name,
+            ', '.join(self.fields),
+            self.model_name,
+            self.field_name,
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_through(self, app_label, state):
+        """
+        Return the through model of the many-to-many field
+        """
+        model = state.apps.get_model(app_label, self.model_name)
+        return model._meta.get_field(self.field_name).remote_field.through
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        through = self.get_through(app_label, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, through):
+            schema_editor.add_index(
+                through, models.Index(fields=self.fields, name=self.name),
+                **_index_kwargs(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        through = self.get_through(app_label, from_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, through):
+            schema_editor.remove_index(
+                through, models.Index(fields=self.fields, name=self.name),
+                **_index_kwargs(schema_editor))
+
+
+class RunPostgresSQL(RunSQL):
+    """
+    RunSQL only run on PostgreSQL, for schema other databases
+    have no equivalent of
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,176 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'core.profiling'
+
+
+class Capture:
+    """
+    cProfile profile and SQL statements of the request being profiled
+    """
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = []
+        self.profiled = False
+        self.running = False
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call func under the profiler, directly when nested
+        """
+        if self.running:
+            return func(*args, **kwargs)
+        self.running = True
+        try:
+            return self.profile.runcall(func, *args, **kwargs)
+        finally:
+            self.running = False
+            self.profiled = True
+
+
+_current = ContextVar('profile_capture', default=None)
+
+
+def current_capture():
+    return _current.get()
+
+
+@contextmanager
+def capture_request():
+    """
+    Capture the profiled views and the queries of the block, and of
+    the threads the block hands its context to, into a new Capture
+    """
+    capture = Capture()
+    token = _current.set(capture)
+    try:
+        yield capture
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each statement and its time to the
+    current capture, installed on every connection by core.signals.
+    Parameters are left out, profiles must not hold user data
+    """
+    capture = _current.get()
+    if capture is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        capture.queries.append({
+            'sql': sql,
+            'many': many,
+            'duration': time.perf_counter() - start,
+        })
+
+
+def profile_token():
+    """
+    Return a value of the PROFILING HEADER requesting a profile, valid
+    for TOKEN_MAX_AGE seconds
+    """
+    return signing.TimestampSigner(salt=SALT).sign(uuid.uuid4().hex)
+
+
+def profile_wanted(request):
+    """
+    Return whether request carries a valid signed profiling header or
+    is picked by the SAMPLE_RATE
+    """
+    config = settings.PROFILING
+    header = 'HTTP_' + config['HEADER'].upper().replace('-', '_')
+    value = request.META.get(header)
+    if value:
+        try:
+            signing.TimestampSigner(salt=SALT).unsign(
+                value, max_age=config['TOKEN_MAX_AGE'])
+            return True
+        except signing.BadSignature:
+            pass
+    return random.random() < config['SAMPLE_RATE']
+
+
+class ProfileStore:
+    """
+    Ring buffer of profiles in directory: each is a pstats file and a
+    JSON file of its request and queries, named by capture time, and
+    the oldest beyond max_profiles are removed as new ones are saved
+    """
+    def __init__(self, directory, max_profiles=100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def path(self, name, extension):
+        return os.path.join(self.directory, f'{name}.{extension}')
+
+    def save(self, capture, info):
+        """
+        Write capture with info about its request, return its name
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'{time.time_ns()}-{os.getpid()}'
+        capture.profile.dump_stats(self.path(name, 'prof'))
+        info = dict(info, name=name, queries=capture.queries)
+        temp = f"{self.path(name, 'json')}.{uuid.uuid4().hex}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(info, f)
+        # written last, a profile is listed once both files exist
+        os.replace(temp, self.path(name, 'json'))
+        self.prune()
+        return name
+
+    def names(self):
+        """
+        Return the names of the saved profiles, oldest first
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (name[:-len('.json')] for name in os.listdir(self.directory)
+             if name.endswith('.json')),
+            key=lambda name: [int(part) for part in name.split('-')])
+
+    def prune(self):
+        names = self.names()
+        for name in names[:max(len(names) - self.max_profiles, 0)]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(self.path(name, extension))
+                except FileNotFoundError:
+                    pass
+
+    def info(self, name):
+        """
+        Return the request info and queries of profile name
+        """
+        with open(self.path(name, 'json')) as f:
+            return json.load(f)
+
+    def stats(self, name, stream=None):
+        """
+        Return the pstats.Stats of profile name
+        """
+        return pstats.Stats(self.path(name, 'prof'), stream=stream)
+
+
+def get_store():
+    """
+    Return the store configured by settings.PROFILING
+    """
+    config = settings.PROFILING
+    return ProfileStore(config['DIRECTORY'], config['MAX_PROFILES'])
@@ -0,0 +1,155 @@
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.dispatch import receiver
+
+from core.db import probe_database
+
+logger = logging.getLogger(__name__)
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def read_alias():
+    """
+    Return the database alias reads of the current request go to,
+    None for the primary
+    """
+    return _read_alias.get()
+
+
+@contextmanager
+def reads_from(alias):
+    """
+    Route the reads made in the block, and in threads the block hands
+    its context to, to alias
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaPool:
+    """
+    Weighted choice among the replicas that answered their last health
+    check. A daemon thread checks them every check_interval seconds, so
+    requests never wait for a probe; until its first check completes
+    reads go to the primary
+    """
+    def __init__(self, weights, check_interval):
+        self.weights = {alias: weight for alias, weight in weights.items()
+                        if weight > 0}
+        self.check_interval = check_interval
+        self.healthy = ()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """
+        Probe every replica and keep those that answered
+        """
+        healthy = []
+        for alias in self.weights:
+            try:
+                probe_database(alias)
+                healthy.append(alias)
+            except DatabaseError:
+                connections[alias].close()
+        self.healthy = tuple(healthy)
+
+    def start(self):
+        """
+        Start the thread checking the replicas
+        """
+        if self.weights and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='replica-health', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception('Replica health check failed')
+                self._stopped.wait(self.check_interval)
+        finally:
+            connections.close_all()
+
+    def choose(self, rng=random):
+        """
+        Return a healthy replica alias, None if there is none
+        """
+        healthy = self.healthy
+        if not healthy:
+            return None
+        weights = tuple(self.weights[alias] for alias in healthy)
+        return rng.choices(healthy, weights)[0]
+
+
+_replica_pool = None
+
+
+def get_replica_pool():
+    """
+    Return the pool of the replicas in settings.REPLICA_ROUTING
+    """
+    global _replica_pool
+    if _replica_pool is None:
+        config = settings.REPLICA_ROUTING
+        _replica_pool = ReplicaPool(config['REPLICAS'],
+                                    config['HEALTH_CHECK_INTERVAL'])
+        _replica_pool.start()
+    return _replica_pool
+
+
+@receiver(setting_changed)
+def reset_replica_pool(setting, **kwargs):
+    """
+    Rebuild the pool when settings are overridden in tests
+    """
+    global _replica_pool
+    if setting == 'REPLICA_ROUTING' and _replica_pool is not None:
+        _replica_pool.stop()
+        _replica_pool = None
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica core.middleware picked for the request
+    and everything else to the primary. Models of PRIMARY_MODELS are
+    always read from the primary
+    """
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # reads inside a transaction must see its writes
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if model._meta.label_lower in \
+                settings.REPLICA_ROUTING['PRIMARY_MODELS']:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_ROUTING['REPLICAS']:
+            return False
+        return None
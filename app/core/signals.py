@@ -0,0 +1,58 @@
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.db import check_connections, mark_connections_idle
+from core.metrics import time_query
+from core.profiling import record_query
+from core.slowlog import log_slow_query
+from core.models import Tag, Ingredient, Recipe, DataVersion
+
+# after django.db's own close_old_connections receivers
+request_started.connect(check_connections)
+request_finished.connect(mark_connections_idle)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """
+    Log the slow queries of every connection with core.slowlog, count
+    them for core.metrics and record them in profiles of core.profiling.
+    The first wrapper is the outermost
+    """
+    for wrapper in (log_slow_query, time_query, record_query):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+def user_data_saved(sender, instance, **kwargs):
+    """
+    Bump the owner's data version on create and update
+    """
+    DataVersion.objects.bump(instance.user_id)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def user_data_deleted(sender, instance, **kwargs):
+    """
+    Bump the owner's data version on delete.
+    Never creates the version row, as this also runs while the user
+    itself is being deleted
+    """
+    DataVersion.objects.bump(instance.user_id, create=False)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, **kwargs):
+    """
+    Bump the owner's data version when recipe tags or ingredients change
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        DataVersion.objects.bump(instance.user_id)
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# applied in order, reduce a statement to its shape: literals and
+# placeholders to ?, IN lists, multi-row VALUES and SQLite's UNION ALL
+# inserts to a single item
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|%\(\w+\)s'), '?'),
+    (re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\?(?:, \?)*\)'), '(?)'),
+    (re.compile(r'(?:, \(\?\))+'), ''),
+    (re.compile(r'(?: UNION ALL SELECT \?(?:, \?)*)+'), ''),
+    (re.compile(r'\s+'), ' '),
+)
+EXPLAINED = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+# Seq Scan on PostgreSQL, SCAN without an index on SQLite
+FULL_SCAN = re.compile(
+    r'(?:Seq Scan on|\bSCAN(?: TABLE)?) "?(\w+)"?(?!.*\bUSING\b)')
+MAX_PARAMS = 50
+MAX_PARAM_LENGTH = 100
+# statements on credentials are logged without params and plan, which
+# on PostgreSQL shows the values too
+SENSITIVE = re.compile(r'"(?:authtoken_token|password)"')
+
+
+def fingerprint(sql):
+    """
+    Return the fingerprint and the normalized text of sql, equal for
+    statements differing only in their values
+    """
+    statement = sql
+    for pattern, replacement in NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    statement = statement.strip()
+    return hashlib.sha1(statement.encode()).hexdigest()[:16], statement
+
+
+def full_scans(plan):
+    """
+    Return the tables plan reads in full
+    """
+    return sorted(set(FULL_SCAN.findall(plan or '')))
+
+
+class FingerprintLimiter:
+    """
+    Let each fingerprint through at most once per interval seconds,
+    counting the occurrences held back in between
+    """
+    def __init__(self, interval, max_size=10000):
+        self.interval = interval
+        self.max_size = max_size
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """
+        Return whether key is let through, and how often it was held
+        back since it last was
+        """
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                return False, suppressed + 1
+            if len(self._seen) >= self.max_size:
+                self._seen.clear()
+            self._seen[key] = (now, 0)
+            return True, suppressed
+
+
+_limiter = None
+
+
+def get_limiter():
+    """
+    Return the limiter configured by settings.SLOW_QUERIES
+    """
+    global _limiter
+    if _limiter is None:
+        _limiter = FingerprintLimiter(settings.SLOW_QUERIES['RATE_LIMIT'])
+    return _limiter
+
+
+@receiver(setting_changed)
+def reset_limiter(setting, **kwargs):
+    """
+    Start over when settings are overridden in tests
+    """
+    global _limiter
+    if setting == 'SLOW_QUERIES':
+        _limiter = None
+
+
+def explain(connection, sql, params):
+    """
+    Return the plan of sql without running it, None if the database
+    cannot explain it. Inside a transaction the EXPLAIN gets a savepoint,
+    so a failing one leaves the transaction usable. The statements run
+    without the execute wrappers, they are not the application's to be
+    logged, timed or profiled
+    """
+    if not sql.lstrip().upper().startswith(EXPLAINED):
+        return None
+    ops = connection.ops
+    if connection.vendor == 'postgresql':
+        prefix = ops.explain_query_prefix(analyze=False)
+    else:
+        prefix = ops.explain_query_prefix()
+    # connections belong to one thread, no other statement sees this
+    wrappers = connection.execute_wrappers
+    connection.execute_wrappers = []
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    finally:
+        connection.execute_wrappers = wrappers
+    # one line per row, SQLite puts it in the last column
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def caller():
+    """
+    Return the view, serializer and application code running the
+    current statement
+    """
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    view = serializer = location = None
+    frame = sys._getframe(1)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None and view is None:
+        obj = frame.f_locals.get('self')
+        if serializer is None and isinstance(obj, BaseSerializer):
+            # a many=True serializer is named by its child
+            serializer = type(getattr(obj, 'child', obj)).__name__
+        elif isinstance(obj, APIView):
+            view = type(obj).__name__
+            if getattr(obj, 'action', None):
+                view += f'.{obj.action}'
+        filename = frame.f_code.co_filename
+        if location is None and filename.startswith(base_dir) and \
+                filename != __file__:
+            location = f'{filename[len(base_dir) + 1:]}:{frame.f_lineno} ' \
+                       f'in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return view, serializer, location
+
+
+def _param(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)[:MAX_PARAM_LENGTH]
+
+
+def report(connection, sql, params, many, duration, error=None):
+    """
+    Log a slow statement to the core.slowlog logger, unless its
+    fingerprint was logged within RATE_LIMIT seconds
+    """
+    config = settings.SLOW_QUERIES
+    key, statement = fingerprint(sql)
+    allowed, suppressed = get_limiter().allow(key)
+    if not allowed:
+        return
+    sensitive = SENSITIVE.search(sql) is not None
+    plan = None
+    if config['EXPLAIN'] and error is None and not many and not sensitive:
+        plan = explain(connection, sql, params)
+    view, serializer, location = caller()
+    record = {
+        'fingerprint': key,
+        'statement': statement,
+        'sql': sql,
+        'duration': duration,
+        'alias': connection.alias,
+        'view': view,
+        'serializer': serializer,
+        'location': location,
+        'plan': plan,
+        'full_scans': full_scans(plan),
+        'suppressed': suppressed,
+        'error': error,
+    }
+    if config['PARAMS'] and params and not many and not sensitive:
+        if isinstance(params, dict):
+            record['params'] = {name: _param(value)
+                                for name, value in params.items()}
+        else:
+            record['params'] = [_param(value)
+                                for value in list(params)[:MAX_PARAMS]]
+    logger.warning('Slow query %s took %.1f ms', key, duration * 1000,
+                   extra={'slow_query': record})
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper reporting statements slower than the
+    SLOW_QUERIES THRESHOLD, installed on every connection by
+    core.signals
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        return execute(sql, params, many, context)
+    except Exception as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        config = settings.SLOW_QUERIES
+        if config['ENABLED'] and duration >= config['THRESHOLD']:
+            report(context['connection'], sql, params, many, duration,
+                   error)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, with the fields of
+    their slow_query
+    """
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'slow_query', {}))
+        return json.dumps(data, default=str)
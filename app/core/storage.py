@@ -0,0 +1,114 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, \
+    TemporaryFileUploadHandler
+
+CONTENT_ADDRESSED_RE = re.compile(
+    r'(?:^|/)([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})\.\w+$')
+
+
+def file_digest(content):
+    """
+    Return the SHA-256 hex digest of a file, reusing the digest computed
+    while it was uploaded (see HashingUploadMixin) when present
+    """
+    digest = getattr(content, 'content_hash', None)
+    if digest is not None:
+        return digest
+    hasher = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def content_addressed_name(directory, digest, ext):
+    """
+    Return the storage name of content with digest, sharded two levels
+    deep by digest prefix so no directory grows past 65536 entries
+    """
+    return os.path.join(
+        directory, digest[:2], digest[2:4], f'{digest}.{ext.lower()}')
+
+
+def is_content_addressed(name):
+    return bool(name) and CONTENT_ADDRESSED_RE.search(name) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage for files named by their content digest.
+    Saving a name that already exists keeps the stored file, since its
+    content is identical, and only touches it so that a concurrent
+    release keeps it (see recipe.images.release_image)
+    """
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        path = self.path(name)
+        if os.path.exists(path):
+            os.utime(path)
+            return name
+        # Write under a unique temporary name and rename into place, so
+        # concurrent uploads of the same content never see a partial file
+        directory, base = os.path.split(name)
+        temp_name = super()._save(
+            os.path.join(directory, f'.{uuid.uuid4().hex}.{base}.tmp'),
+            content)
+        temp_path = self.path(temp_name)
+        try:
+            with open(temp_path, 'rb') as temp_file:
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def modified_age(self, name):
+        """
+        Return seconds since the stored file was last written or reused
+        """
+        return time.time() - os.path.getmtime(self.path(name))
+
+
+class HashingUploadMixin:
+    """
+    Upload handler mixin hashing file content while it streams in,
+    the hex digest is set as content_hash on the uploaded file
+    """
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # an inactive memory handler passes chunks on to the next handler
+        if getattr(self, 'activated', True):
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.content_hash = self.hasher.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin,
+                                     MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin,
+                                        TemporaryFileUploadHandler):
+    pass
@@ -0,0 +1,90 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorWrapper
+
+
+# the rows of an insert start with VALUES, or with SELECT on SQLite,
+# which joins them with UNION ALL
+INSERT_ROWS = re.compile(r'^(INSERT .*?) (?:VALUES|SELECT) ')
+MULTI_ROW = re.compile(r'\), \(| UNION ALL SELECT ')
+
+
+class CountingCursor(CursorWrapper):
+    """
+    Cursor adding its queries and fetched rows to a QueryBudget
+    """
+    def __init__(self, cursor, db, budget):
+        super().__init__(cursor, db)
+        self.budget = budget
+
+    def execute(self, sql, params=None):
+        self.budget.record(sql)
+        return super().execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        self.budget.record(sql)
+        return super().executemany(sql, param_list)
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.budget.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self.cursor.fetchmany(*args)
+        self.budget.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.budget.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.budget.rows += 1
+            yield row
+
+
+class QueryBudget:
+    """
+    Context manager recording the SQL statements run and the rows
+    fetched on a connection inside the block.
+    A bulk insert the backend splits into batches (SQLite binds at most
+    999 parameters) counts as one query, as it would on PostgreSQL
+    """
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.queries = []
+        self.rows = 0
+        self._batch = None
+
+    def record(self, sql):
+        match = INSERT_ROWS.match(sql)
+        head = match and match.group(1)
+        if not (head and head == self._batch):
+            self.queries.append(sql)
+        # only a multi-row insert can continue in a next batch
+        self._batch = head if head and MULTI_ROW.search(sql) else None
+
+    def make_cursor(self, cursor):
+        return CountingCursor(cursor, self.connection, self)
+
+    def __enter__(self):
+        self.queries = []
+        self.rows = 0
+        self._batch = None
+        # instance attributes shadow the cursor factories of the backend
+        self.connection.make_cursor = self.make_cursor
+        self.connection.make_debug_cursor = self.make_cursor
+        return self
+
+    def __exit__(self, *exc_info):
+        del self.connection.make_cursor
+        del self.connection.make_debug_cursor
+
+    def report(self):
+        return '\n'.join(f'{index}. {sql}' for index, sql
+                         in enumerate(self.queries, 1))
@@ -1,8 +1,18 @@
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Recipe
+from core.warmup import WARMUP_STEPS
+
+PROBE = 'core.management.commands.wait_for_db.probe_database'
 
 
 class TestCommands(TestCase):
@@ -10,17 +20,66 @@ class TestCommands(TestCase):
         """
         Test wait_for_db command when db is ready
         """
-        with patch("django.db.utils.ConnectionHandler.__getitem__") as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch(PROBE) as probe:
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """
         Test wait_for_db command
         """
-        with patch("django.db.utils.ConnectionHandler.__getitem__") as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch(PROBE) as probe:
+            probe.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        self.assertTrue(all(0 <= delay <= 5 for delay in delays))
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """
+        Test wait_for_db command gives up after the timeout
+        """
+        with patch(PROBE, side_effect=OperationalError('refused')):
+            with self.assertRaisesMessage(CommandError, 'refused'):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+        ts.assert_not_called()
+
+    def test_wait_for_db_probes_connection(self):
+        """
+        Test wait_for_db command queries the database
+        """
+        with CaptureQueriesContext(connection) as queries:
+            call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(queries[0]['sql'], 'SELECT 1')
+
+    def test_wait_for_db_warmup(self):
+        """
+        Test wait_for_db command reports each warmup step
+        """
+        out = StringIO()
+        call_command('wait_for_db', warmup=True, stdout=out)
+
+        for name, _step in WARMUP_STEPS:
+            self.assertIn(f'Warmed up {name}', out.getvalue())
+
+    def test_import_recipes(self):
+        """
+        Test import_recipes command reads an NDJSON file for the user
+        """
+        user = get_user_model().objects.create_user(
+            email='test@email.com', password='password')
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as ntf:
+            ntf.write(b'{"title": "Salad", "time_minutes": 5, '
+                      b'"price": "5.00", "tags": ["Vegan"]}\n')
+            ntf.write(b'{"title": ""}\n')
+            ntf.flush()
+            out = StringIO()
+            call_command('import_recipes', user.email, ntf.name,
+                         stdout=out, stderr=StringIO())
+
+        self.assertIn('Imported 1 recipes, 1 failed', out.getvalue())
+        self.assertEqual(Recipe.objects.get(user=user).tags.count(), 1)
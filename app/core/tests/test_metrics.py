@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import HISTOGRAMS, MetricsRegistry, render_prometheus
+from core.models import Recipe
+
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'FLUSH_INTERVAL': 5.0,
+    'SERVER_TIMING': True,
+    'AUTH_TOKEN': None,
+}
+VALUES = (0.02, 3, 0.004, 0.001, 900)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_threads_merged(self):
+        """
+        Test that the shards of all threads are added up
+        """
+        registry = MetricsRegistry()
+        threads = [
+            threading.Thread(target=registry.record,
+                             args=('recipe:recipe-list', 200, VALUES))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.record('recipe:recipe-list', 404, VALUES)
+
+        metrics = registry.snapshot()['recipe:recipe-list']
+
+        self.assertEqual(metrics['requests'], {'200': 4, '404': 1})
+        self.assertEqual(sum(metrics['counts'][1]), 5)
+        self.assertEqual(metrics['sums'][1], 15)
+
+    def test_workers_merged(self):
+        """
+        Test that collect adds the files of other workers
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            other = MetricsRegistry(directory)
+            other.path = os.path.join(directory, 'metrics-other.json')
+            other.record('user:token', 200, VALUES)
+            other.flush()
+            registry = MetricsRegistry(directory)
+            registry.record('user:token', 201, VALUES)
+
+            metrics = registry.collect()['user:token']
+
+            self.assertEqual(metrics['requests'], {'200': 1, '201': 1})
+            with open(other.path) as f:
+                self.assertIn('user:token', json.load(f))
+
+    def test_render_prometheus(self):
+        """
+        Test that histograms are rendered with cumulative buckets
+        """
+        registry = MetricsRegistry()
+        registry.record('recipe:recipe-list', 200, VALUES)
+        registry.record('recipe:recipe-list', 200, (0.5, 30, 0.2, 0.1, 10))
+
+        text = render_prometheus(registry.snapshot())
+
+        self.assertIn('drf_recipe_requests_total{route="recipe:recipe-list",'
+                      'status="200"} 2', text)
+        self.assertIn('drf_recipe_db_queries_bucket{'
+                      'route="recipe:recipe-list",le="3"} 1', text)
+        self.assertIn('drf_recipe_db_queries_bucket{'
+                      'route="recipe:recipe-list",le="+Inf"} 2', text)
+        self.assertIn('drf_recipe_db_queries_sum{'
+                      'route="recipe:recipe-list"} 33', text)
+        for name, _help, _buckets in HISTOGRAMS:
+            self.assertIn(f'# TYPE drf_recipe_{name} histogram', text)
+
+
+@override_settings(METRICS=METRICS, RECIPE_FAST_READS=False)
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(user=self.user, title='Sample recipe',
+                              time_minutes=10, price=5.00)
+
+    def test_server_timing(self):
+        """
+        Test that responses report their database and serializer time
+        """
+        resp = self.client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        timing = resp['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('ser;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        """
+        Test that requests are exposed by route to staff users
+        """
+        self.client.get(reverse('recipe:recipe-list'))
+        resp = self.client.get(reverse('metrics'))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse('metrics'))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        text = resp.content.decode()
+        self.assertIn('route="recipe:recipe-list",status="200"} 1', text)
+        self.assertIn('drf_recipe_serializer_duration_seconds_count{'
+                      'route="recipe:recipe-list"} 1', text)
+
+    @override_settings(METRICS=dict(METRICS, AUTH_TOKEN='secret'))
+    def test_metrics_token(self):
+        """
+        Test that the metrics endpoint requires the configured token
+        """
+        resp = self.client.get(reverse('metrics'))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        resp = self.client.get(reverse('metrics'),
+                               HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
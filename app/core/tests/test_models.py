@@ -1,5 +1,7 @@
+import hashlib
 from unittest.mock import patch
 
+from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -113,3 +115,15 @@ class ModelTests(TestCase):
             instance=None, file_name="test_image.jpg")
         exp_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+    def test_recipe_file_name_content_addressed(self):
+        """
+        Test that image content is stored under its digest
+        in sharded directories
+        """
+        recipe = Recipe(image=ContentFile(b'image bytes', name='a.JPG'))
+        digest = hashlib.sha256(b'image bytes').hexdigest()
+        file_path = recipe_image_file_path(
+            instance=recipe, file_name="a.JPG")
+        exp_path = f'uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        self.assertEqual(file_path, exp_path)
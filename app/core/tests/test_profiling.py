@@ -0,0 +1,120 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.profiling import Capture, ProfileStore, get_store, profile_token
+
+PROFILING = {
+    'ENABLED': True,
+    'HEADER': 'X-Profile',
+    'TOKEN_MAX_AGE': 3600,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': None,
+    'MAX_PROFILES': 200,
+}
+
+
+class ProfileStoreTests(SimpleTestCase):
+    def test_ring_buffer(self):
+        """
+        Test that only the newest max_profiles profiles are kept
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            store = ProfileStore(directory, max_profiles=3)
+            names = []
+            for index in range(5):
+                capture = Capture()
+                capture.run(sum, range(10))
+                names.append(store.save(capture, {'index': index}))
+
+            self.assertEqual(store.names(), names[2:])
+            self.assertEqual(store.info(names[-1])['index'], 4)
+            self.assertTrue(store.stats(names[-1]).total_calls)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.profiling = override_settings(PROFILING=dict(
+            PROFILING, DIRECTORY=self.directory.name))
+        self.profiling.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(user=self.user, title='Sample recipe',
+                              time_minutes=10, price=5.00)
+
+    def tearDown(self) -> None:
+        self.profiling.disable()
+        self.directory.cleanup()
+
+    def test_signed_header_profiled(self):
+        """
+        Test that a request with a signed header saves its profile and
+        queries
+        """
+        resp = self.client.get(reverse('recipe:recipe-list'),
+                               HTTP_X_PROFILE=profile_token())
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        store = get_store()
+        names = store.names()
+        self.assertEqual(len(names), 1)
+        info = store.info(names[0])
+        self.assertEqual(info['route'], 'recipe:recipe-list')
+        self.assertEqual(info['status'], 200)
+        self.assertTrue(info['queries'])
+        self.assertTrue(store.stats(names[0]).total_calls)
+
+    def test_not_profiled(self):
+        """
+        Test that requests without a valid header, or to views not
+        profiled, are not saved
+        """
+        self.client.get(reverse('recipe:recipe-list'))
+        self.client.get(reverse('recipe:recipe-list'),
+                        HTTP_X_PROFILE='forged:token')
+        self.client.get(reverse('user:profile'),
+                        HTTP_X_PROFILE=profile_token())
+
+        self.assertEqual(get_store().names(), [])
+
+    def test_sampled(self):
+        """
+        Test that requests are profiled at the sample rate
+        """
+        with override_settings(PROFILING=dict(
+                PROFILING, DIRECTORY=self.directory.name, SAMPLE_RATE=1.0)):
+            self.client.get(reverse('recipe:tag-list'))
+
+        self.assertEqual(len(get_store().names()), 1)
+
+    def test_profiles_command(self):
+        """
+        Test that the command lists and shows saved profiles
+        """
+        self.client.get(reverse('recipe:recipe-list'),
+                        HTTP_X_PROFILE=profile_token())
+        out = StringIO()
+
+        call_command('profiles', stdout=out)
+        self.assertIn('GET /api/recipe/recipes/', out.getvalue())
+
+        call_command('profiles', show='latest', stdout=out)
+        self.assertIn('function calls', out.getvalue())
+        self.assertIn('SELECT', out.getvalue())
+
+        call_command('profiles', summary=True, stdout=out)
+        self.assertIn('recipe:recipe-list: 1 profiles', out.getvalue())
@@ -0,0 +1,258 @@
+import io
+import tempfile
+
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.query_budget import QueryBudget
+from recipe.search import uses_search_vector
+
+SIZES = (1, 500)
+
+# action: (max queries, max rows fetched, max further rows per related
+# object), measured on SQLite. Queries must not grow with the number of
+# related objects; rows only where the response lists all of them, or
+# autocomplete loads the names it suggests from
+BUDGETS = {
+    'tag-list': (2, 51, 0),
+    'tag-create': (5, 0, 0),
+    'tag-bulk-create': (7, 0, 1),
+    'tag-autocomplete': (2, 0, 1),
+    'ingredient-list': (2, 51, 0),
+    'ingredient-create': (5, 0, 0),
+    'ingredient-bulk-create': (7, 0, 1),
+    'ingredient-autocomplete': (2, 0, 1),
+    'recipe-list': (4, 1, 2),
+    'recipe-list-page': (4, 102, 0),
+    'recipe-retrieve': (4, 2, 2),
+    'recipe-create': (17, 0, 4),
+    'recipe-update': (16, 1, 8),
+    'recipe-partial-update': (7, 1, 4),
+    'recipe-upload-image': (4, 2, 0),
+    'user-create': (2, 0, 0),
+    'user-token': (5, 1, 0),
+    'user-profile': (0, 0, 0),
+    'user-profile-update': (2, 0, 0),
+}
+
+# Further (queries, rows) on PostgreSQL, which updates
+# Recipe.search_vector on saves and link changes and tops autocomplete
+# up with trigram matches, see recipe.signals and recipe.autocomplete
+POSTGRESQL = {
+    'tag-autocomplete': (1, 50),
+    'ingredient-autocomplete': (1, 50),
+    'recipe-create': (3, 0),
+    'recipe-update': (3, 0),
+    'recipe-partial-update': (1, 0),
+    'recipe-upload-image': (1, 0),
+}
+
+RESPONSE_CACHE = dict(settings.RECIPE_RESPONSE_CACHE, ENABLED=False)
+
+
+def sample_image():
+    """
+    Return a small JPEG upload
+    """
+    content = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(content, 'JPEG')
+    content.seek(0)
+    content.name = 'sample.jpg'
+    return content
+
+
+@override_settings(RECIPE_RESPONSE_CACHE=RESPONSE_CACHE)
+class QueryBudgetTests(TestCase):
+    """
+    Test the queries and fetched rows of every API action against
+    BUDGETS with one and with many related objects
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.users = 0
+
+    def make_user(self, recipes=0):
+        self.users += 1
+        user = get_user_model().objects.create_user(
+            email=f'budget{self.users}@test.com',
+            password='password',
+            name='Budget'
+        )
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {index}', time_minutes=10,
+                   price=5)
+            for index in range(recipes)
+        ])
+        return user
+
+    def make_named(self, model, user, count):
+        model.objects.bulk_create(
+            [model(user=user, name=f'name {index}') for index in range(count)])
+        return list(model.objects.filter(user=user)
+                    .values_list('id', flat=True))
+
+    def make_linked_recipe(self, user, count):
+        """
+        Return a recipe of user with count tags and ingredients
+        """
+        recipe = Recipe.objects.create(user=user, title='Linked',
+                                       time_minutes=10, price=5)
+        recipe.tags.add(*self.make_named(Tag, user, count))
+        recipe.ingredients.add(*self.make_named(Ingredient, user, count))
+        return recipe
+
+    def authenticated(self, recipes=0):
+        user = self.make_user(recipes)
+        self.client.force_authenticate(user)
+        return user
+
+    # Each request_<action> sets up n related objects and returns the
+    # request to measure
+
+    def request_tag_list(self, n, model=Tag, basename='tag'):
+        self.make_named(model, self.authenticated(), n)
+        url = reverse(f'recipe:{basename}-list')
+        return lambda: self.client.get(url, {'page_size': 50})
+
+    def request_tag_create(self, n, model=Tag, basename='tag'):
+        self.make_named(model, self.authenticated(), n)
+        url = reverse(f'recipe:{basename}-list')
+        return lambda: self.client.post(url, {'name': 'New'})
+
+    def request_tag_bulk_create(self, n, model=Tag, basename='tag'):
+        self.authenticated()
+        url = reverse(f'recipe:{basename}-list')
+        data = [{'name': f'new {index}'} for index in range(n)]
+        return lambda: self.client.post(url, data, format='json')
+
+    def request_tag_autocomplete(self, n, model=Tag, basename='tag'):
+        self.make_named(model, self.authenticated(), n)
+        url = reverse(f'recipe:{basename}-autocomplete')
+        return lambda: self.client.get(url, {'q': 'name'})
+
+    def request_ingredient_list(self, n):
+        return self.request_tag_list(n, Ingredient, 'ingredient')
+
+    def request_ingredient_create(self, n):
+        return self.request_tag_create(n, Ingredient, 'ingredient')
+
+    def request_ingredient_bulk_create(self, n):
+        return self.request_tag_bulk_create(n, Ingredient, 'ingredient')
+
+    def request_ingredient_autocomplete(self, n):
+        return self.request_tag_autocomplete(n, Ingredient, 'ingredient')
+
+    def request_recipe_list(self, n, params=None):
+        user = self.authenticated(recipes=n)
+        tag = self.make_named(Tag, user, 1)
+        for recipe in Recipe.objects.filter(user=user):
+            recipe.tags.add(*tag)
+        url = reverse('recipe:recipe-list')
+        return lambda: self.client.get(url, params or {})
+
+    def request_recipe_list_page(self, n):
+        return self.request_recipe_list(n, {'page_size': 50})
+
+    def request_recipe_retrieve(self, n):
+        recipe = self.make_linked_recipe(self.authenticated(), n)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        return lambda: self.client.get(url)
+
+    def request_recipe_create(self, n):
+        user = self.authenticated()
+        data = {
+            'title': 'New', 'time_minutes': 5, 'price': '5.00',
+            'tags': self.make_named(Tag, user, n),
+            'ingredients': self.make_named(Ingredient, user, n),
+        }
+        url = reverse('recipe:recipe-list')
+        return lambda: self.client.post(url, data, format='json')
+
+    def request_recipe_update(self, n):
+        user = self.authenticated()
+        recipe = self.make_linked_recipe(user, n)
+        data = {
+            'title': 'Changed', 'time_minutes': 5, 'price': '5.00',
+            'tags': [
+                pk for pk in self.make_named(Tag, user, 2 * n)
+                if not recipe.tags.filter(pk=pk).exists()
+            ][:n],
+            'ingredients': list(recipe.ingredients.values_list(
+                'id', flat=True)),
+        }
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        return lambda: self.client.put(url, data, format='json')
+
+    def request_recipe_partial_update(self, n):
+        recipe = self.make_linked_recipe(self.authenticated(), n)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        return lambda: self.client.patch(url, {'title': 'Changed'})
+
+    def request_recipe_upload_image(self, n):
+        recipe = self.make_linked_recipe(self.authenticated(), n)
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        return lambda: self.client.post(url, {'image': sample_image()},
+                                        format='multipart')
+
+    def request_user_create(self, n):
+        self.make_user(recipes=n)
+        url = reverse('user:create')
+        return lambda: self.client.post(url, {
+            'email': f'created{n}@test.com', 'password': 'password',
+            'name': 'Created'})
+
+    def request_user_token(self, n):
+        user = self.make_user(recipes=n)
+        url = reverse('user:token')
+        return lambda: self.client.post(url, {
+            'email': user.email, 'password': 'password'})
+
+    def request_user_profile(self, n):
+        self.authenticated(recipes=n)
+        return lambda: self.client.get(reverse('user:profile'))
+
+    def request_user_profile_update(self, n):
+        self.authenticated(recipes=n)
+        return lambda: self.client.patch(reverse('user:profile'),
+                                         {'name': 'Changed'})
+
+    def measure(self, action, n):
+        request = getattr(self, f"request_{action.replace('-', '_')}")(n)
+        with QueryBudget() as budget:
+            resp = request()
+        self.assertLess(resp.status_code, 300, f'{action}: {resp.content}')
+        return budget
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_query_budgets(self):
+        """
+        Test that no action exceeds its budget or runs more queries
+        with more related objects
+        """
+        for action, (queries, rows, rows_per) in BUDGETS.items():
+            if uses_search_vector():
+                more_queries, more_rows = POSTGRESQL.get(action, (0, 0))
+                queries, rows = queries + more_queries, rows + more_rows
+            counts = []
+            for n in SIZES:
+                with self.subTest(action=action, n=n):
+                    budget = self.measure(action, n)
+                    self.assertLessEqual(
+                        len(budget.queries), queries,
+                        f'{action} at N={n}:\n{budget.report()}')
+                    self.assertLessEqual(budget.rows, rows + rows_per * n,
+                                         f'{action} rows at N={n}')
+                    counts.append(budget)
+            if len(counts) < len(SIZES):
+                continue
+            with self.subTest(action=action):
+                self.assertLessEqual(
+                    len(counts[-1].queries), len(counts[0].queries),
+                    f'{action} queries grow with N:\n{counts[-1].report()}')
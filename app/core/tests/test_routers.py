@@ -0,0 +1,172 @@
+import time
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.middleware import STICKY_COOKIE, ReplicaRoutingMiddleware
+from core.models import Recipe
+from core.routers import ReplicaPool, ReplicaRouter, get_replica_pool, \
+    read_alias, reads_from
+
+PROBE = 'core.routers.probe_database'
+ROUTING = {
+    'REPLICAS': {'replica1': 1},
+    'STICKY_SECONDS': 10,
+    'CACHE': 'default',
+    'HEALTH_CHECK_INTERVAL': 60,
+    'PRIMARY_MODELS': ('authtoken.token',),
+}
+
+
+class ReplicaPoolTests(SimpleTestCase):
+    def test_choose_by_weight(self):
+        """
+        Test that replicas are chosen with their weights
+        """
+        pool = ReplicaPool({'replica1': 3, 'replica2': 1, 'off': 0}, 60)
+
+        with patch(PROBE):
+            pool.check()
+        with patch('random.choices') as choices:
+            choices.return_value = ['replica1']
+            self.assertEqual(pool.choose(), 'replica1')
+
+        choices.assert_called_once_with(('replica1', 'replica2'), (3, 1))
+
+    def test_unhealthy_replica_skipped(self):
+        """
+        Test that replicas failing the health check are not chosen, and
+        that choosing does not probe
+        """
+        pool = ReplicaPool({'replica1': 1, 'replica2': 1}, 60)
+
+        def probe(alias):
+            if alias == 'replica1':
+                raise OperationalError('down')
+
+        with patch(PROBE, side_effect=probe) as probed, \
+                patch('core.routers.connections'):
+            pool.check()
+            chosen = {pool.choose() for _ in range(20)}
+
+        self.assertEqual(chosen, {'replica2'})
+        self.assertEqual(probed.call_count, 2)
+
+    def test_checked_in_thread(self):
+        """
+        Test that the pool reads from the primary until its thread
+        checked the replicas
+        """
+        pool = ReplicaPool({'replica1': 1}, 60)
+        self.assertIsNone(pool.choose())
+
+        with patch(PROBE) as probed, patch('core.routers.connections'):
+            pool.start()
+            self.addCleanup(pool.stop)
+            for _ in range(100):
+                if pool.healthy:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(pool.choose(), 'replica1')
+        probed.assert_called_once_with('replica1')
+
+    def test_no_healthy_replica(self):
+        """
+        Test that the primary is used when every replica is down
+        """
+        pool = ReplicaPool({'replica1': 1}, 60)
+
+        with patch(PROBE, side_effect=OperationalError), \
+                patch('core.routers.connections'):
+            pool.check()
+
+        self.assertIsNone(pool.choose())
+
+
+@override_settings(REPLICA_ROUTING=ROUTING)
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_follow_request_alias(self):
+        """
+        Test that reads go to the alias chosen for the request
+        """
+        router = ReplicaRouter()
+
+        self.assertIsNone(router.db_for_read(Recipe))
+        with reads_from('replica1'):
+            self.assertEqual(router.db_for_read(Recipe), 'replica1')
+            self.assertEqual(router.db_for_write(Recipe), 'default')
+
+    def test_tokens_read_from_primary(self):
+        """
+        Test that tokens are read from the primary, a client that just
+        obtained one is not pinned to it yet
+        """
+        with reads_from('replica1'):
+            self.assertIsNone(ReplicaRouter().db_for_read(Token))
+
+    def test_no_migrations_on_replicas(self):
+        """
+        Test that replicas are never migrated
+        """
+        router = ReplicaRouter()
+
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
+
+
+@override_settings(REPLICA_ROUTING=ROUTING)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory(HTTP_AUTHORIZATION='Token abc')
+        self.aliases = []
+
+        def view(request):
+            self.aliases.append(read_alias())
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+        with patch(PROBE):
+            get_replica_pool().check()
+
+    def test_safe_request_reads_replica(self):
+        """
+        Test that safe requests to opted in views read from a replica
+        """
+        self.middleware(self.factory.get('/api/recipe/recipes/'))
+        self.middleware(self.factory.get('/api/user/profile/'))
+
+        self.assertEqual(self.aliases, ['replica1', 'replica1'])
+
+    def test_other_requests_read_primary(self):
+        """
+        Test that writes and views without replica_reads use the primary
+        """
+        self.middleware(self.factory.get('/api/user/token/'))
+        self.middleware(self.factory.post('/api/recipe/tags/',
+                                          HTTP_AUTHORIZATION='Token xyz'))
+
+        self.assertEqual(self.aliases, [None, None])
+
+    def test_read_your_writes(self):
+        """
+        Test that clients stay on the primary after writing
+        """
+        resp = self.middleware(self.factory.post('/api/recipe/recipes/'))
+        self.middleware(self.factory.get('/api/recipe/recipes/'))
+
+        other = self.factory.get('/api/recipe/recipes/',
+                                 HTTP_AUTHORIZATION='Token other')
+        self.middleware(other)
+
+        cookie = self.factory.get('/api/recipe/recipes/',
+                                  HTTP_AUTHORIZATION='Token third')
+        cookie.COOKIES[STICKY_COOKIE] = resp.cookies[STICKY_COOKIE].value
+        self.middleware(cookie)
+
+        self.assertEqual(self.aliases, [None, None, 'replica1', None])
@@ -0,0 +1,189 @@
+import logging
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.metrics import collect_stats
+from core.models import Recipe
+from core.profiling import capture_request
+from core.slowlog import FingerprintLimiter, JSONFormatter, fingerprint, \
+    full_scans
+
+SLOW_QUERIES = {
+    'ENABLED': True,
+    'THRESHOLD': 0,
+    'EXPLAIN': True,
+    'RATE_LIMIT': 60,
+    'PARAMS': True,
+    'LOG_FILE': None,
+}
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_values_ignored(self):
+        """
+        Test that statements differing in values and list lengths share
+        a fingerprint
+        """
+        one = fingerprint('SELECT "id" FROM "core_tag" WHERE "id" IN (%s) '
+                          "AND name = 'a' LIMIT 21")
+        many = fingerprint('SELECT "id" FROM "core_tag" WHERE "id" IN '
+                           "(%s, %s, %s) AND name = 'it''s' LIMIT 100")
+
+        self.assertEqual(one, many)
+        self.assertEqual(one[1], 'SELECT "id" FROM "core_tag" WHERE "id" '
+                                 'IN (?) AND name = ? LIMIT ?')
+
+    def test_multi_row_inserts(self):
+        """
+        Test that inserts of any number of rows share a fingerprint
+        """
+        sql = 'INSERT INTO "core_recipe_tags" ("recipe_id", "tag_id") '
+        self.assertEqual(
+            fingerprint(sql + 'VALUES (%s, %s)'),
+            fingerprint(sql + 'VALUES (%s, %s), (%s, %s), (%s, %s)'))
+        self.assertEqual(
+            fingerprint(sql + 'SELECT %s, %s'),
+            fingerprint(sql + 'SELECT %s, %s UNION ALL SELECT %s, %s'))
+
+    def test_full_scans(self):
+        """
+        Test that tables read without an index are found in plans
+        """
+        postgresql = (
+            'Hash Join  (cost=1.09..35.44 rows=9 width=8)\n'
+            '  ->  Seq Scan on core_recipe_tags  (cost=0.00..30.40)\n'
+            '  ->  Index Scan using core_tag_pkey on core_tag')
+        sqlite = ('SCAN core_recipe_tags\n'
+                  'SEARCH core_tag USING INTEGER PRIMARY KEY (rowid=?)\n'
+                  'SCAN core_recipe USING INDEX core_recipe_user_id')
+
+        self.assertEqual(full_scans(postgresql), ['core_recipe_tags'])
+        self.assertEqual(full_scans(sqlite), ['core_recipe_tags'])
+        self.assertEqual(full_scans(None), [])
+
+    def test_limiter(self):
+        """
+        Test that a fingerprint passes once per interval and reports how
+        often it was held back
+        """
+        limiter = FingerprintLimiter(60)
+
+        with patch('core.slowlog.time.monotonic', return_value=100):
+            self.assertEqual(limiter.allow('a'), (True, 0))
+            self.assertFalse(limiter.allow('a')[0])
+            self.assertFalse(limiter.allow('a')[0])
+            self.assertEqual(limiter.allow('b'), (True, 0))
+        with patch('core.slowlog.time.monotonic', return_value=161):
+            self.assertEqual(limiter.allow('a'), (True, 2))
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Sample recipe', time_minutes=10,
+            price=5.00)
+
+    def slow_requests(self, url, count=1):
+        with self.assertLogs('core.slowlog', 'WARNING') as logs:
+            with override_settings(SLOW_QUERIES=SLOW_QUERIES):
+                for _ in range(count):
+                    resp = self.client.get(url)
+                    self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [record.slow_query for record in logs.records]
+
+    def test_logged_with_plan_and_view(self):
+        """
+        Test that slow statements are logged with their plan, params and
+        the view running them
+        """
+        records = self.slow_requests(
+            reverse('recipe:recipe-detail', args=[self.recipe.id]))
+
+        record = next(record for record in records
+                      if 'FROM "core_recipe"' in record['sql'])
+        self.assertEqual(record['view'], 'RecipeViewSet.retrieve')
+        self.assertTrue(record['plan'])
+        self.assertIn(self.recipe.id, record['params'])
+        self.assertEqual(record['alias'], 'default')
+        self.assertTrue(record['location'].startswith('recipe/'))
+
+    def test_explain_not_recorded(self):
+        """
+        Test that the EXPLAIN of a slow statement is neither logged nor
+        counted in the request metrics and profile
+        """
+        with collect_stats() as stats, capture_request() as capture, \
+                self.assertLogs('core.slowlog', 'WARNING') as logs, \
+                override_settings(SLOW_QUERIES=SLOW_QUERIES):
+            Recipe.objects.filter(title='Sample recipe').count()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(logs.records[0].slow_query['plan'])
+        self.assertEqual(stats.queries, 1)
+        self.assertEqual([query['sql'] for query in capture.queries],
+                         [logs.records[0].slow_query['sql']])
+
+    def test_credentials_redacted(self):
+        """
+        Test that statements on tokens and passwords are logged without
+        their params and plan
+        """
+        with self.assertLogs('core.slowlog', 'WARNING') as logs, \
+                override_settings(SLOW_QUERIES=SLOW_QUERIES):
+            Token.objects.create(user=self.user)
+            get_user_model().objects.filter(pk=self.user.pk)\
+                .update(password='secret-hash')
+
+        records = [record.slow_query for record in logs.records]
+        self.assertEqual(len(records), 2)
+        for record in records:
+            self.assertNotIn('params', record)
+            self.assertIsNone(record['plan'])
+
+    def test_fingerprints_rate_limited(self):
+        """
+        Test that repeated statements are logged once per rate limit
+        """
+        records = self.slow_requests(reverse('recipe:tag-list'), count=3)
+
+        fingerprints = [record['fingerprint'] for record in records]
+        self.assertEqual(len(fingerprints), len(set(fingerprints)))
+
+    def test_summary_command(self):
+        """
+        Test that the command groups the JSON log by fingerprint
+        """
+        records = self.slow_requests(reverse('recipe:recipe-list'))
+        formatter = JSONFormatter()
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as log:
+            for record in records * 2:
+                log.write(formatter.format(logging.makeLogRecord({
+                    'name': 'core.slowlog', 'levelname': 'WARNING',
+                    'msg': 'Slow query', 'slow_query': record,
+                })) + '\n')
+            log.flush()
+            out = StringIO()
+
+            call_command('slow_queries', log=[log.name], plans=True,
+                         stdout=out)
+
+        self.assertIn(f'{len(records)} fingerprints', out.getvalue())
+        self.assertIn('2 times', out.getvalue())
+        self.assertIn('RecipeViewSet.list (2)', out.getvalue())
@@ -0,0 +1,93 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+
+from core.db import backoff_delays, check_connections, mark_connections_idle
+from core.warmup import routed_serializers, warm_connections, warm_up
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+
+
+class WarmupTests(TestCase):
+    def test_warm_up_primes_caches(self):
+        """
+        Test that warm_up fills the content type cache
+        """
+        ContentType.objects.clear_cache()
+
+        warm_up()
+
+        with self.assertNumQueries(0):
+            ContentType.objects.get_for_model(ContentType)
+
+    def test_unreachable_database_skipped(self):
+        """
+        Test that a database failing its probe is logged, not raised,
+        and the others are still warmed up
+        """
+        def probe(alias):
+            if alias == 'replica1':
+                raise OperationalError('down')
+
+        with patch('core.warmup.probe_database', side_effect=probe) as \
+                probed, patch('core.warmup.connections') as connections, \
+                self.assertLogs('core.warmup', 'WARNING'):
+            warm_connections(['replica1', 'default'])
+
+        self.assertEqual(probed.call_count, 2)
+        connections['replica1'].close.assert_called_once_with()
+
+    def test_routed_serializers(self):
+        """
+        Test that the serializers of every viewset action are found
+        """
+        found = routed_serializers()
+
+        self.assertIn(RecipeSerializer, found)
+        self.assertIn(RecipeDetailSerializer, found)
+
+
+class ConnectionHealthTests(TestCase):
+    def test_backoff_delays(self):
+        """
+        Test that delays grow exponentially up to the maximum
+        """
+        class Upper:
+            def uniform(self, low, high):
+                return high
+
+        delays = backoff_delays(0.1, 1, rng=Upper())
+
+        self.assertEqual([round(next(delays), 2) for _ in range(6)],
+                         [0.1, 0.2, 0.4, 0.8, 1, 1])
+
+    @override_settings(DB_HEALTH_CHECK_IDLE=10)
+    def test_recently_used_connection_trusted(self):
+        """
+        Test that connections used recently are not checked
+        """
+        connection.ensure_connection()
+        mark_connections_idle()
+
+        with patch.object(connection, 'is_usable') as is_usable:
+            check_connections()
+
+        is_usable.assert_not_called()
+
+    @override_settings(DB_HEALTH_CHECK_IDLE=10)
+    def test_idle_broken_connection_closed(self):
+        """
+        Test that idle connections failing the check are closed
+        """
+        connection.ensure_connection()
+        connection.idle_since = time.monotonic() - 60
+
+        with patch.object(connection, 'is_usable', return_value=False), \
+                patch.object(connection, 'in_atomic_block', False), \
+                patch.object(connection, 'close') as close:
+            check_connections()
+
+        close.assert_called_once_with()
@@ -1,3 +1,25 @@
-# from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from core.metrics import get_registry, render_prometheus
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus text format metrics of all workers, see core.metrics.
+    Requires "Authorization: Bearer <METRICS AUTH_TOKEN>" if set,
+    otherwise a staff user logged in to the admin
+    """
+    token = settings.METRICS['AUTH_TOKEN']
+    if token:
+        if not constant_time_compare(
+                request.META.get('HTTP_AUTHORIZATION', ''),
+                f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(get_registry().collect()),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,124 @@
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import serializers
+
+from core.db import probe_database
+from recipe.prefetch import plan_queryset
+
+logger = logging.getLogger(__name__)
+
+
+def warm_connections(aliases=None):
+    """
+    Open the connections of the current thread, kept open across
+    requests up to CONN_MAX_AGE. A database that does not answer is
+    logged and skipped, an unreachable replica must not keep the
+    process from starting
+    """
+    for alias in aliases or connections:
+        try:
+            probe_database(alias)
+        except DatabaseError:
+            logger.warning('Database %s not warmed up', alias,
+                           exc_info=True)
+            connections[alias].close()
+
+
+def warm_url_resolvers():
+    """
+    Build the lookup tables behind resolve() and reverse()
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for pattern in iter_patterns(resolver):
+        if isinstance(pattern, URLResolver):
+            pattern.reverse_dict
+
+
+def warm_content_types():
+    """
+    Load every content type into the ContentType manager cache
+    """
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+def warm_serializers():
+    """
+    Build the fields, and the query plan of recipe.prefetch, of the
+    serializers of every routed view
+    """
+    for serializer_class in routed_serializers():
+        serializer_class().fields
+        model = getattr(getattr(serializer_class, 'Meta', None),
+                        'model', None)
+        if issubclass(serializer_class, serializers.ModelSerializer) \
+                and model is not None:
+            plan_queryset(model._default_manager.none(), serializer_class)
+
+
+def iter_patterns(resolver):
+    """
+    Yield the url patterns and nested resolvers below resolver
+    """
+    for pattern in resolver.url_patterns:
+        yield pattern
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern)
+
+
+def routed_serializers():
+    """
+    Return the serializer classes of the DRF views in the url
+    configuration, per viewset action
+    """
+    found = set()
+    for pattern in iter_patterns(get_resolver()):
+        if not isinstance(pattern, URLPattern):
+            continue
+        view_class = getattr(pattern.callback, 'cls', None)
+        if view_class is None:
+            continue
+        view = view_class(**getattr(pattern.callback, 'initkwargs', {}))
+        actions = getattr(pattern.callback, 'actions', None) or {None: None}
+        for action in actions.values():
+            view.action = action
+            if hasattr(view, 'get_serializer_class'):
+                found.add(view.get_serializer_class())
+            elif getattr(view, 'serializer_class', None) is not None:
+                found.add(view.serializer_class)
+    return found
+
+
+WARMUP_STEPS = (
+    ('database connections', warm_connections),
+    ('url resolvers', warm_url_resolvers),
+    ('content types', warm_content_types),
+    ('serializers', warm_serializers),
+)
+
+
+def warm_up():
+    """
+    Prime the per-process state the first requests would otherwise
+    build, return (step, seconds) of each step
+    """
+    timings = []
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - start))
+    return timings
+
+
+def warm_up_on_start():
+    """
+    Warm up the process serving requests if settings.WARMUP_ON_START
+    """
+    if settings.WARMUP_ON_START:
+        warm_up()
@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.http import FileResponse, JsonResponse
+from django.utils.translation import gettext_lazy as _
+
+from recipe.views import RecipeViewSet
+
+# Streamed bodies are spooled in memory up to this size, then on disk
+SPOOL_MAX_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class Overloaded(Exception):
+    """
+    Raised when no worker thread becomes free in time
+    """
+
+
+class ConcurrencyLimiter:
+    """
+    Run blocking calls in a bounded thread pool from the event loop.
+    At most max_concurrency calls run at once, at most max_queue more
+    wait for a free thread and none waits longer than queue_timeout;
+    calls beyond that raise Overloaded instead of piling up
+    """
+    def __init__(self, max_concurrency, max_queue, queue_timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(
+            max_concurrency, thread_name_prefix='async-view')
+        self.waiting = 0
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # created in the event loop serving requests
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, func, *args):
+        semaphore = self.semaphore
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            raise Overloaded
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded
+        finally:
+            self.waiting -= 1
+        try:
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(context.run, func, *args))
+        finally:
+            semaphore.release()
+
+
+_limiter = None
+
+
+def get_limiter():
+    """
+    Return the limiter configured by settings.ASYNC_VIEWS
+    """
+    global _limiter
+    if _limiter is None:
+        config = settings.ASYNC_VIEWS
+        _limiter = ConcurrencyLimiter(
+            config['MAX_CONCURRENCY'],
+            config['MAX_QUEUE'],
+            config['QUEUE_TIMEOUT'],
+        )
+    return _limiter
+
+
+@receiver(setting_changed)
+def reset_limiter(setting, **kwargs):
+    """
+    Rebuild the limiter when settings are overridden in tests
+    """
+    global _limiter
+    if setting == 'ASYNC_VIEWS' and _limiter is not None:
+        _limiter.executor.shutdown(wait=False)
+        _limiter = None
+
+
+def call_view(view, request, args, kwargs):
+    """
+    Run a sync view in a worker thread and render its response there.
+    Worker threads outlive requests, so their database connections are
+    recycled per call as the request signals do for request threads
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        if response.streaming and not isinstance(response, FileResponse):
+            spool(response)
+        return response
+    finally:
+        close_old_connections()
+
+
+def spool(response):
+    """
+    Drain the streaming content of response into a temporary file.
+    Django 3.2 iterates streaming content in the event loop, where
+    generators reading the database (e.g. the export) cannot run
+    """
+    spooled = tempfile.SpooledTemporaryFile(SPOOL_MAX_SIZE)
+    for chunk in response.streaming_content:
+        spooled.write(chunk)
+    response['Content-Length'] = spooled.tell()
+    spooled.seek(0)
+    response.streaming_content = read_chunks(spooled)
+
+
+def read_chunks(spooled):
+    with spooled:
+        yield from iter(functools.partial(spooled.read, CHUNK_SIZE), b'')
+
+
+def async_view(view):
+    """
+    Wrap a sync view into an async one, leaving the event loop to the
+    network I/O and the ORM, serializer and Pillow work to the limiter
+    """
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await get_limiter().run(
+                call_view, view, request, args, kwargs)
+        except Overloaded:
+            response = JsonResponse(
+                {'detail': _('Server busy, retry later.')}, status=503)
+            response['Retry-After'] = str(
+                settings.ASYNC_VIEWS['RETRY_AFTER'])
+            return response
+
+    functools.update_wrapper(wrapper, view)
+    # the wrapped DRF views are csrf exempt and do their own checks
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+recipe_list = async_view(RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='recipe', detail=False))
+recipe_export = async_view(RecipeViewSet.as_view(
+    {'get': 'export_recipes'}, basename='recipe', detail=False,
+    **RecipeViewSet.export_recipes.kwargs))
+recipe_detail = async_view(RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}, basename='recipe', detail=True))
+recipe_upload_image = async_view(RecipeViewSet.as_view(
+    {'get': 'upload_image', 'post': 'upload_image'},
+    basename='recipe', detail=True, **RecipeViewSet.upload_image.kwargs))
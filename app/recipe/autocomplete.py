@@ -0,0 +1,163 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models.functions import Length
+from django.dispatch import receiver
+
+
+class NameIndex:
+    """
+    The names of one user's tags or ingredients sorted by their folded
+    form, so that all names with a prefix are one contiguous run found
+    by bisection. Serves the same lookups as a trie in a flat list
+    """
+    def __init__(self, rows):
+        self.entries = sorted(
+            (name.casefold(), name, pk) for pk, name in rows)
+
+    def prefix(self, prefix, limit):
+        """
+        Return up to limit rows starting with prefix, shortest first
+        """
+        prefix = prefix.casefold()
+        start = bisect_left(self.entries, (prefix,))
+        matches = []
+        for folded, name, pk in self.entries[start:]:
+            if not folded.startswith(prefix):
+                break
+            matches.append((len(name), name, pk))
+        matches.sort()
+        return [{'id': pk, 'name': name}
+                for _length, name, pk in matches[:limit]]
+
+
+class NameIndexCache:
+    """
+    In-process LRU of NameIndex per model and user, valid for one data
+    version of the user. Other workers notice writes through the
+    version, recipe.signals drops entries of the current process early
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, user_id, version):
+        key = (model._meta.label, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, model, user_id, version, index):
+        key = (model._meta.label, user_id)
+        with self._lock:
+            self._entries[key] = (version, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, model, user_id):
+        with self._lock:
+            self._entries.pop((model._meta.label, user_id), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_name_cache = None
+
+
+def get_name_cache():
+    """
+    Return the name index cache, None if disabled by
+    settings.RECIPE_AUTOCOMPLETE
+    """
+    global _name_cache
+    config = settings.RECIPE_AUTOCOMPLETE
+    if not config['CACHE_USERS']:
+        return None
+    if _name_cache is None:
+        _name_cache = NameIndexCache(config['CACHE_USERS'])
+    return _name_cache
+
+
+@receiver(setting_changed)
+def reset_name_cache(setting, **kwargs):
+    """
+    Rebuild the cache when settings are overridden in tests
+    """
+    global _name_cache
+    if setting == 'RECIPE_AUTOCOMPLETE':
+        _name_cache = None
+
+
+def invalidate_names(model, user_id):
+    """
+    Drop the cached names of a user
+    """
+    if _name_cache is not None:
+        _name_cache.delete(model, user_id)
+
+
+def autocomplete_limit(request):
+    """
+    Return the number of suggestions asked for by ?limit=
+    """
+    config = settings.RECIPE_AUTOCOMPLETE
+    try:
+        limit = int(request.query_params.get('limit', ''))
+    except ValueError:
+        return config['LIMIT']
+    if limit <= 0:
+        return config['LIMIT']
+    return min(limit, config['MAX_LIMIT'])
+
+
+def suggest(model, user, text, limit, version=None):
+    """
+    Return up to limit {id, name} of the user's rows of model starting
+    with text, shortest first, topped up on PostgreSQL with trigram
+    matches of text. The prefix matches come from the name index cache
+    when version, the user's data version, is given
+    """
+    name_cache = get_name_cache() if version is not None else None
+    if name_cache is not None:
+        index = name_cache.get(model, user.pk, version)
+        if index is None:
+            index = NameIndex(
+                model.objects.filter(user=user).values_list('id', 'name'))
+            name_cache.set(model, user.pk, version, index)
+        rows = index.prefix(text, limit)
+    else:
+        rows = list(
+            model.objects.filter(user=user, name__istartswith=text)
+            .order_by(Length('name'), 'name', 'id')
+            .values('id', 'name')[:limit]
+        )
+
+    if len(rows) < limit and connection.vendor == 'postgresql':
+        rows += similar_names(model, user, text, limit - len(rows),
+                              exclude=[row['id'] for row in rows])
+    return rows
+
+
+def similar_names(model, user, text, limit, exclude=()):
+    """
+    Return up to limit {id, name} similar to text by trigrams, served by
+    the (user, name) trigram index on PostgreSQL
+    """
+    return list(
+        model.objects.filter(user=user, name__trigram_similar=text)
+        .exclude(id__in=exclude)
+        .annotate(similarity=TrigramSimilarity('name', text))
+        .order_by('-similarity', 'id')
+        .values('id', 'name')[:limit]
+    )
@@ -0,0 +1,71 @@
+from django.db import connection
+
+from core.models import DataVersion
+
+
+def bulk_create_returning(model, user, objs, batch_size=None):
+    """
+    bulk_create objs of user and return them with primary keys set.
+    Backends that cannot return ids from a bulk insert (sqlite) read
+    back the newest rows of the user instead, which is only safe
+    because such backends serialize writes
+    """
+    if not objs:
+        return []
+    model.objects.bulk_create(objs, batch_size)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return objs
+    ids = sorted(
+        model.objects.filter(user=user).order_by('-id')
+        .values_list('id', flat=True)[:len(objs)]
+    )
+    for obj, pk in zip(objs, ids):
+        obj.pk = pk
+    return objs
+
+
+def create_missing(model, user, names):
+    """
+    Create the named rows of model the user does not have yet, with one
+    lookup and one bulk insert.
+    Returns (created objects, names that already existed)
+    """
+    wanted = list(dict.fromkeys(names))
+    existing = set(
+        model.objects.filter(user=user, name__in=wanted)
+        .values_list('name', flat=True)
+    )
+    created = _insert_names(
+        model, user, [name for name in wanted if name not in existing])
+    return created, [name for name in wanted if name in existing]
+
+
+def resolve_names(model, user, names):
+    """
+    Return {name: id} of the user's rows for names, batch creating
+    the missing ones
+    """
+    wanted = list(dict.fromkeys(names))
+    if not wanted:
+        return {}
+    ids = dict(
+        model.objects.filter(user=user, name__in=wanted)
+        .order_by('-id').values_list('name', 'id')
+    )
+    created = _insert_names(
+        model, user, [name for name in wanted if name not in ids])
+    ids.update((obj.name, obj.pk) for obj in created)
+    return ids
+
+
+def _insert_names(model, user, names):
+    """
+    Bulk insert named rows of model for user
+    """
+    if not names:
+        return []
+    created = bulk_create_returning(
+        model, user, [model(user=user, name=name) for name in names])
+    # bulk_create sends no post_save signal
+    DataVersion.objects.bump(user.pk)
+    return created
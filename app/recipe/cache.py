@@ -0,0 +1,91 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+HITS_KEY = 'resp:stats:hits'
+MISSES_KEY = 'resp:stats:misses'
+
+
+class ResponseCache:
+    """
+    Rendered response bodies keyed by user, data generation, action,
+    origin and query. A write bumps the user's DataVersion, which changes the
+    generation in every key of that user, so stale entries are never
+    read again and simply expire
+    """
+    def __init__(self, alias, timeout, max_bytes):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def key(self, request, action, data_version):
+        """
+        Return cache key of the response to request. Bodies hold
+        absolute URLs (pagination links, image variants), so the scheme
+        and host are part of it
+        """
+        query = sorted(request.query_params.lists())
+        variant = '|'.join((
+            action,
+            request.scheme,
+            request.get_host(),
+            request.path,
+            repr(query),
+            request.accepted_media_type or '',
+        ))
+        digest = hashlib.sha1(variant.encode()).hexdigest()
+        generation = f'{data_version.version}.' \
+            f'{data_version.modified.timestamp():.6f}'
+        return f'resp:{data_version.user_id}:{generation}:{digest}'
+
+    def get(self, key):
+        """
+        Return cached (content, content type) for key, counting
+        hits and misses
+        """
+        entry = self.cache.get(key)
+        self._count(HITS_KEY if entry is not None else MISSES_KEY)
+        return entry
+
+    def set(self, key, response):
+        """
+        Store a rendered response unless it is too large
+        """
+        if len(response.content) > self.max_bytes:
+            return
+        self.cache.set(key, (response.content, response['Content-Type']),
+                       self.timeout)
+
+    def stats(self):
+        """
+        Return hit and miss counters. They live in the cache backend, so
+        they cover all workers when the backend is shared
+        """
+        counts = self.cache.get_many([HITS_KEY, MISSES_KEY])
+        return {
+            'hits': counts.get(HITS_KEY, 0),
+            'misses': counts.get(MISSES_KEY, 0),
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many([HITS_KEY, MISSES_KEY])
+
+    def _count(self, key):
+        if not self.cache.add(key, 1, None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # evicted between add and incr
+                self.cache.add(key, 1, None)
+
+
+def get_response_cache():
+    """
+    Return the response cache configured by settings, None if disabled
+    """
+    config = settings.RECIPE_RESPONSE_CACHE
+    if not config['ENABLED']:
+        return None
+    return ResponseCache(
+        config['ALIAS'], config['TIMEOUT'], config['MAX_BYTES'])
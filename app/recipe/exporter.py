@@ -0,0 +1,84 @@
+import csv
+import json
+from collections import defaultdict
+
+from core.models import Recipe
+
+EXPORT_FIELDS = ('id', 'title', 'time_minutes', 'price', 'link')
+CSV_HEADER = EXPORT_FIELDS + ('tags', 'ingredients')
+# Separates names inside the tags / ingredients CSV cells
+CSV_LIST_SEPARATOR = '|'
+
+
+def iter_recipes(user, chunk_size=1000):
+    """
+    Yield the user's recipes as dicts with tag and ingredient names.
+    Recipes are read through a server-side cursor and the names are
+    fetched once per chunk, so memory is bounded by chunk_size
+    """
+    rows = Recipe.objects.filter(user=user).order_by('id')\
+        .values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _attach_names(chunk)
+            chunk = []
+    if chunk:
+        yield from _attach_names(chunk)
+
+
+def iter_ndjson(recipes):
+    """
+    Yield one JSON line per recipe
+    """
+    for recipe in recipes:
+        yield json.dumps(recipe, default=str) + '\n'
+
+
+def iter_csv(recipes):
+    """
+    Yield a CSV header line and one line per recipe
+    """
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    yield writer.writerow(CSV_HEADER)
+    for recipe in recipes:
+        yield writer.writerow([
+            *(recipe[field] for field in EXPORT_FIELDS),
+            CSV_LIST_SEPARATOR.join(recipe['tags']),
+            CSV_LIST_SEPARATOR.join(recipe['ingredients']),
+        ])
+
+
+def _attach_names(chunk):
+    ids = [row['id'] for row in chunk]
+    tags = _names_by_recipe(Recipe.tags.through, 'tag', ids)
+    ingredients = _names_by_recipe(
+        Recipe.ingredients.through, 'ingredient', ids)
+    for row in chunk:
+        row['tags'] = tags.get(row['id'], [])
+        row['ingredients'] = ingredients.get(row['id'], [])
+        yield row
+
+
+def _names_by_recipe(through, field, recipe_ids):
+    """
+    Return {recipe id: [names]} of the related field with one query
+    """
+    names = defaultdict(list)
+    links = through.objects.filter(recipe_id__in=recipe_ids)\
+        .order_by('recipe_id', f'{field}__name')\
+        .values_list('recipe_id', f'{field}__name')
+    for recipe_id, name in links:
+        names[recipe_id].append(name)
+    return names
+
+
+class _LineBuffer:
+    """
+    File-like object for csv.writer that hands each row back
+    instead of storing it
+    """
+    def write(self, value):
+        return value
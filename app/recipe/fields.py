@@ -0,0 +1,69 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.relations import MANY_RELATION_KWARGS, \
+    ManyRelatedField, PrimaryKeyRelatedField
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+    """
+    Many related field resolving all submitted values with one query
+    of the child relation, see UserPrimaryKeyRelatedField
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_value_many(list(data))
+
+
+class UserPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+    Primary key related field limited to objects of the requesting user.
+    With many=True all ids are looked up in one query and every missing
+    or foreign id is reported at once
+    """
+    default_error_messages = {
+        'does_not_exist_many': _(
+            'Invalid pks {pk_values} - objects do not exist.'),
+    }
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+        return queryset.filter(user=request.user)
+
+    def to_internal_value_many(self, data):
+        """
+        Return the objects of the submitted primary keys,
+        in submitted order
+        """
+        queryset = self.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+            if self.pk_field is not None:
+                item = self.pk_field.to_internal_value(item)
+            try:
+                pks.append(pk_field.to_python(item))
+            except DjangoValidationError:
+                self.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(set(pks)) if pks else {}
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail('does_not_exist_many', pk_values=missing)
+        return [objects[pk] for pk in pks]
@@ -0,0 +1,97 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Recipe
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+# largest price and time the columns hold
+MAX_PRICE = Decimal('999.99')
+MAX_TIME = 2 ** 31 - 1
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_ids(value, param):
+    """
+    Return the distinct ids of a comma separated parameter
+    """
+    try:
+        ids = sorted({int(part) for part in value.split(',') if part})
+    except ValueError:
+        ids = None
+    if ids is None or any(abs(pk) > MAX_ID for pk in ids):
+        raise ValidationError(
+            {param: [_('Expected comma separated ids.')]})
+    return ids
+
+
+def parse_number(value, param, parse, bound):
+    """
+    Parse a number parameter clamped to +-bound, the column's range
+    """
+    try:
+        number = parse(value)
+        if isinstance(number, Decimal) and not number.is_finite():
+            raise ValueError(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({param: [_('A valid number is required.')]})
+    return min(max(number, -bound), bound)
+
+
+def linked_to(through, column, ids, match):
+    """
+    Return a subquery of recipe ids linked through column to any, or
+    all, of ids. All is one grouped query counting the matched links
+    per recipe, through rows are unique per recipe and id
+    """
+    links = through.objects.filter(**{f'{column}__in': ids})
+    if match == MATCH_ALL:
+        links = links.values('recipe_id')\
+            .annotate(matched=Count(column))\
+            .filter(matched=len(ids))
+    return links.values('recipe_id')
+
+
+def filter_recipes(queryset, params):
+    """
+    Filter recipes by the query parameters tags and ingredients (comma
+    separated ids, recipes linked to any of them or to all of them with
+    match=all), max_price and max_time
+    """
+    match = params.get('match', MATCH_ANY)
+    if match not in (MATCH_ANY, MATCH_ALL):
+        raise ValidationError(
+            {'match': [_('Expected "any" or "all".')]})
+
+    relations = (
+        ('tags', Recipe.tags.through, 'tag_id'),
+        ('ingredients', Recipe.ingredients.through, 'ingredient_id'),
+    )
+    for param, through, column in relations:
+        if not params.get(param):
+            continue
+        ids = parse_ids(params[param], param)
+        if ids:
+            queryset = queryset.filter(
+                id__in=linked_to(through, column, ids, match))
+
+    if params.get('max_price'):
+        queryset = queryset.filter(price__lte=parse_number(
+            params['max_price'], 'max_price', Decimal, MAX_PRICE))
+    if params.get('max_time'):
+        queryset = queryset.filter(time_minutes__lte=parse_number(
+            params['max_time'], 'max_time', int, MAX_TIME))
+    return queryset
+
+
+class RecipeFilterBackend(BaseFilterBackend):
+    """
+    Filter the recipe list, see filter_recipes
+    """
+    def filter_queryset(self, request, queryset, view):
+        return filter_recipes(queryset, request.query_params)
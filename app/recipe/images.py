@@ -0,0 +1,147 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import receiver
+from PIL import features
+
+from core.models import Recipe
+from recipe.variants import generate_variants
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+_executor = None
+
+
+def variant_format():
+    """
+    Return the Pillow format of image variants, WEBP falls back
+    to JPEG when Pillow was built without libwebp
+    """
+    fmt = settings.RECIPE_IMAGE_FORMAT
+    if fmt == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return fmt
+
+
+def variant_name(name, variant):
+    """
+    Return storage name of a variant, stored next to the original
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{variant}.{EXTENSIONS[variant_format()]}'
+
+
+def variant_names(name):
+    """
+    Return {variant: storage name} for an original image name
+    """
+    return {variant: variant_name(name, variant)
+            for variant in settings.RECIPE_IMAGE_VARIANTS}
+
+
+def schedule_variants(image):
+    """
+    Generate the variants of an uploaded image file once the current
+    transaction commits, in the worker pool unless
+    RECIPE_IMAGE_WORKERS is 0
+    """
+    storage = image.storage
+    source = storage.path(image.name)
+    # content shared with another recipe already has its variants
+    targets = {
+        storage.path(name): settings.RECIPE_IMAGE_VARIANTS[variant]
+        for variant, name in variant_names(image.name).items()
+        if not storage.exists(name)
+    }
+    if not targets:
+        return
+    args = (source, targets, variant_format(),
+            settings.RECIPE_IMAGE_QUALITY)
+
+    def submit():
+        if not settings.RECIPE_IMAGE_WORKERS:
+            generate_variants(*args)
+            return
+        future = get_executor().submit(generate_variants, *args)
+        future.add_done_callback(_log_failure)
+
+    transaction.on_commit(submit)
+
+
+def release_image(name):
+    """
+    Delete a stored image and its variants once the current transaction
+    commits, unless a recipe still references the content
+    """
+    if name:
+        transaction.on_commit(lambda: release_unreferenced(name))
+
+
+def release_unreferenced(name):
+    """
+    Delete the image name and its variants if no recipe references it.
+    Files written or reused within RECIPE_IMAGE_RELEASE_GRACE seconds may
+    belong to an upload not committed yet, they are checked again once
+    the grace has passed
+    """
+    storage = Recipe._meta.get_field('image').storage
+    if Recipe.objects.filter(image=name).exists() or \
+            not storage.exists(name):
+        return
+    wait = settings.RECIPE_IMAGE_RELEASE_GRACE - storage.modified_age(name)
+    if wait > 0:
+        timer = threading.Timer(wait, _recheck, args=(name,))
+        timer.daemon = True
+        timer.start()
+        return
+    for variant in variant_names(name).values():
+        storage.delete(variant)
+    storage.delete(name)
+
+
+def _recheck(name):
+    try:
+        release_unreferenced(name)
+    except Exception:
+        logger.exception('Releasing image %s failed', name)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    """
+    Return the process pool generating variants. Its workers are
+    spawned without Django, the task lives in recipe.variants
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    """
+    Rebuild the pool when settings are overridden in tests
+    """
+    global _executor
+    if setting == 'RECIPE_IMAGE_WORKERS' and _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error('Image variant generation failed', exc_info=exc)
@@ -0,0 +1,143 @@
+import json
+
+from django.db import transaction, DatabaseError
+
+from core.models import Tag, Ingredient, Recipe, DataVersion
+from recipe.bulk import bulk_create_returning, resolve_names
+from recipe.search import update_search_vectors
+from recipe.serializers import RecipeImportSerializer
+
+
+class RecipeImporter:
+    """
+    Import recipes for a user from newline-delimited JSON.
+    Lines are read one at a time and written in chunks, each chunk in
+    its own transaction, so memory stays bounded by the chunk size
+    whatever the size of the input. Invalid lines are reported and
+    skipped without aborting the import, and a chunk the database
+    rejects is retried line by line to report the lines at fault
+    """
+    def __init__(self, user, chunk_size=500, max_errors=100):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, lines):
+        """
+        Import all lines and return the summary
+        """
+        chunk = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            data = self.parse(number, line)
+            if data is None:
+                continue
+            chunk.append((number, data))
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        if chunk:
+            self.flush(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+    def parse(self, number, line):
+        """
+        Return validated data of a line, None if it is invalid
+        """
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            self.error(number, {'non_field_errors': [f'Invalid JSON: {exc}']})
+            return None
+
+        serializer = RecipeImportSerializer(data=data)
+        if not serializer.is_valid():
+            self.error(number, serializer.errors)
+            return None
+        return serializer.validated_data
+
+    def error(self, number, errors):
+        """
+        Record a failed line, keeping at most max_errors details
+        """
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': number, 'errors': errors})
+
+    def flush(self, chunk):
+        """
+        Write a chunk of validated lines in one transaction, line by
+        line if the database rejects it
+        """
+        try:
+            with transaction.atomic():
+                self.write([data for _, data in chunk])
+        except DatabaseError:
+            for line in chunk:
+                self.flush_line(line)
+            return
+        self.created += len(chunk)
+
+    def flush_line(self, line):
+        """
+        Write a single line in its own transaction, recording it as
+        failed if the database rejects it
+        """
+        number, data = line
+        try:
+            with transaction.atomic():
+                self.write([data])
+        except DatabaseError as exc:
+            self.error(number, {'non_field_errors': [str(exc)]})
+            return
+        self.created += 1
+
+    def write(self, items):
+        """
+        Insert recipes and their links with a fixed number of queries
+        """
+        tag_ids = resolve_names(
+            Tag, self.user, [name for item in items for name in item['tags']])
+        ingredient_ids = resolve_names(
+            Ingredient, self.user,
+            [name for item in items for name in item['ingredients']])
+
+        recipes = bulk_create_returning(Recipe, self.user, [
+            Recipe(
+                user=self.user,
+                title=item['title'],
+                time_minutes=item['time_minutes'],
+                price=item['price'],
+                link=item['link'],
+            )
+            for item in items
+        ])
+
+        TagLink = Recipe.tags.through
+        IngredientLink = Recipe.ingredients.through
+        TagLink.objects.bulk_create([
+            TagLink(recipe_id=recipe.pk, tag_id=tag_ids[name])
+            for recipe, item in zip(recipes, items)
+            for name in dict.fromkeys(item['tags'])
+        ])
+        IngredientLink.objects.bulk_create([
+            IngredientLink(recipe_id=recipe.pk,
+                           ingredient_id=ingredient_ids[name])
+            for recipe, item in zip(recipes, items)
+            for name in dict.fromkeys(item['ingredients'])
+        ])
+
+        # bulk_create sends no signals
+        update_search_vectors(recipe.pk for recipe in recipes)
+        DataVersion.objects.bump(self.user.pk)
@@ -0,0 +1,124 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe, DataVersion
+from core.storage import content_addressed_name, file_digest, \
+    is_content_addressed
+from recipe.images import variant_names
+
+IMAGE_DIR = 'uploads/recipe/'
+
+
+class Command(BaseCommand):
+    """
+    Django command to move recipe images to content addressed storage
+    """
+    help = (
+        "Rename recipe images stored under random names to the digest of "
+        "their content, storing identical images once. With --prune, "
+        "also delete stored images no recipe references any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--prune', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.storage = Recipe._meta.get_field('image').storage
+        self.dry_run = options['dry_run']
+
+        moved = self.migrate()
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} images"))
+        if options['prune']:
+            pruned = self.prune(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} images"))
+
+    def migrate(self):
+        """
+        Move every legacy image, return the number of files moved
+        """
+        names = set(
+            Recipe.objects.exclude(image__isnull=True).exclude(image='')
+            .values_list('image', flat=True).iterator()
+        )
+        moved = 0
+        for name in sorted(names):
+            if is_content_addressed(name):
+                continue
+            if not self.storage.exists(name):
+                self.stderr.write(f"{name}: missing, skipped")
+                continue
+            new_name = self.move(name)
+            self.stdout.write(f"{name} -> {new_name}")
+            moved += 1
+        return moved
+
+    def move(self, name):
+        """
+        Store the image name and its variants under the content digest
+        and point recipes at the new name
+        """
+        with self.storage.open(name) as content:
+            digest = file_digest(content)
+            new_name = content_addressed_name(
+                IMAGE_DIR, digest, name.split('.')[-1])
+            if self.dry_run:
+                return new_name
+            self.storage.save(new_name, content)
+
+        old_variants = variant_names(name)
+        for variant, new_variant in variant_names(new_name).items():
+            if self.storage.exists(old_variants[variant]):
+                with self.storage.open(old_variants[variant]) as content:
+                    self.storage.save(new_variant, content)
+
+        recipes = Recipe.objects.filter(image=name)
+        user_ids = set(recipes.values_list('user_id', flat=True))
+        recipes.update(image=new_name)
+        # image urls in cached responses changed
+        for user_id in user_ids:
+            DataVersion.objects.bump(user_id, create=False)
+
+        for old_name in (name, *old_variants.values()):
+            self.storage.delete(old_name)
+        return new_name
+
+    def prune(self, batch_size):
+        """
+        Delete stored images without references, return their number
+        """
+        stored = [name for name in self.walk(IMAGE_DIR)
+                  if is_content_addressed(name)]
+        pruned = 0
+        for start in range(0, len(stored), batch_size):
+            batch = stored[start:start + batch_size]
+            referenced = set(
+                Recipe.objects.filter(image__in=batch)
+                .values_list('image', flat=True)
+            )
+            for name in batch:
+                if name in referenced or self.storage.modified_age(name) < \
+                        settings.RECIPE_IMAGE_RELEASE_GRACE:
+                    continue
+                self.stdout.write(f"{name}: unreferenced")
+                pruned += 1
+                if not self.dry_run:
+                    for variant in variant_names(name).values():
+                        self.storage.delete(variant)
+                    self.storage.delete(name)
+        return pruned
+
+    def walk(self, directory):
+        """
+        Yield names of all files below directory
+        """
+        if not self.storage.exists(directory):
+            return
+        directories, files = self.storage.listdir(directory)
+        for name in files:
+            yield os.path.join(directory, name)
+        for name in directories:
+            yield from self.walk(os.path.join(directory, name))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.cache import get_response_cache
+
+
+class Command(BaseCommand):
+    """
+    Django command to report recipe response cache hit/miss counters
+    """
+    help = (
+        "Print hit/miss counters of the recipe response cache. Counters "
+        "are kept in the cache backend, so with the default local memory "
+        "backend they only cover the current process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true')
+
+    def handle(self, *args, **options):
+        response_cache = get_response_cache()
+        if response_cache is None:
+            raise CommandError("Response cache is disabled")
+
+        stats = response_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"hit_ratio={ratio:.2%}"
+        )
+        if options['reset']:
+            response_cache.reset_stats()
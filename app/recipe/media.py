@@ -0,0 +1,170 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, \
+    StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from core.models import Recipe
+from user.authentication import CachedTokenAuthentication
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Stored names never change content, see core.storage
+CACHE_CONTROL = 'private, max-age=31536000, immutable'
+# responses carrying the content, or confirming a cached copy
+CACHED_STATUSES = (200, 206, 304)
+CHUNK_SIZE = 64 * 1024
+
+
+def original_name_prefix(name):
+    """
+    Return the name prefix of the original image when name is a variant
+    (see recipe.images.variant_name), None otherwise
+    """
+    root, _ = os.path.splitext(name)
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        suffix = f'_{variant}'
+        if root.endswith(suffix):
+            return f'{root[:-len(suffix)]}.'
+    return None
+
+
+def parse_range(header, size):
+    """
+    Return the (first, last) byte positions of a single range header,
+    None for headers served in full and ValueError if unsatisfiable
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # suffix range, the final bytes
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        raise ValueError(header)
+    return first, last
+
+
+def iter_range(path, first, last):
+    """
+    Yield the bytes first to last (inclusive) of the file at path
+    """
+    with open(path, 'rb') as media_file:
+        media_file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = media_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class IgnoreAcceptNegotiation(BaseContentNegotiation):
+    """
+    Render errors with the first renderer whatever the client accepts,
+    as media requests accept image types only
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class MediaView(APIView):
+    """
+    Serve recipe images, and their variants, to the owner of the recipe.
+    The transfer is handed off to the front-end server when
+    MEDIA_ACCEL_REDIRECT is set, otherwise Django streams the file
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    content_negotiation_class = IgnoreAcceptNegotiation
+
+    def get(self, request, path):
+        name = posixpath.normpath(path)
+        if name.startswith(('/', '..')) or not self.can_read(name):
+            raise Http404
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, name)
+            size = os.path.getsize(full_path)
+        except (OSError, ValueError):
+            raise Http404
+
+        etag = quote_etag(posixpath.splitext(posixpath.basename(name))[0])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.transfer(request, name, full_path, size, etag)
+        if response.status_code in CACHED_STATUSES:
+            response['ETag'] = etag
+            response['Cache-Control'] = CACHE_CONTROL
+        return response
+
+    def can_read(self, name):
+        """
+        Return whether the user has a recipe with image name,
+        or with the original image of variant name
+        """
+        lookup = Q(image=name)
+        prefix = original_name_prefix(name)
+        if prefix is not None:
+            lookup |= Q(image__startswith=prefix)
+        return Recipe.objects.filter(user=self.request.user)\
+            .filter(lookup).exists()
+
+    def transfer(self, request, name, full_path, size, etag):
+        content_type = mimetypes.guess_type(name)[0] or \
+            'application/octet-stream'
+        accel = settings.MEDIA_ACCEL_REDIRECT
+        if accel:
+            # the front-end server handles ranges itself
+            response = HttpResponse(content_type=content_type)
+            if accel == 'x-accel-redirect':
+                response['X-Accel-Redirect'] = quote(
+                    settings.MEDIA_ACCEL_PREFIX + name)
+            else:
+                response['X-Sendfile'] = full_path
+            return response
+
+        byte_range = None
+        if request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None:
+            # wsgi.file_wrapper sends the whole file with sendfile()
+            response = FileResponse(
+                open(full_path, 'rb'), content_type=content_type)
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                iter_range(full_path, first, last),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Length'] = last - first + 1
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
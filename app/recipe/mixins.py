@@ -0,0 +1,228 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.metrics import time_serializer
+from core.models import DataVersion
+from core.profiling import current_capture
+from recipe.cache import get_response_cache
+from recipe.readers import recipe_rows, serialize_recipes, \
+    serialize_recipe_detail
+
+
+class ProfiledViewMixin:
+    """
+    Run the whole view, rendering included, under the profiler of the
+    request when core.middleware.ProfilingMiddleware profiles it
+    """
+    def dispatch(self, request, *args, **kwargs):
+        capture = current_capture()
+        if capture is None:
+            return super().dispatch(request, *args, **kwargs)
+        return capture.run(self.dispatch_and_render, request, *args,
+                           **kwargs)
+
+    def dispatch_and_render(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve with 304 Not Modified, checked against
+    the user's data version alone so unchanged data is never queried
+    or serialized again
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_data_version(self):
+        """
+        Return the user's DataVersion, None if the user never wrote
+        """
+        if not hasattr(self, '_data_version'):
+            self._data_version = DataVersion.objects\
+                .filter(user_id=self.request.user.pk).first()
+        return self._data_version
+
+    def get_etag(self):
+        """
+        Return the ETag of the current response, None if unknown.
+        Bodies hold absolute URLs, so the full URL of the request is
+        part of it
+        """
+        data_version = self.get_data_version()
+        if data_version is None:
+            return None
+        request = self.request
+        parts = (
+            request.user.pk,
+            data_version.version,
+            data_version.modified.isoformat(),
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+        )
+        digest = hashlib.md5(':'.join(map(str, parts)).encode())
+        return quote_etag(digest.hexdigest())
+
+    def get_last_modified(self):
+        """
+        Return the Last-Modified timestamp, only once the second of the
+        last write is over since the header has one second resolution
+        """
+        data_version = self.get_data_version()
+        if data_version is None:
+            return None
+        modified = int(data_version.modified.timestamp())
+        if modified >= int(timezone.now().timestamp()):
+            return None
+        return modified
+
+    def is_conditional(self, request):
+        return request.method in ('GET', 'HEAD') and \
+            self.action in self.conditional_actions
+
+    def set_conditional_headers(self, response):
+        etag = self.get_etag()
+        if etag is None:
+            return
+        response['ETag'] = etag
+        last_modified = self.get_last_modified()
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+
+    def not_modified(self, request):
+        """
+        Return a 304 response if the client copy is current, else None
+        """
+        etag = self.get_etag()
+        if etag is None:
+            return None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=self.get_last_modified())
+        if response is not None:
+            self.set_conditional_headers(response)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = self.not_modified(request)
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.not_modified(request)
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if self.is_conditional(request) and response.status_code == 200:
+            self.set_conditional_headers(response)
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve from the response cache, keyed by the
+    user's data version.
+    Must come after ConditionalGetMixin, which provides the version
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def get_cache_key(self, request):
+        """
+        Return the response cache key, None if the response
+        cannot be cached
+        """
+        if not hasattr(self, '_response_cache'):
+            self._response_cache = get_response_cache()
+        data_version = self.get_data_version()
+        if self._response_cache is None or data_version is None or \
+                request.method != 'GET' or \
+                self.action not in self.cached_actions:
+            return None
+        return self._response_cache.key(request, self.action, data_version)
+
+    def cached_response(self, request):
+        """
+        Return the cached response for request, if any
+        """
+        self._cache_key = self.get_cache_key(request)
+        if self._cache_key is None:
+            return None
+        entry = self._response_cache.get(self._cache_key)
+        if entry is None:
+            return None
+        content, content_type = entry
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = self.cached_response(request)
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(request)
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        cache_key = getattr(self, '_cache_key', None)
+        if cache_key is not None and response.status_code == 200 and \
+                'X-Cache' not in response:
+            response.render()
+            self._response_cache.set(cache_key, response)
+            response['X-Cache'] = 'MISS'
+        return response
+
+
+class RecipeValuesReadMixin:
+    """
+    Serve recipe list and retrieve from values() rows (see recipe.readers)
+    instead of the serializers when RECIPE_FAST_READS is set.
+    Must come after the caching mixins so they still apply
+    """
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_FAST_READS:
+            return super().list(request, *args, **kwargs)
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with time_serializer():
+                data = serialize_recipes(page)
+            return self.get_paginated_response(data)
+        rows = list(queryset)
+        with time_serializer():
+            data = serialize_recipes(rows)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.RECIPE_FAST_READS:
+            return super().retrieve(request, *args, **kwargs)
+        queryset = recipe_rows(
+            self.filter_queryset(self.get_queryset()), detail=True)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        with time_serializer():
+            data = serialize_recipe_detail(row, request)
+        return Response(data)
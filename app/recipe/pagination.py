@@ -0,0 +1,200 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in cursor pagination over an indexed ordering.
+    Pages are fetched with a keyset WHERE clause instead of OFFSET and
+    no COUNT(*) is run, so deep pages cost the same as the first one.
+    Only applied when the request has a cursor or page_size parameter
+    """
+    # Last field should be unique so that every row has its own position
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of rows, or None if the client did not
+        ask for pagination
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and \
+                self.page_size_query_param not in params:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.clean_position(queryset.model, position)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_invert(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        first = self.get_position(rows[0]) if rows else position
+        last = self.get_position(rows[-1]) if rows else position
+        if reverse:
+            self.next_cursor = (last, False) if last is not None else None
+            self.previous_cursor = (first, True) if has_more else None
+        else:
+            self.next_cursor = (last, False) if has_more else None
+            self.previous_cursor = (first, True) \
+                if position is not None else None
+
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """
+        Return page size requested by the client, capped at max_page_size
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return self.encode_cursor(*self.next_cursor)
+
+    def get_previous_link(self):
+        if self.previous_cursor is None:
+            return None
+        return self.encode_cursor(*self.previous_cursor)
+
+    def get_position(self, row):
+        """
+        Return the ordering key of a model instance or values() row
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def after(self, ordering, position):
+        """
+        Build the keyset filter selecting rows that come after position
+        in the given ordering
+        """
+        clauses = []
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        return reduce(or_, clauses)
+
+    def clean_position(self, model, position):
+        """
+        Return position with each value converted to the type of its
+        ordering field, raise NotFound if one does not fit
+        """
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            if value is None or isinstance(value, (bool, dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                model_field = model._meta.get_field(field.lstrip('-'))
+                cleaned.append(model_field.to_python(value))
+            except (FieldDoesNotExist, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    def encode_cursor(self, position, reverse):
+        """
+        Return the page url for an opaque cursor
+        """
+        payload = json.dumps({'p': position, 'r': int(reverse)},
+                             separators=(',', ':'), default=str)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Return (position, reverse) for the request cursor
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = payload['p']
+            reverse = bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class NameKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for tags and ingredients
+    """
+    ordering = ('-name', 'id')
+
+
+class RecipeKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for recipes
+    """
+    ordering = ('-id',)
+
+
+def _invert(field):
+    """
+    Flip the direction of an ordering field
+    """
+    return field[1:] if field.startswith('-') else '-' + field
@@ -0,0 +1,119 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, \
+    PrimaryKeyRelatedField, RelatedField
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Add the select_related / prefetch_related calls needed to serialize
+    queryset with serializer_class in a fixed number of queries
+    """
+    select, prefetch = _plan(serializer_class, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(
+            *(_build_prefetch(spec) for spec in prefetch))
+    return queryset
+
+
+def _build_prefetch(spec):
+    """
+    Turn a prefetch spec from _plan into a Prefetch object
+    """
+    lookup, model, only, select, nested = spec
+    queryset = model._default_manager.all()
+    if only:
+        queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if nested:
+        queryset = queryset.prefetch_related(
+            *(_build_prefetch(child) for child in nested))
+    return Prefetch(lookup, queryset=queryset.order_by('pk'))
+
+
+@lru_cache(maxsize=None)
+def _plan(serializer_class, model):
+    """
+    Walk the serializer fields and return (select_related lookups,
+    prefetch specs) for the given model, cached per serializer class
+    """
+    select = []
+    prefetch = []
+    _walk(serializer_class(), model, '', select, prefetch)
+    return tuple(select), tuple(prefetch)
+
+
+def _walk(serializer, model, prefix, select, prefetch):
+    """
+    Collect lookups for every readable relation of serializer
+    """
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+        related_model = model_field.related_model
+
+        if isinstance(field, ManyRelatedField):
+            # only the primary key is needed to render a list of ids
+            only = ()
+            if isinstance(field.child_relation, PrimaryKeyRelatedField):
+                only = (related_model._meta.pk.name,)
+            prefetch.append((lookup, related_model, only, (), ()))
+
+        elif isinstance(field, serializers.ListSerializer):
+            child = field.child
+            child_select = []
+            child_prefetch = []
+            if isinstance(child, serializers.ModelSerializer):
+                _walk(child, related_model, '', child_select, child_prefetch)
+            prefetch.append((
+                lookup, related_model, _only_fields(child, related_model),
+                tuple(child_select), tuple(child_prefetch)
+            ))
+
+        elif model_field.many_to_many or model_field.one_to_many:
+            prefetch.append((lookup, related_model, (), (), ()))
+
+        elif isinstance(field, serializers.ModelSerializer):
+            select.append(lookup)
+            _walk(field, related_model, lookup + '__', select, prefetch)
+
+        elif isinstance(field, RelatedField) and \
+                not field.use_pk_only_optimization():
+            select.append(lookup)
+
+
+def _only_fields(serializer, model):
+    """
+    Return the concrete columns a nested model serializer reads,
+    or an empty tuple when they cannot be worked out
+    """
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return ()
+    columns = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            return ()
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # properties and methods may read any attribute
+            return ()
+        if model_field.concrete:
+            columns.add(model_field.name)
+    return tuple(sorted(columns))
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.images import variant_names
+
+# Read-only output of RecipeSerializer and RecipeDetailSerializer built
+# from values() rows, skipping the per-field serializer machinery.
+# Output must stay identical to the serializers, see test_readers.
+
+COLUMNS = ('id', 'title', 'time_minutes', 'price', 'link')
+
+
+def recipe_rows(queryset, detail=False):
+    """
+    Return the values() queryset of recipes read by the fast path,
+    relations are loaded separately
+    """
+    columns = COLUMNS + ('image',) if detail else COLUMNS
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def serialize_recipes(rows):
+    """
+    Return RecipeSerializer data of recipe rows
+    """
+    ids = [row['id'] for row in rows]
+    ingredients = linked_ids(Recipe.ingredients.through, 'ingredient_id', ids)
+    tags = linked_ids(Recipe.tags.through, 'tag_id', ids)
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'ingredients': ingredients.get(row['id'], []),
+            'tags': tags.get(row['id'], []),
+            'time_minutes': row['time_minutes'],
+            'price': format_price(row['price']),
+            'link': row['link'],
+        }
+        for row in rows
+    ]
+
+
+def serialize_recipe_detail(row, request=None):
+    """
+    Return RecipeDetailSerializer data of a recipe row,
+    which also needs the image column
+    """
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'ingredients': list(
+            Ingredient.objects.filter(recipe=row['id'])
+            .order_by('pk').values('id', 'name')),
+        'tags': list(
+            Tag.objects.filter(recipe=row['id'])
+            .order_by('pk').values('id', 'name')),
+        'time_minutes': row['time_minutes'],
+        'price': format_price(row['price']),
+        'link': row['link'],
+        'image_variants': image_variant_urls(row['image'], request),
+    }
+
+
+def linked_ids(through, column, recipe_ids):
+    """
+    Return {recipe id: ids linked through column} ordered by id,
+    as the prefetched relations are (see recipe.prefetch)
+    """
+    linked = defaultdict(list)
+    if not recipe_ids:
+        return linked
+    pairs = through.objects.filter(recipe_id__in=recipe_ids)\
+        .order_by(column).values_list('recipe_id', column)
+    for recipe_id, linked_id in pairs:
+        linked[recipe_id].append(linked_id)
+    return linked
+
+
+def format_price(price):
+    """
+    Format a price as DecimalField does. Values read from the database
+    already have the field's decimal places, so quantizing is skipped
+    """
+    return '{:f}'.format(price)
+
+
+def image_variant_urls(name, request=None):
+    """
+    Return {variant: url} of a stored image name, as
+    ImageVariantsMixin does
+    """
+    if not name:
+        return None
+    storage = Recipe._meta.get_field('image').storage
+    urls = {}
+    for variant, variant_name in variant_names(name).items():
+        url = storage.url(variant_name)
+        urls[variant] = request.build_absolute_uri(url) \
+            if request is not None else url
+    return urls
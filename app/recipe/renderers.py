@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+
+from rest_framework import renderers
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Newline-delimited JSON, renders plain data (e.g. errors)
+    as a single line
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, default=str) + '\n').encode()
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    CSV, renders plain data (e.g. errors) as key,value rows
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            writer.writerow([key, value])
+        return buffer.getvalue().encode()
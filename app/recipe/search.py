@@ -0,0 +1,133 @@
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Tag, Ingredient, Recipe
+
+SEARCH_PARAM = 'search'
+
+# Title matches weigh most, then tag names, then ingredient names
+UPDATE_SQL = """
+UPDATE {recipe} SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, {recipe}.title), 'A') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce((
+        SELECT string_agg(tag.name, ' ') FROM {tag} tag
+        JOIN {tag_link} link ON link.tag_id = tag.id
+        WHERE link.recipe_id = {recipe}.id
+    ), '')), 'B') ||
+    setweight(to_tsvector(%(config)s::regconfig, coalesce((
+        SELECT string_agg(ingredient.name, ' ') FROM {ingredient} ingredient
+        JOIN {ingredient_link} link ON link.ingredient_id = ingredient.id
+        WHERE link.recipe_id = {recipe}.id
+    ), '')), 'C')
+WHERE {recipe}.id = ANY(%(ids)s)
+"""
+
+
+def uses_search_vector():
+    """
+    Return whether the database keeps Recipe.search_vector,
+    only PostgreSQL does
+    """
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vectors(recipe_ids):
+    """
+    Recompute the stored search vector of the recipes with one UPDATE.
+    Called by recipe.signals and by bulk writes, which send no signals
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids or not uses_search_vector():
+        return
+    quote = connection.ops.quote_name
+    sql = UPDATE_SQL.format(
+        recipe=quote(Recipe._meta.db_table),
+        tag=quote(Tag._meta.db_table),
+        tag_link=quote(Recipe.tags.through._meta.db_table),
+        ingredient=quote(Ingredient._meta.db_table),
+        ingredient_link=quote(Recipe.ingredients.through._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'config': settings.RECIPE_SEARCH_CONFIG,
+            'ids': recipe_ids,
+        })
+
+
+def search_recipes(queryset, text):
+    """
+    Return the recipes of queryset matching text, best match first
+    """
+    if uses_search_vector():
+        return vector_search(queryset, text)
+    return simple_search(queryset, text)
+
+
+def vector_search(queryset, text):
+    """
+    Match against the GIN indexed search vector and rank with ts_rank
+    """
+    query = SearchQuery(text, config=settings.RECIPE_SEARCH_CONFIG,
+                        search_type='websearch')
+    return queryset.filter(search_vector=query)\
+        .annotate(rank=SearchRank(F('search_vector'), query))\
+        .order_by('-rank', '-id')
+
+
+def simple_search(queryset, text):
+    """
+    Portable fallback: every word must appear in the title or in a
+    tag or ingredient name, title matches rank first
+    """
+    words = text.split()
+    if not words:
+        return queryset.none()
+    matches = []
+    for word in words:
+        tags = Recipe.tags.through.objects\
+            .filter(tag__name__icontains=word).values('recipe_id')
+        ingredients = Recipe.ingredients.through.objects\
+            .filter(ingredient__name__icontains=word).values('recipe_id')
+        matches.append(Q(title__icontains=word) | Q(id__in=tags) |
+                       Q(id__in=ingredients))
+    title_match = reduce(and_, (Q(title__icontains=word) for word in words))
+    return queryset.filter(*matches)\
+        .annotate(rank=Case(When(title_match, then=Value(1)), default=0,
+                            output_field=IntegerField()))\
+        .order_by('-rank', '-id')
+
+
+def search_limit(request):
+    """
+    Return how many matches a search returns, page_size when given
+    """
+    try:
+        limit = int(request.query_params.get('page_size', ''))
+    except ValueError:
+        limit = 0
+    if limit <= 0:
+        return settings.RECIPE_SEARCH_LIMIT
+    return min(limit, settings.RECIPE_SEARCH_MAX_LIMIT)
+
+
+def is_search(request):
+    return bool(request.query_params.get(SEARCH_PARAM, '').strip())
+
+
+class RecipeSearchBackend(BaseFilterBackend):
+    """
+    Rank the recipe list by ?search= matches. Search results are the
+    best matches in rank order instead of keyset pages (see
+    RecipeViewSet.paginate_queryset)
+    """
+    def filter_queryset(self, request, queryset, view):
+        if not is_search(request):
+            return queryset
+        return search_recipes(queryset, request.query_params[SEARCH_PARAM])
@@ -1,9 +1,22 @@
 from rest_framework import serializers
 
+from core.metrics import time_serializer
 from core.models import Tag, Ingredient, Recipe
+from recipe.fields import UserPrimaryKeyRelatedField
+from recipe.images import variant_names
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """
+    Count the time spent representing objects as serializer time in
+    core.metrics, nested serializers are counted once
+    """
+    def to_representation(self, instance):
+        with time_serializer():
+            return super().to_representation(instance)
+
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for tag object
     """
@@ -14,7 +27,8 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     """
     Serializer for Ingredient object
     """
@@ -25,17 +39,17 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serialize a Recipe
     """
-    # we use objects.all() to give list of ids
-    ingredients = serializers.PrimaryKeyRelatedField(
+    # ids are resolved in one query, among the user's own objects
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -47,7 +61,26 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only = ('id',)
 
 
-class RecipeDetailSerializer(RecipeSerializer):
+class ImageVariantsMixin(serializers.Serializer):
+    """
+    Adds URLs of the resized image variants, they become available
+    shortly after the upload (see recipe.images)
+    """
+    image_variants = serializers.SerializerMethodField()
+
+    def get_image_variants(self, obj):
+        if not obj.image:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in variant_names(obj.image.name).items():
+            url = obj.image.storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) \
+                if request is not None else url
+        return urls
+
+
+class RecipeDetailSerializer(ImageVariantsMixin, RecipeSerializer):
     """
     Serialize the recipe details
     """
@@ -62,12 +95,38 @@ class RecipeDetailSerializer(RecipeSerializer):
         read_only=True
     )
 
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image_variants',)
+
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(TimedSerializerMixin, ImageVariantsMixin,
+                            serializers.ModelSerializer):
     """
     Serializer for uploading images to recipe
     """
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
+
+
+class RecipeImportSerializer(serializers.Serializer):
+    """
+    Validate one line of a recipe import,
+    tags and ingredients are given by name
+    """
+    title = serializers.CharField(max_length=255)
+    time_minutes = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=5, decimal_places=2)
+    link = serializers.CharField(max_length=255, required=False,
+                                 allow_blank=True, default='')
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+        default=list
+    )
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+        default=list
+    )
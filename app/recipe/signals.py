@@ -0,0 +1,134 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, \
+    post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.autocomplete import invalidate_names
+from recipe.images import release_image
+from recipe.search import update_search_vectors, uses_search_vector
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_replacing(sender, instance, raw=False, **kwargs):
+    """
+    Remember the stored image of a recipe whose image changes
+    """
+    if raw or instance.pk is None:
+        return
+    image = instance.image
+    stored = getattr(instance, '_stored_image', None)
+    if image._committed and (stored is None or stored == image.name):
+        return
+    if image._committed:
+        instance._replaced_image = stored
+    else:
+        # a new upload, the loaded name may be out of date
+        instance._replaced_image = Recipe.objects.filter(pk=instance.pk)\
+            .values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_replaced(sender, instance, **kwargs):
+    """
+    Release the previous image of a recipe once it was replaced
+    """
+    replaced = instance.__dict__.pop('_replaced_image', None)
+    instance._stored_image = instance.image.name
+    if replaced and replaced != instance.image.name:
+        release_image(replaced)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(sender, instance, **kwargs):
+    """
+    Release the image of a deleted recipe
+    """
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_search_saved(sender, instance, raw=False, **kwargs):
+    """
+    Index the title of a saved recipe
+    """
+    if not raw:
+        update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_search_links_changed(sender, instance, action, reverse,
+                                pk_set, **kwargs):
+    """
+    Index the tag and ingredient names of recipes whose links changed
+    """
+    if reverse and action == 'pre_clear' and uses_search_vector():
+        instance._linked_recipe_ids = linked_recipe_ids(
+            type(instance), [instance.pk])
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_search_vectors([instance.pk])
+    elif action == 'post_clear':
+        update_search_vectors(
+            instance.__dict__.pop('_linked_recipe_ids', ()))
+    else:
+        # links changed from the tag or ingredient side, pk_set are recipes
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def recipe_search_name_saved(sender, instance, created, raw=False,
+                             **kwargs):
+    """
+    Reindex the recipes linked to a renamed tag or ingredient
+    """
+    if created or raw or not uses_search_vector():
+        return
+    update_search_vectors(linked_recipe_ids(sender, [instance.pk]))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_search_name_deleting(sender, instance, **kwargs):
+    """
+    Remember the recipes linked to a tag or ingredient being deleted,
+    their links are gone without m2m_changed once it is
+    """
+    if uses_search_vector():
+        instance._linked_recipe_ids = linked_recipe_ids(
+            sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_search_name_deleted(sender, instance, **kwargs):
+    """
+    Reindex the recipes that were linked to a deleted tag or ingredient
+    """
+    update_search_vectors(instance.__dict__.pop('_linked_recipe_ids', ()))
+
+
+def linked_recipe_ids(model, pks):
+    """
+    Return ids of the recipes linked to tags or ingredients pks
+    """
+    if model is Tag:
+        through, column = Recipe.tags.through, 'tag_id'
+    else:
+        through, column = Recipe.ingredients.through, 'ingredient_id'
+    return list(through.objects.filter(**{f'{column}__in': pks})
+                .values_list('recipe_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def autocomplete_names_changed(sender, instance, **kwargs):
+    """
+    Drop the cached autocomplete names of the owner
+    """
+    invalidate_names(sender, instance.user_id)
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import threading
+
+from asgiref.testing import ApplicationCommunicator
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient, SimpleTestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from app.asgi import application
+from core.models import Recipe
+from recipe.async_views import ConcurrencyLimiter, Overloaded, get_limiter
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    """
+    Test the bounded pool behind the async views
+    """
+    def setUp(self) -> None:
+        self.release = threading.Event()
+
+    def tearDown(self) -> None:
+        self.release.set()
+
+    def block(self):
+        self.release.wait(5)
+        return threading.current_thread().name
+
+    def test_runs_in_worker_thread(self):
+        """
+        Test that calls run in the limiter's threads
+        """
+        limiter = ConcurrencyLimiter(2, 2, 1)
+        self.release.set()
+
+        name = asyncio.run(limiter.run(self.block))
+
+        self.assertTrue(name.startswith('async-view'))
+
+    def test_full_queue_overloaded(self):
+        """
+        Test that calls beyond the queue are rejected at once
+        """
+        limiter = ConcurrencyLimiter(1, 1, 5)
+
+        async def scenario():
+            running = asyncio.ensure_future(limiter.run(self.block))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(limiter.run(self.block))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Overloaded):
+                await limiter.run(self.block)
+            self.release.set()
+            await asyncio.gather(running, queued)
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_queue_timeout_overloaded(self):
+        """
+        Test that calls waiting longer than the timeout are rejected
+        """
+        limiter = ConcurrencyLimiter(1, 10, 0.05)
+
+        async def scenario():
+            running = asyncio.ensure_future(limiter.run(self.block))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Overloaded):
+                await limiter.run(self.block)
+            self.release.set()
+            await running
+
+        asyncio.run(scenario())
+
+
+@override_settings(ROOT_URLCONF='app.asgi_urls')
+class AsyncRecipeViewTests(TransactionTestCase):
+    """
+    Test the recipe views served by the ASGI url configuration. The
+    views run in worker threads with their own database connections,
+    hence TransactionTestCase
+    """
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+        # AsyncClient of Django 3.2 takes headers by their plain name
+        self.auth = {'authorization': f'Token {token.key}'}
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Sample recipe', time_minutes=10,
+            price=5.00)
+
+    async def test_list_and_retrieve(self):
+        """
+        Test that the async views list and retrieve recipes
+        """
+        resp = await self.client.get(reverse('recipe:recipe-list'),
+                                     **self.auth)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()[0]['title'],
+                         'Sample recipe')
+
+        resp = await self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id]),
+            **self.auth)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()['id'], self.recipe.id)
+
+    async def test_requires_authentication(self):
+        """
+        Test that the async views keep the viewset's authentication
+        """
+        resp = await AsyncClient().get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ASYNC_VIEWS={
+        'MAX_CONCURRENCY': 1,
+        'MAX_QUEUE': 0,
+        'QUEUE_TIMEOUT': 1,
+        'RETRY_AFTER': 3,
+    })
+    async def test_overloaded_503(self):
+        """
+        Test that requests beyond the limits are answered 503
+        """
+        release = threading.Event()
+        busy = asyncio.ensure_future(get_limiter().run(release.wait, 5))
+        await asyncio.sleep(0.05)
+
+        resp = await self.client.get(reverse('recipe:recipe-list'),
+                                     **self.auth)
+        release.set()
+        await busy
+
+        self.assertEqual(resp.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(resp['Retry-After'], '3')
+
+    async def asgi(self, method, path, body=b'', content_type=None):
+        """
+        Return the status, headers and body of a request to app.asgi
+        """
+        headers = [(b'host', b'testserver'),
+                   (b'authorization', self.auth['authorization'].encode())]
+        if content_type:
+            headers += [(b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())]
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': headers,
+        })
+        await communicator.send_input({'type': 'http.request', 'body': body})
+        start = await communicator.receive_output(5)
+        content = b''
+        more_body = True
+        while more_body:
+            message = await communicator.receive_output(5)
+            content += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        await communicator.wait()
+        return start['status'], dict(start['headers']), content
+
+    async def test_export(self):
+        """
+        Test that the export is served under ASGI, its rows read in a
+        worker thread rather than while the event loop sends the body
+        """
+        code, headers, content = await self.asgi(
+            'GET', reverse('recipe:recipe-export'))
+
+        self.assertEqual(code, status.HTTP_200_OK, content)
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['title'], 'Sample recipe')
+        self.assertEqual(int(headers[b'Content-Length']), len(content))
+
+    async def test_import(self):
+        """
+        Test that the import action is not taken for a recipe detail
+        """
+        body = json.dumps({'title': 'Imported', 'time_minutes': 5,
+                           'price': '2.00'}) + '\n'
+
+        code, _, content = await self.asgi(
+            'POST', reverse('recipe:recipe-import'), body.encode(),
+            'application/x-ndjson')
+
+        self.assertEqual(code, status.HTTP_200_OK, content)
+        self.assertEqual(json.loads(content)['created'], 1)
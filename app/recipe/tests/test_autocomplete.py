@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from recipe.autocomplete import NameIndex
+
+TAG_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
+INGREDIENT_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
+
+NO_CACHE = {'LIMIT': 10, 'MAX_LIMIT': 50, 'CACHE_USERS': 0}
+
+
+class NameIndexTests(TestCase):
+    def test_prefix(self):
+        """
+        Test prefix lookups are case insensitive, shortest first
+        """
+        index = NameIndex([(1, 'Tomato'), (2, 'tofu'), (3, 'Tomatillo'),
+                           (4, 'Thyme'), (5, 'to')])
+
+        self.assertEqual([row['name'] for row in index.prefix('TO', 10)],
+                         ['to', 'tofu', 'Tomato', 'Tomatillo'])
+        self.assertEqual(index.prefix('tom', 1), [{'id': 1, 'name': 'Tomato'}])
+        self.assertEqual(index.prefix('x', 10), [])
+
+
+class AutocompleteApiTests(TestCase):
+    """
+    Test tag and ingredient autocomplete
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        for name in ('Vegan', 'Vegetarian', 'veg', 'Dessert'):
+            Tag.objects.create(user=self.user, name=name)
+
+    def names(self, url=TAG_AUTOCOMPLETE_URL, **params):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [row['name'] for row in resp.data]
+
+    def test_prefix_matches(self):
+        """
+        Test that names starting with q are suggested, shortest first
+        """
+        self.assertEqual(self.names(q='VEG'), ['veg', 'Vegan', 'Vegetarian'])
+        self.assertEqual(self.names(q='veg', limit=2), ['veg', 'Vegan'])
+        self.assertEqual(self.names(q=''), [])
+
+    @override_settings(RECIPE_AUTOCOMPLETE=NO_CACHE)
+    def test_prefix_matches_without_cache(self):
+        """
+        Test that the database serves the same suggestions
+        """
+        self.assertEqual(self.names(q='VEG'), ['veg', 'Vegan', 'Vegetarian'])
+        self.assertEqual(self.names(q='veg', limit=2), ['veg', 'Vegan'])
+
+    def test_own_names_only(self):
+        """
+        Test that names of other users are not suggested
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        Tag.objects.create(user=other, name='Vegemite')
+
+        self.assertEqual(self.names(q='vege'), ['Vegetarian'])
+
+    def test_cache_sees_writes(self):
+        """
+        Test that created, bulk created and deleted names show up
+        """
+        self.assertEqual(self.names(q='des'), ['Dessert'])
+        tag = Tag.objects.create(user=self.user, name='Desserts')
+        self.assertEqual(self.names(q='des'), ['Dessert', 'Desserts'])
+
+        self.client.post(reverse('recipe:tag-list'), [{'name': 'Desi'}],
+                         format='json')
+        self.assertEqual(self.names(q='des'),
+                         ['Desi', 'Dessert', 'Desserts'])
+
+        tag.delete()
+        self.assertEqual(self.names(q='des'), ['Desi', 'Dessert'])
+
+    def test_ingredients(self):
+        """
+        Test that ingredients are suggested from their own names
+        """
+        Ingredient.objects.create(user=self.user, name='Vegetable stock')
+
+        self.assertEqual(self.names(INGREDIENT_AUTOCOMPLETE_URL, q='veg'),
+                         ['Vegetable stock'])
@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+from recipe.cache import get_response_cache
+
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class TestResponseCache(TestCase):
+    """
+    Test caching of rendered recipe API responses
+    """
+    def setUp(self) -> None:
+        """
+        Setup authenticated user with a recipe
+        """
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Recipe.objects.create(
+            user=self.user, title="Salad", time_minutes=5, price=5)
+        get_response_cache().reset_stats()
+
+    def test_second_request_hits_cache(self):
+        """
+        Test that a repeated list request is served from the cache
+        after reading only the data version
+        """
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_query_params_in_key(self):
+        """
+        Test that different query params are cached separately
+        """
+        self.client.get(RECIPE_URL)
+
+        resp = self.client.get(RECIPE_URL + '?page_size=1')
+
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertIn('results', resp.data)
+
+    @override_settings(ALLOWED_HOSTS=['public.example', 'internal'])
+    def test_host_in_key(self):
+        """
+        Test that the same request through another host or scheme is
+        cached separately, its links point at that host
+        """
+        self.client.get(RECIPE_URL + '?page_size=1',
+                        HTTP_HOST='public.example')
+
+        internal = self.client.get(RECIPE_URL + '?page_size=1',
+                                   HTTP_HOST='internal')
+        secure = self.client.get(RECIPE_URL + '?page_size=1',
+                                 HTTP_HOST='internal', secure=True)
+
+        self.assertEqual(internal['X-Cache'], 'MISS')
+        self.assertEqual(secure['X-Cache'], 'MISS')
+
+    def test_write_invalidates(self):
+        """
+        Test that a write makes the next request miss
+        """
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        resp = self.client.get(TAGS_URL)
+
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(len(resp.data), 1)
+
+    def test_cache_per_user(self):
+        """
+        Test that users never see each other's cached responses
+        """
+        self.client.get(RECIPE_URL)
+        other = get_user_model().objects.create_user(
+            email='other@email.com', password='password', name='Other'
+        )
+        Tag.objects.create(user=other, name="Vegan")
+        self.client.force_authenticate(user=other)
+
+        resp = self.client.get(RECIPE_URL)
+
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(resp.data, [])
+
+    def test_stats_command(self):
+        """
+        Test that hits and misses are counted
+        """
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+        out = StringIO()
+
+        call_command('response_cache_stats', stdout=out)
+
+        self.assertIn('hits=1 misses=1', out.getvalue())
+
+    @override_settings(RECIPE_RESPONSE_CACHE={
+        'ENABLED': False, 'ALIAS': 'default', 'TIMEOUT': 1, 'MAX_BYTES': 1
+    })
+    def test_disabled(self):
+        """
+        Test that the cache can be switched off
+        """
+        self.client.get(RECIPE_URL)
+
+        resp = self.client.get(RECIPE_URL)
+
+        self.assertNotIn('X-Cache', resp)
@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """
+    Returns recipe detail url for given id
+    """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class TestConditionalGet(TestCase):
+    """
+    Test ETag handling of the recipe API
+    """
+    def setUp(self) -> None:
+        """
+        Setup authenticated user with a recipe
+        """
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="Salad", time_minutes=5, price=5)
+
+    def test_not_modified_without_data_queries(self):
+        """
+        Test that a matching If-None-Match returns 304 after
+        reading only the data version
+        """
+        resp = self.client.get(RECIPE_URL)
+        etag = resp['ETag']
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertEqual(resp.content, b'')
+
+    def test_etag_changes_on_write(self):
+        """
+        Test that creating a tag through the API invalidates the ETag
+        """
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        self.client.post(TAGS_URL, {'name': 'Vegan'})
+        resp = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(len(resp.data), 1)
+
+    def test_etag_changes_on_m2m_change(self):
+        """
+        Test that linking an ingredient to a recipe invalidates the ETag
+        """
+        ingredient = Ingredient.objects.create(user=self.user, name="Kale")
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        self.recipe.ingredients.add(ingredient)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['ingredients']), 1)
+
+    def test_etag_changes_on_delete(self):
+        """
+        Test that deleting a recipe invalidates the list ETag
+        """
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.delete(detail_url(self.recipe.id))
+        resp = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, [])
+
+    def test_no_etag_without_data_version(self):
+        """
+        Test that no ETag is sent for users that never wrote any data
+        """
+        other = get_user_model().objects.create_user(
+            email='other@email.com', password='password', name='Other'
+        )
+        self.client.force_authenticate(user=other)
+
+        resp = self.client.get(TAGS_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', resp)
+
+    @override_settings(ALLOWED_HOSTS=['public.example', 'internal'])
+    def test_etag_per_host(self):
+        """
+        Test that a copy fetched through another host is not confirmed,
+        its links point at that host
+        """
+        etag = self.client.get(detail_url(self.recipe.id),
+                               HTTP_HOST='public.example')['ETag']
+
+        resp = self.client.get(detail_url(self.recipe.id),
+                               HTTP_HOST='internal', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_etag_per_user(self):
+        """
+        Test that the ETag of one user does not match another user
+        """
+        etag = self.client.get(TAGS_URL)['ETag']
+        other = get_user_model().objects.create_user(
+            email='other@email.com', password='password', name='Other'
+        )
+        Tag.objects.create(user=other, name="Vegan")
+        self.client.force_authenticate(user=other)
+
+        resp = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
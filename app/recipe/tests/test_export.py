@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class TestRecipeExport(TestCase):
+    """
+    Test streaming export of recipes
+    """
+    def setUp(self) -> None:
+        """
+        Setup authenticated user with a recipe
+        """
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.recipe = self.create_recipe('Salad')
+
+    def create_recipe(self, title):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=5, price=5)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Kale'),
+            Ingredient.objects.create(user=self.user, name='Lemon'),
+        )
+        return recipe
+
+    def test_export_ndjson(self):
+        """
+        Test that recipes are streamed as one JSON object per line
+        """
+        resp = self.client.get(EXPORT_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            'id': self.recipe.id,
+            'title': 'Salad',
+            'time_minutes': 5,
+            'price': '5.00',
+            'link': '',
+            'tags': ['Vegan'],
+            'ingredients': ['Kale', 'Lemon'],
+        }])
+
+    def test_export_csv(self):
+        """
+        Test that recipes can be exported as CSV
+        """
+        resp = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(resp['Content-Type'], 'text/csv')
+        content = b''.join(resp.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Salad')
+        self.assertEqual(rows[0]['ingredients'], 'Kale|Lemon')
+
+    def test_export_queries_per_chunk(self):
+        """
+        Test that the export does not run queries per recipe
+        """
+        with CaptureQueriesContext(connection) as one:
+            b''.join(self.client.get(EXPORT_URL).streaming_content)
+
+        for index in range(10):
+            self.create_recipe(f'Recipe {index}')
+        with CaptureQueriesContext(connection) as many:
+            resp = self.client.get(EXPORT_URL)
+            content = b''.join(resp.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 11)
+        self.assertEqual(len(one), len(many))
+
+    def test_export_only_own_recipes(self):
+        """
+        Test that other users' recipes are not exported
+        """
+        other = get_user_model().objects.create_user(
+            email='other@email.com', password='password', name='Other'
+        )
+        Recipe.objects.create(user=other, title='Soup', time_minutes=5,
+                              price=5)
+
+        resp = self.client.get(EXPORT_URL)
+
+        content = b''.join(resp.streaming_content)
+        self.assertEqual(len(content.splitlines()), 1)
@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def get_sample_recipe(user, **params):
+    """
+    Create and return recipe
+    """
+    defaults = {
+        "title": "Sample Recipe",
+        "time_minutes": 50,
+        "price": 300.0
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeFilterTests(TestCase):
+    """
+    Test filtering the recipe list
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+
+        self.salad = get_sample_recipe(
+            self.user, title='Salad', price=5, time_minutes=10)
+        self.salad.tags.add(self.vegan, self.quick)
+        self.salad.ingredients.add(self.salt)
+        self.curry = get_sample_recipe(
+            self.user, title='Curry', price=15, time_minutes=60)
+        self.curry.tags.add(self.vegan)
+        self.curry.ingredients.add(self.salt, self.rice)
+        self.steak = get_sample_recipe(
+            self.user, title='Steak', price=30, time_minutes=20)
+        self.steak.tags.add(self.quick)
+
+    def titles(self, **params):
+        resp = self.client.get(RECIPE_URL, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return {recipe['title'] for recipe in resp.data}
+
+    def test_filter_tags_any(self):
+        """
+        Test that recipes with any of the tags are returned once
+        """
+        tags = f'{self.vegan.id},{self.quick.id}'
+        resp = self.client.get(RECIPE_URL, {'tags': tags})
+        titles = [recipe['title'] for recipe in resp.data]
+        self.assertEqual(sorted(titles), ['Curry', 'Salad', 'Steak'])
+
+    def test_filter_tags_all(self):
+        """
+        Test that match=all returns recipes having every tag
+        """
+        tags = f'{self.vegan.id},{self.quick.id}'
+        self.assertEqual(self.titles(tags=tags, match='all'), {'Salad'})
+
+    def test_filter_ingredients(self):
+        """
+        Test filtering by ingredients
+        """
+        self.assertEqual(self.titles(ingredients=self.rice.id), {'Curry'})
+        ingredients = f'{self.salt.id},{self.rice.id}'
+        self.assertEqual(self.titles(ingredients=ingredients, match='all'),
+                         {'Curry'})
+
+    def test_filter_price_and_time(self):
+        """
+        Test max_price and max_time bounds are inclusive
+        """
+        self.assertEqual(self.titles(max_price='15'), {'Salad', 'Curry'})
+        self.assertEqual(self.titles(max_time=20), {'Salad', 'Steak'})
+        self.assertEqual(self.titles(max_price='1000000'),
+                         {'Salad', 'Curry', 'Steak'})
+
+    def test_filters_combined(self):
+        """
+        Test that all filters must match
+        """
+        self.assertEqual(
+            self.titles(tags=self.quick.id, ingredients=self.salt.id,
+                        max_time=30),
+            {'Salad'})
+
+    def test_filter_other_users_tag(self):
+        """
+        Test that recipes of other users never match
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        recipe = get_sample_recipe(other)
+        recipe.tags.add(self.vegan)
+
+        self.assertEqual(self.titles(tags=self.vegan.id), {'Salad', 'Curry'})
+
+    def test_filter_paginated(self):
+        """
+        Test that filters apply to every page
+        """
+        resp = self.client.get(RECIPE_URL, {'tags': self.vegan.id,
+                                            'page_size': 1})
+        self.assertEqual(len(resp.data['results']), 1)
+        resp = self.client.get(resp.data['next'])
+
+        self.assertEqual([recipe['title'] for recipe in resp.data['results']],
+                         ['Salad'])
+        self.assertIsNone(resp.data['next'])
+
+    def test_invalid_filters(self):
+        """
+        Test that invalid parameters are rejected
+        """
+        for params in ({'tags': 'a,b'}, {'max_price': 'cheap'},
+                       {'max_price': 'NaN'}, {'max_time': '1.5'},
+                       {'match': 'some'}, {'tags': str(2 ** 64)}):
+            resp = self.client.get(RECIPE_URL, params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST,
+                             params)
@@ -0,0 +1,213 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.storage import is_content_addressed
+from recipe.images import variant_names
+
+
+def image_upload_url(recipe_id):
+    """
+    Returns recipe upload image url for given id
+    """
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def get_sample_recipe(user, **params):
+    """
+    Return sample recipe
+    """
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def image_bytes(color):
+    """
+    Return a small JPEG of a single color
+    """
+    with tempfile.TemporaryFile() as image_file:
+        Image.new("RGB", (10, 10), color).save(image_file, format='JPEG')
+        image_file.seek(0)
+        return image_file.read()
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0, RECIPE_IMAGE_RELEASE_GRACE=0)
+class TestContentAddressedImages(TestCase):
+    """
+    Test deduplicated recipe image storage
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        self.storage = Recipe._meta.get_field('image').storage
+        self.names = set()
+
+    def tearDown(self) -> None:
+        """
+        Remove test files
+        """
+        for name in self.names:
+            for variant in variant_names(name).values():
+                self.storage.delete(variant)
+            self.storage.delete(name)
+
+    def upload(self, recipe, content):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(content)
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(image_upload_url(recipe.id),
+                                        data={'image': ntf},
+                                        format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.names.add(recipe.image.name)
+        return recipe.image.name
+
+    def test_variants_scheduled_for_new_file_only(self):
+        """
+        Test that variants are scheduled for an uploaded file, not for
+        requests that send none
+        """
+        recipe = get_sample_recipe(self.user)
+        with patch('recipe.views.schedule_variants') as schedule:
+            self.upload(recipe, image_bytes('blue'))
+            self.assertEqual(schedule.call_count, 1)
+
+            self.client.get(image_upload_url(recipe.id))
+            resp = self.client.post(image_upload_url(recipe.id), {},
+                                    format='multipart')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(schedule.call_count, 1)
+
+    def test_variants_generated_by_worker_process(self):
+        """
+        Test that the worker pool generates the variants of an upload
+        """
+        recipe = get_sample_recipe(self.user)
+        with override_settings(RECIPE_IMAGE_WORKERS=1), \
+                patch('recipe.images._log_failure') as log_failure:
+            name = self.upload(recipe, image_bytes('orange'))
+            # called with the future once the worker is done
+            for _ in range(600):
+                if log_failure.called:
+                    break
+                time.sleep(0.1)
+            self.assertTrue(log_failure.called)
+            future = log_failure.call_args[0][0]
+
+        self.assertIsNone(future.exception())
+        for variant in variant_names(name).values():
+            self.assertTrue(self.storage.exists(variant))
+
+    def test_identical_uploads_stored_once(self):
+        """
+        Test that the same image uploaded twice is stored once
+        """
+        content = image_bytes('red')
+        first = self.upload(get_sample_recipe(self.user), content)
+        second = self.upload(get_sample_recipe(self.user), content)
+
+        self.assertEqual(first, second)
+        self.assertTrue(is_content_addressed(first))
+        with self.storage.open(first) as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_delete_releases_unreferenced_image(self):
+        """
+        Test that image files are deleted with their last reference
+        """
+        content = image_bytes('blue')
+        recipe1 = get_sample_recipe(self.user)
+        recipe2 = get_sample_recipe(self.user)
+        name = self.upload(recipe1, content)
+        self.upload(recipe2, content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe1.delete()
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe2.delete()
+        self.assertFalse(self.storage.exists(name))
+        for variant in variant_names(name).values():
+            self.assertFalse(self.storage.exists(variant))
+
+    def test_replace_releases_previous_image(self):
+        """
+        Test that replacing an image deletes the previous file
+        """
+        recipe = get_sample_recipe(self.user)
+        old_name = self.upload(recipe, image_bytes('green'))
+        new_name = self.upload(recipe, image_bytes('white'))
+
+        self.assertNotEqual(old_name, new_name)
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertTrue(self.storage.exists(new_name))
+
+    def test_release_within_grace_rechecked(self):
+        """
+        Test that a file replaced within the grace is kept, then deleted
+        when checked again after it
+        """
+        recipe = get_sample_recipe(self.user)
+        old_name = self.upload(recipe, image_bytes('yellow'))
+
+        with override_settings(RECIPE_IMAGE_RELEASE_GRACE=60), \
+                patch('recipe.images.threading.Timer') as timer:
+            self.upload(recipe, image_bytes('purple'))
+            self.assertTrue(self.storage.exists(old_name))
+            (wait, recheck), kwargs = timer.call_args
+            self.assertTrue(0 < wait <= 60)
+            self.assertTrue(timer.return_value.start.called)
+
+            old = os.path.getmtime(self.storage.path(old_name)) - 60
+            os.utime(self.storage.path(old_name), (old, old))
+            with patch('recipe.images.connections'):
+                recheck(*kwargs['args'])
+
+        self.assertFalse(self.storage.exists(old_name))
+
+    def test_migrate_command(self):
+        """
+        Test that legacy images are moved to their digest name
+        """
+        content = image_bytes('black')
+        legacy = self.storage.save('uploads/recipe/legacy.jpg',
+                                   ContentFile(content))
+        self.names.add(legacy)
+        recipe = get_sample_recipe(self.user, image=legacy)
+
+        with open(os.devnull, 'w') as devnull:
+            call_command('migrate_recipe_images', stdout=devnull)
+
+        recipe.refresh_from_db()
+        self.names.add(recipe.image.name)
+        self.assertTrue(is_content_addressed(recipe.image.name))
+        self.assertFalse(self.storage.exists(legacy))
+        with self.storage.open(recipe.image.name) as stored:
+            self.assertEqual(stored.read(), content)
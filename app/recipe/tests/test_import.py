@@ -0,0 +1,155 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.importer import RecipeImporter
+
+
+IMPORT_URL = reverse('recipe:recipe-import')
+
+
+def ndjson(*items):
+    """
+    Return newline-delimited JSON bytes for items
+    """
+    return b'\n'.join(
+        item if isinstance(item, bytes) else json.dumps(item).encode()
+        for item in items
+    )
+
+
+def sample_line(**params):
+    defaults = {
+        'title': 'Salad',
+        'time_minutes': 5,
+        'price': '5.00',
+        'tags': ['Vegan'],
+        'ingredients': ['Kale', 'Lemon'],
+    }
+    defaults.update(params)
+    return defaults
+
+
+class TestRecipeImport(TestCase):
+    """
+    Test NDJSON recipe import
+    """
+    def setUp(self) -> None:
+        """
+        Setup authenticated user
+        """
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_import_recipes(self):
+        """
+        Test importing recipes resolving tags and ingredients by name
+        """
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        body = ndjson(
+            sample_line(),
+            sample_line(title='Soup', tags=['Vegan', 'Warm'],
+                        ingredients=['Kale']),
+        )
+
+        resp = self.client.post(IMPORT_URL, body,
+                                content_type='application/x-ndjson')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(resp.data['failed'], 0)
+        soup = Recipe.objects.get(user=self.user, title='Soup')
+        self.assertIn(existing, soup.tags.all())
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Vegan').count(), 1)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+
+    def test_errors_reported_per_line(self):
+        """
+        Test that invalid lines are reported and valid ones imported
+        """
+        body = ndjson(
+            sample_line(),
+            b'{not json',
+            sample_line(price='not a price'),
+            b'',
+            sample_line(title='Soup'),
+        )
+
+        resp = self.client.post(IMPORT_URL, body,
+                                content_type='application/x-ndjson')
+
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(resp.data['failed'], 2)
+        self.assertEqual([error['line'] for error in resp.data['errors']],
+                         [2, 3])
+        self.assertIn('price', resp.data['errors'][1]['errors'])
+
+    def test_rejected_chunk_reported_per_line(self):
+        """
+        Test that a chunk the database rejects is written line by line,
+        reporting only the lines at fault
+        """
+        write = RecipeImporter.write
+
+        def fail_on_bad(importer, items):
+            if any(item['title'] == 'Bad' for item in items):
+                raise IntegrityError('rejected')
+            return write(importer, items)
+
+        body = ndjson(sample_line(), sample_line(title='Bad'),
+                      sample_line(title='Soup'))
+        with patch.object(RecipeImporter, 'write', fail_on_bad):
+            resp = self.client.post(IMPORT_URL, body,
+                                    content_type='application/x-ndjson')
+
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(resp.data['failed'], 1)
+        self.assertEqual(resp.data['errors'][0]['line'], 2)
+        self.assertEqual(
+            sorted(Recipe.objects.filter(user=self.user)
+                   .values_list('title', flat=True)), ['Salad', 'Soup'])
+
+    def test_body_without_length_rejected(self):
+        """
+        Test that a body sent without Content-Length, which Django does
+        not read, is answered 411 instead of an empty import
+        """
+        resp = self.client.post(IMPORT_URL, ndjson(sample_line()),
+                                content_type='application/x-ndjson',
+                                CONTENT_LENGTH='',
+                                HTTP_TRANSFER_ENCODING='chunked')
+
+        self.assertEqual(resp.status_code,
+                         status.HTTP_411_LENGTH_REQUIRED)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_chunks_use_fixed_queries(self):
+        """
+        Test that queries grow with the number of chunks, not lines
+        """
+        lines = [json.dumps(sample_line(title=f'R{index}')).encode()
+                 for index in range(20)]
+        RecipeImporter(self.user, chunk_size=20).run(lines[:1])
+
+        with CaptureQueriesContext(connection) as one:
+            RecipeImporter(self.user, chunk_size=20).run(lines[:1])
+        with CaptureQueriesContext(connection) as many:
+            summary = RecipeImporter(self.user, chunk_size=20).run(lines)
+
+        self.assertEqual(summary['created'], 20)
+        self.assertEqual(len(one), len(many))
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 22)
@@ -96,3 +96,20 @@ class TestIngredientApiPrivate(TestCase):
         resp = self.client.post(INGREDIENT_URL, data)
 
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_ingredients(self):
+        """
+        Test creating ingredients from a JSON array, skipping names
+        the user already has
+        """
+        Ingredient.objects.create(user=self.user, name='Potato')
+        data = [{'name': 'Potato'}, {'name': 'Tomato'}]
+
+        resp = self.client.post(INGREDIENT_URL, data, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(resp.data[0]['name'], 'Tomato')
+        names = Ingredient.objects.filter(user=self.user)\
+            .values_list('name', flat=True)
+        self.assertCountEqual(names, ['Potato', 'Tomato'])
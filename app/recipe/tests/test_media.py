@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.images import variant_name
+
+CONTENT = bytes(range(256)) * 4
+
+
+def media_url(name):
+    """
+    Returns media url of a stored file name
+    """
+    return f'/media/{name}'
+
+
+class MediaViewTests(TestCase):
+    """
+    Test serving recipe images
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        self.storage = Recipe._meta.get_field('image').storage
+        self.name = self.storage.save('uploads/recipe/media-test.jpg',
+                                      ContentFile(CONTENT))
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Sample recipe', time_minutes=10,
+            price=5.00, image=self.name)
+
+    def tearDown(self) -> None:
+        self.storage.delete(self.name)
+
+    def test_owner_gets_file(self):
+        """
+        Test that the owner gets the image with immutable cache headers
+        """
+        resp = self.client.get(media_url(self.name))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(resp.streaming_content), CONTENT)
+        self.assertEqual(resp['Content-Type'], 'image/jpeg')
+        self.assertEqual(resp['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertIn('private', resp['Cache-Control'])
+
+    def test_other_user_not_found(self):
+        """
+        Test that images of other users are not served
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        self.client.force_authenticate(other)
+        resp = self.client.get(media_url(self.name))
+
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthenticated(self):
+        """
+        Test that authentication is required
+        """
+        resp = APIClient().get(media_url(self.name))
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_path_traversal_not_found(self):
+        """
+        Test that names outside the media root are not served
+        """
+        resp = self.client.get(media_url('../settings.py'))
+
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_variant_of_own_image(self):
+        """
+        Test that variants are served with their original
+        """
+        name = self.storage.save(variant_name(self.name, 'thumb'),
+                                 ContentFile(b'thumb'))
+        self.addCleanup(self.storage.delete, name)
+        resp = self.client.get(media_url(name))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(resp.streaming_content), b'thumb')
+
+    def test_range_request(self):
+        """
+        Test that a byte range is answered with partial content
+        """
+        resp = self.client.get(media_url(self.name), HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(resp.streaming_content), CONTENT[10:20])
+        self.assertEqual(resp['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_suffix_range_request(self):
+        """
+        Test that a suffix range returns the final bytes
+        """
+        resp = self.client.get(media_url(self.name), HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(resp.streaming_content), CONTENT[-5:])
+
+    def test_unsatisfiable_range(self):
+        """
+        Test that ranges past the end are rejected
+        """
+        resp = self.client.get(media_url(self.name),
+                               HTTP_RANGE=f'bytes={len(CONTENT)}-')
+
+        self.assertEqual(resp.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(resp['Content-Range'], f'bytes */{len(CONTENT)}')
+        self.assertNotIn('immutable', resp.get('Cache-Control', ''))
+        self.assertFalse(resp.has_header('ETag'))
+
+    def test_not_modified(self):
+        """
+        Test that a matching ETag is answered with 304
+        """
+        etag = self.client.get(media_url(self.name))['ETag']
+        resp = self.client.get(media_url(self.name), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertIn('immutable', resp['Cache-Control'])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='x-accel-redirect')
+    def test_accel_redirect(self):
+        """
+        Test that the transfer is handed off to nginx
+        """
+        resp = self.client.get(media_url(self.name))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['X-Accel-Redirect'],
+                         f'/protected-media/{self.name}')
+        self.assertEqual(resp.content, b'')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='x-sendfile')
+    def test_sendfile(self):
+        """
+        Test that the transfer is handed off with X-Sendfile
+        """
+        resp = self.client.get(media_url(self.name))
+
+        self.assertEqual(resp['X-Sendfile'], self.storage.path(self.name))
@@ -0,0 +1,132 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class TestKeysetPagination(TestCase):
+    """
+    Test cursor pagination of the recipe API lists
+    """
+    def setUp(self) -> None:
+        """
+        Setup authenticated user
+        """
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url):
+        """
+        Follow next links from url and return the pages of results
+        """
+        pages = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            pages.append(resp.data['results'])
+            url = resp.data['next']
+        return pages
+
+    def test_unpaginated_without_params(self):
+        """
+        Test that lists stay unpaginated unless the client opts in
+        """
+        Tag.objects.create(user=self.user, name="Italian")
+
+        resp = self.client.get(TAGS_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(resp.data, list)
+
+    def test_tags_walk_forward(self):
+        """
+        Test that following next links returns every tag once,
+        ordered by name descending with duplicates broken by id
+        """
+        for name in ["b", "a", "c", "b", "a"]:
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self.walk(TAGS_URL + '?page_size=2')
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [tag['id'] for page in pages for tag in page]
+        expected = Tag.objects.order_by('-name', 'id')\
+            .values_list('id', flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_recipes_previous_link(self):
+        """
+        Test that previous link returns the page before
+        """
+        for index in range(5):
+            Recipe.objects.create(user=self.user, title=f"R{index}",
+                                  time_minutes=5, price=1)
+
+        first = self.client.get(RECIPE_URL + '?page_size=2')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+
+    def test_no_offset_or_count(self):
+        """
+        Test that deep pages are fetched without OFFSET or COUNT
+        """
+        for index in range(5):
+            Recipe.objects.create(user=self.user, title=f"R{index}",
+                                  time_minutes=5, price=1)
+        first = self.client.get(RECIPE_URL + '?page_size=2')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'].upper())
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_invalid_cursor(self):
+        """
+        Test that a tampered cursor returns 404
+        """
+        resp = self.client.get(RECIPE_URL + '?cursor=not-a-cursor')
+
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_wrong_type(self):
+        """
+        Test that a cursor whose values do not fit the ordering fields
+        returns 404
+        """
+        cases = [
+            (RECIPE_URL, ['x']),
+            (RECIPE_URL, [{}]),
+            (RECIPE_URL, [None]),
+            (TAGS_URL, ['a', 'x']),
+            (TAGS_URL, [['a'], 1]),
+        ]
+        for url, position in cases:
+            payload = json.dumps({'p': position, 'r': 0}).encode()
+            cursor = base64.urlsafe_b64encode(payload).decode()
+            with self.subTest(url=url, position=position):
+                resp = self.client.get(url, {'cursor': cursor})
+
+                self.assertEqual(resp.status_code,
+                                 status.HTTP_404_NOT_FOUND)
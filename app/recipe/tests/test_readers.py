@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """
+    Returns recipe detail url for given id
+    """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(RECIPE_RESPONSE_CACHE={
+    **settings.RECIPE_RESPONSE_CACHE, 'ENABLED': False})
+class RecipeValuesReadTests(TestCase):
+    """
+    Test that the values() read path renders the serializers' output
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Dessert', 'Quick')]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name)
+                       for name in ('Salt', 'Sugar', 'Flour', 'Eggs')]
+        prices = (Decimal('5.50'), Decimal('10'), Decimal('0.99'),
+                  Decimal('999.00'))
+        self.recipes = []
+        for index, price in enumerate(prices):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe "{index}" ünïcode',
+                time_minutes=index * 7, price=price,
+                link='' if index % 2 else 'https://example.com/r')
+            recipe.tags.add(*tags[index % 3:])
+            recipe.ingredients.add(*reversed(ingredients[:index + 1]))
+            self.recipes.append(recipe)
+        self.recipes[0].image = 'uploads/recipe/sample.jpg'
+        self.recipes[0].save()
+
+    def assertSameBody(self, url, **params):
+        with self.settings(RECIPE_FAST_READS=False):
+            expected = self.client.get(url, params)
+        resp = self.client.get(url, params)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.content, expected.content)
+
+    def test_list_matches_serializer(self):
+        """
+        Test that the list is rendered byte for byte the same
+        """
+        self.assertSameBody(RECIPE_URL)
+
+    def test_paginated_list_matches_serializer(self):
+        """
+        Test that pages are rendered byte for byte the same
+        """
+        self.assertSameBody(RECIPE_URL, page_size=2)
+        cursor = self.client.get(RECIPE_URL, {'page_size': 2}).data['next']
+        self.assertSameBody(cursor)
+
+    def test_detail_matches_serializer(self):
+        """
+        Test that details, with and without image, are the same
+        """
+        for recipe in self.recipes[:2]:
+            self.assertSameBody(detail_url(recipe.id))
+
+    def test_detail_not_found(self):
+        """
+        Test that recipes of other users are not found
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        recipe = Recipe.objects.create(
+            user=other, title='Other', time_minutes=1, price=1)
+        resp = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
@@ -4,13 +4,16 @@ import os
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from recipe.images import variant_names
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 
@@ -144,6 +147,46 @@ class TestRecipeApiPrivate(TestCase):
         serializer = RecipeDetailSerializer(recipe)
         self.assertEqual(resp.data, serializer.data)
 
+    def test_recipe_list_query_count_constant(self):
+        """
+        Test that listing recipes does not run queries per recipe
+        """
+        def add_recipe(index):
+            recipe = get_sample_recipe(user=self.user, title=f"R{index}")
+            recipe.tags.add(get_sample_tag(self.user, name=f"T{index}"))
+            recipe.ingredients.add(
+                get_sample_ingredient(self.user, name=f"I{index}"))
+
+        add_recipe(0)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(RECIPE_URL)
+
+        for index in range(1, 10):
+            add_recipe(index)
+        with CaptureQueriesContext(connection) as many:
+            resp = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(resp.data), 10)
+        self.assertEqual(len(one), len(many))
+
+    def test_recipe_detail_prefetches_nested(self):
+        """
+        Test that recipe detail loads nested tags and ingredients
+        with one query each
+        """
+        recipe = get_sample_recipe(user=self.user)
+        for index in range(5):
+            recipe.tags.add(get_sample_tag(self.user, name=f"T{index}"))
+            recipe.ingredients.add(
+                get_sample_ingredient(self.user, name=f"I{index}"))
+
+        # data version, recipe, tags, ingredients
+        with self.assertNumQueries(4):
+            resp = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(resp.data['tags']), 5)
+        self.assertEqual(len(resp.data['ingredients']), 5)
+
     def test_create_recipe_without_tags_and_ingredients(self):
         """
         Test basic recipe
@@ -202,6 +245,58 @@ class TestRecipeApiPrivate(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_ingredients_resolved_in_one_query(self):
+        """
+        Test that submitted ingredient ids are looked up together
+        """
+        ingredients = [get_sample_ingredient(user=self.user, name=f"i{n}")
+                       for n in range(40)]
+        data = {
+            'title': 'Stew',
+            'time_minutes': 90,
+            'price': 12.0,
+            'tags': [],
+            'ingredients': [ingredient.id for ingredient in ingredients]
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(RECIPE_URL, data, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        # lookups by id, not the joins reading the recipe's ingredients
+        table = Ingredient._meta.db_table
+        lookups = [query for query in queries.captured_queries
+                   if f'FROM "{table}" WHERE' in query['sql']]
+        self.assertEqual(len(lookups), 1)
+        recipe = Recipe.objects.get(id=resp.data['id'])
+        self.assertEqual(recipe.ingredients.count(), 40)
+
+    def test_create_recipe_rejects_foreign_and_missing_ids(self):
+        """
+        Test that ids of other users and unknown ids are reported together
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        own = get_sample_tag(user=self.user, name="Own")
+        foreign = get_sample_tag(user=other, name="Foreign")
+        data = {
+            'title': 'Spaghetti',
+            'time_minutes': 30,
+            'price': 5.0,
+            'ingredients': [],
+            'tags': [own.id, foreign.id, 999999]
+        }
+
+        resp = self.client.post(RECIPE_URL, data, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(resp.data['tags']), 1)
+        self.assertIn(str(foreign.id), resp.data['tags'][0])
+        self.assertIn('999999', resp.data['tags'][0])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
     def test_partial_update_recipe(self):
         """
         Test updating recipe with patch,
@@ -270,6 +365,11 @@ class TestRecipeImageUpload(TestCase):
         """
         Remove test files
         """
+        self.recipe.refresh_from_db()
+        if self.recipe.image:
+            storage = self.recipe.image.storage
+            for name in variant_names(self.recipe.image.name).values():
+                storage.delete(name)
         self.recipe.image.delete()
 
     def test_upload_image_to_recipe(self):
@@ -300,3 +400,32 @@ class TestRecipeImageUpload(TestCase):
                                 format='multipart')
 
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_IMAGE_WORKERS=0)
+    def test_upload_generates_variants(self):
+        """
+        Test that resized variants without EXIF are generated
+        after the upload commits
+        """
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            img = Image.new("RGB", (2000, 1000))
+            exif = Image.Exif()
+            exif[0x010f] = "Camera maker"
+            img.save(ntf, format='JPEG', exif=exif.tobytes())
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(url, data={'image': ntf},
+                                        format='multipart')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(resp.data['image_variants']),
+                         {'thumb', 'medium', 'large'})
+        self.recipe.refresh_from_db()
+        storage = self.recipe.image.storage
+        names = variant_names(self.recipe.image.name)
+        with Image.open(storage.path(names['thumb'])) as thumb:
+            self.assertEqual(thumb.size, (150, 75))
+            self.assertNotIn('exif', thumb.info)
+        with Image.open(storage.path(names['large'])) as large:
+            self.assertEqual(large.size, (1200, 600))
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def get_sample_recipe(user, **params):
+    """
+    Create and return recipe
+    """
+    defaults = {
+        "title": "Sample Recipe",
+        "time_minutes": 50,
+        "price": 300.0
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchTests(TestCase):
+    """
+    Test searching recipes, with the fallback used off PostgreSQL
+    """
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="password",
+            name="Test"
+        )
+        self.client.force_authenticate(self.user)
+        curry = Tag.objects.create(user=self.user, name='Curry')
+        rice = Ingredient.objects.create(user=self.user, name='Basmati rice')
+
+        self.curry = get_sample_recipe(self.user, title='Green curry')
+        self.biryani = get_sample_recipe(self.user, title='Biryani',
+                                         price=10)
+        self.biryani.tags.add(curry)
+        self.biryani.ingredients.add(rice)
+        self.pilaf = get_sample_recipe(self.user, title='Pilaf')
+        self.pilaf.ingredients.add(rice)
+
+    def search(self, text, **params):
+        resp = self.client.get(RECIPE_URL, {'search': text, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in resp.data]
+
+    def test_search_title_ranked_first(self):
+        """
+        Test that title matches rank above tag matches
+        """
+        self.assertEqual(self.search('curry'), ['Green curry', 'Biryani'])
+
+    def test_search_ingredient_names(self):
+        """
+        Test that ingredient names are searched
+        """
+        self.assertEqual(self.search('basmati'), ['Pilaf', 'Biryani'])
+
+    def test_search_all_words(self):
+        """
+        Test that every word must match
+        """
+        self.assertEqual(self.search('rice curry'), ['Biryani'])
+        self.assertEqual(self.search('rice salad'), [])
+
+    def test_search_limit(self):
+        """
+        Test that page_size limits the matches, unpaginated
+        """
+        self.assertEqual(self.search('rice', page_size=1), ['Pilaf'])
+
+    def test_search_with_filters(self):
+        """
+        Test that search combines with filters
+        """
+        self.assertEqual(self.search('rice', max_price=20), ['Biryani'])
+
+    def test_search_own_recipes_only(self):
+        """
+        Test that other users' recipes are not found
+        """
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="password",
+        )
+        get_sample_recipe(other, title='Red curry')
+
+        self.assertEqual(self.search('curry'), ['Green curry', 'Biryani'])
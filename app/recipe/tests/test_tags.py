@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -94,3 +96,45 @@ class TestTagApiPrivate(TestCase):
         resp = self.client.post(TAGS_URL, data)
 
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_tags(self):
+        """
+        Test creating tags from a JSON array, skipping existing names
+        """
+        Tag.objects.create(user=self.user, name='Italian')
+        data = [{'name': 'Italian'}, {'name': 'Vegan'}, {'name': 'Spicy'},
+                {'name': 'Vegan'}]
+
+        resp = self.client.post(TAGS_URL, data, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tag['name'] for tag in resp.data],
+                         ['Vegan', 'Spicy'])
+        self.assertTrue(all(tag['id'] for tag in resp.data))
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_create_tags_single_insert(self):
+        """
+        Test that bulk creation does not scale queries with the payload
+        """
+        Tag.objects.create(user=self.user, name='Italian')
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(TAGS_URL, [{'name': 'single'}], format='json')
+
+        data = [{'name': f'tag {index}'} for index in range(50)]
+        with CaptureQueriesContext(connection) as many:
+            resp = self.client.post(TAGS_URL, data, format='json')
+
+        self.assertEqual(len(resp.data), 50)
+        self.assertEqual(len(one), len(many))
+
+    def test_bulk_create_tags_invalid(self):
+        """
+        Test that one invalid item rejects the whole array
+        """
+        data = [{'name': 'Vegan'}, {'name': ''}]
+
+        resp = self.client.post(TAGS_URL, data, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.filter(user=self.user).exists())
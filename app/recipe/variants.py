@@ -0,0 +1,26 @@
+"""
+Image variant generation run by the worker processes of
+recipe.images. The workers are spawned without Django set up, so this
+module imports Pillow and the standard library only
+"""
+import os
+
+from PIL import Image, ImageOps
+
+
+def generate_variants(source, targets, fmt, quality):
+    """
+    Write resized copies of the image at source, targets maps each path
+    to its maximum width and height.
+    Images are re-encoded without their metadata, which strips EXIF
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if fmt == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        for path, size in targets.items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            temp_path = f'{path}.tmp'
+            variant.save(temp_path, fmt, quality=quality)
+            os.replace(temp_path, path)
@@ -1,30 +1,83 @@
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import Tag, Ingredient, Recipe
-
+from user.authentication import CachedTokenAuthentication
+
+from recipe.autocomplete import autocomplete_limit, suggest
+from recipe.bulk import create_missing
+from recipe.exporter import iter_recipes, iter_ndjson, iter_csv
+from recipe.filters import RecipeFilterBackend
+from recipe.images import schedule_variants
+from recipe.importer import RecipeImporter
+from recipe.mixins import ConditionalGetMixin, CachedResponseMixin, \
+    ProfiledViewMixin, RecipeValuesReadMixin
+from recipe.pagination import NameKeysetPagination, RecipeKeysetPagination
+from recipe.prefetch import plan_queryset
+from recipe.renderers import NDJSONRenderer, CSVRenderer
+from recipe.search import RecipeSearchBackend, is_search, search_limit
 from recipe.serializers import TagSerializer, IngredientSerializer,\
     RecipeSerializer, RecipeDetailSerializer, RecipeImageSerializer
 
 
-class BaseViewSet(viewsets.GenericViewSet, mixins.ListModelMixin,
+class BaseViewSet(ProfiledViewMixin, ConditionalGetMixin,
+                  CachedResponseMixin, viewsets.GenericViewSet,
+                  mixins.ListModelMixin,
                   mixins.CreateModelMixin):
     """
     Base view set that can be used to create and
     list objects based on serializer and queryset
     """
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameKeysetPagination
+    # safe requests read from a replica, see core.middleware
+    replica_reads = True
+    # Largest JSON array accepted by a bulk create
+    max_bulk_size = 1000
 
     # Add queryset and serializer here for the given model
     def get_queryset(self):
         """
         Return objects for the current authenticated user
         """
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.queryset.filter(user=self.request.user)\
+            .order_by('-name', 'id')
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create one object, or many when the body is a JSON array
+        """
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_create(self, request):
+        """
+        Create all objects of the array in one insert, skipping names
+        the user already has, and return the created ones
+        """
+        if len(request.data) > self.max_bulk_size:
+            raise ValidationError(
+                _('Ensure this list has at most %(max)d items.')
+                % {'max': self.max_bulk_size})
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        names = [item['name'] for item in serializer.validated_data]
+        created, _skipped = create_missing(
+            self.queryset.model, request.user, names)
+
+        return Response(
+            self.get_serializer(created, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
 
     def perform_create(self, serializer):
         """
@@ -32,6 +85,21 @@ class BaseViewSet(viewsets.GenericViewSet, mixins.ListModelMixin,
         """
         serializer.save(user=self.request.user)
 
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """
+        Suggest the user's names starting with, or similar to, ?q=
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response([])
+        data_version = self.get_data_version()
+        version = (data_version.version, data_version.modified) \
+            if data_version is not None else ()
+        return Response(suggest(
+            self.queryset.model, request.user, text,
+            autocomplete_limit(request), version))
+
 
 class TagViewSet(BaseViewSet):
     """
@@ -49,20 +117,42 @@ class IngredientViewSet(BaseViewSet):
     serializer_class = IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ProfiledViewMixin, ConditionalGetMixin,
+                    CachedResponseMixin, RecipeValuesReadMixin,
+                    viewsets.ModelViewSet):
     """
     Manage recipes in db
     """
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeKeysetPagination
+    replica_reads = True
+    filter_backends = (RecipeFilterBackend, RecipeSearchBackend)
 
     def get_queryset(self):
         """
-        Retrieve the recipes for the authenticated user
+        Retrieve the recipes for the authenticated user, with the
+        relations needed by the action's serializer loaded up front
+        """
+        queryset = self.queryset.filter(user=self.request.user)\
+            .defer('search_vector').order_by('-id')
+        return plan_queryset(queryset, self.get_serializer_class())
+
+    def paginate_queryset(self, queryset):
+        """
+        Searches return the best matches in rank order, limited by
+        page_size, instead of keyset pages
         """
-        return self.queryset.filter(user=self.request.user)
+        if is_search(self.request):
+            return list(queryset[:search_limit(self.request)])
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        if is_search(self.request):
+            return Response(data)
+        return super().get_paginated_response(data)
 
     def get_serializer_class(self):
         """
@@ -95,6 +185,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
+            # only a new file needs variants, they are generated once
+            # the save commits
+            if serializer.validated_data.get('image'):
+                schedule_variants(recipe.image)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -104,3 +198,44 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=["POST"], detail=False, url_path='import',
+            url_name='import')
+    def import_recipes(self, request):
+        """
+        Endpoint to import recipes from a newline-delimited JSON body,
+        one recipe per line with tags and ingredients given by name.
+        The body is streamed, never loaded whole
+        """
+        stream = request.stream
+        if stream is None:
+            # Django reads no body without a Content-Length
+            if not request.META.get('CONTENT_LENGTH'):
+                return Response(
+                    {'detail': _('A Content-Length header is required.')},
+                    status=status.HTTP_411_LENGTH_REQUIRED)
+            return Response({'detail': _('The request body is empty.')},
+                            status=status.HTTP_400_BAD_REQUEST)
+        lines = iter(stream.readline, b'')
+        summary = RecipeImporter(request.user).run(lines)
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(methods=["GET"], detail=False, url_path='export',
+            url_name='export', renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export_recipes(self, request):
+        """
+        Endpoint to stream all recipes of the user as NDJSON (default)
+        or CSV, chosen with the Accept header or ?format=csv
+        """
+        recipes = iter_recipes(request.user)
+        if request.accepted_renderer.format == CSVRenderer.format:
+            content, extension = iter_csv(recipes), 'csv'
+        else:
+            content, extension = iter_ndjson(recipes), 'ndjson'
+
+        response = StreamingHttpResponse(
+            content, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{extension}"'
+        return response
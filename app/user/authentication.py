@@ -0,0 +1,214 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# Cached fields, what authentication and the views read: neither the
+# password hash nor the raw token key reach the cache
+USER_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff',
+               'is_superuser')
+TOKEN_FIELDS = ('user_id', 'created')
+# Left in place of invalidated entries for INVALIDATED_TTL seconds, so
+# a request that read the token before the invalidation cannot cache
+# what it read
+INVALIDATED = 'invalidated'
+INVALIDATED_TTL = 30
+
+
+class LocalTokenCache:
+    """
+    In-process LRU of token -> (user, token) snapshots with a TTL.
+    Invalidation signals only reach the current process, other workers
+    see a change once their entry expires, so the TTL must stay short
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value):
+        """
+        Set key unless it holds an entry that has not expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return False
+            self._set(key, value)
+            return True
+
+    def _set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedTokenCache:
+    """
+    Token cache stored in a Django cache backend shared by all workers,
+    so invalidations are seen everywhere at once
+    """
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, self.ttl if ttl is None else ttl)
+
+    def add(self, key, value):
+        return self.cache.add(key, value, self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """
+    Return the token cache configured by settings.TOKEN_AUTH_CACHE
+    """
+    global _token_cache
+    if _token_cache is None:
+        config = settings.TOKEN_AUTH_CACHE
+        if config.get('BACKEND'):
+            _token_cache = SharedTokenCache(config['BACKEND'], config['TTL'])
+        else:
+            _token_cache = LocalTokenCache(config['MAX_SIZE'],
+                                           config['LOCAL_TTL'])
+    return _token_cache
+
+
+@receiver(setting_changed)
+def reset_token_cache(setting, **kwargs):
+    """
+    Rebuild the cache when settings are overridden in tests
+    """
+    global _token_cache
+    if setting == 'TOKEN_AUTH_CACHE':
+        _token_cache = None
+
+
+def cache_key(key):
+    """
+    Cache key for a token, hashed so raw tokens never reach the cache
+    """
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """
+    Drop the cached user of a token
+    """
+    get_token_cache().set(cache_key(key), INVALIDATED, INVALIDATED_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in TokenAuthentication that caches the token -> user lookup,
+    entries are dropped by user.signals when the token is deleted or
+    the user changes
+    """
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        cached = token_cache.get(cache_key(key))
+        if cached is not None and cached != INVALIDATED:
+            user, token = _restore(key, *cached)
+        else:
+            user, token = super().authenticate_credentials(key)
+            # add, not set: an invalidation since the read above has
+            # left its marker, the snapshot would be stale
+            token_cache.add(cache_key(key), (
+                _snapshot(user, USER_FIELDS), _snapshot(token, TOKEN_FIELDS)
+            ))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        return user, token
+
+
+def _cached_fields(model, names):
+    """
+    Return the attribute names of the fields of model among names, in
+    the order from_db() expects
+    """
+    return [field.attname for field in model._meta.concrete_fields
+            if field.attname in names]
+
+
+def _snapshot(instance, names):
+    """
+    Return the values of the fields names of instance
+    """
+    return tuple(getattr(instance, name)
+                 for name in _cached_fields(type(instance), names))
+
+
+def _restore(key, user_values, token_values):
+    """
+    Build fresh user and token instances from cached values, so that
+    requests never share a mutable instance. Fields left out of the
+    cache are loaded on access
+    """
+    user_model = get_user_model()
+    user = user_model.from_db(
+        DEFAULT_DB_ALIAS, _cached_fields(user_model, USER_FIELDS),
+        user_values)
+    token_fields = _cached_fields(Token, ('key',) + TOKEN_FIELDS)
+    token_values = dict(
+        zip(_cached_fields(Token, TOKEN_FIELDS), token_values), key=key)
+    token = Token.from_db(DEFAULT_DB_ALIAS, token_fields,
+                          [token_values[name] for name in token_fields])
+    token.user = user
+    return user, token
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """
+    Stop accepting a deleted token
+    """
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, created=False, **kwargs):
+    """
+    Drop cached copies of a user that was changed, deactivated or deleted
+    """
+    if created:
+        return
+    keys = Token.objects.filter(user_id=instance.pk)\
+        .values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
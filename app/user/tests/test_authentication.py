@@ -0,0 +1,192 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import LocalTokenCache, SharedTokenCache, \
+    cache_key, get_token_cache
+
+
+PROFILE_URL = reverse('user:profile')
+
+
+class TestCachedTokenAuthentication(TestCase):
+    """
+    Test token authentication with the token -> user cache
+    """
+    def setUp(self) -> None:
+        """
+        Setup user with a token
+        """
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@email.com', password='password', name='Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_uses_cache(self):
+        """
+        Test that the token lookup is not repeated
+        """
+        with self.assertNumQueries(1):
+            self.client.get(PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """
+        Test that a cached token stops working once deleted
+        """
+        self.client.get(PROFILE_URL)
+        self.token.delete()
+
+        resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """
+        Test that a cached user is rejected after deactivation
+        """
+        self.client.get(PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_user_reloaded(self):
+        """
+        Test that user changes are visible on the next request
+        """
+        self.client.get(PROFILE_URL)
+        self.client.patch(PROFILE_URL, {'name': 'New Name'})
+
+        resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.data['name'], 'New Name')
+
+    def test_credentials_not_cached(self):
+        """
+        Test that neither the password hash nor the raw token are cached
+        """
+        self.client.get(PROFILE_URL)
+
+        cached = get_token_cache().get(cache_key(self.token.key))
+        self.assertNotIn(self.user.password, str(cached))
+        self.assertNotIn(self.token.key, str(cached))
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(PROFILE_URL)
+        self.assertEqual(resp.data['email'], self.user.email)
+
+    def test_invalidated_while_reading_not_cached(self):
+        """
+        Test that a token deleted after a request read it, but before
+        the request cached it, is not cached as valid
+        """
+        read = TokenAuthentication.authenticate_credentials
+
+        def read_then_delete(auth, key):
+            result = read(auth, key)
+            Token.objects.filter(key=key).delete()
+            return result
+
+        with patch.object(TokenAuthentication, 'authenticate_credentials',
+                          read_then_delete):
+            self.client.get(PROFILE_URL)
+
+        resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        """
+        Test that unknown tokens are not cached as valid
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('time.monotonic')
+    def test_other_worker_local_ttl(self, monotonic):
+        """
+        Test that a worker whose local cache missed the invalidation
+        stops accepting a deleted token within seconds
+        """
+        monotonic.return_value = 100
+        other_worker = LocalTokenCache(
+            max_size=10, ttl=get_token_cache().ttl)
+        with patch('user.authentication._token_cache', other_worker):
+            self.client.get(PROFILE_URL)
+        # the signal only reaches the cache of this process
+        self.token.delete()
+
+        monotonic.return_value = 110
+        with patch('user.authentication._token_cache', other_worker):
+            resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_worker_shared_cache(self):
+        """
+        Test that with a shared backend a token deleted in one worker is
+        rejected by the others at once
+        """
+        settings = {'TTL': 300, 'LOCAL_TTL': 5, 'MAX_SIZE': 10,
+                    'BACKEND': 'default'}
+        with override_settings(TOKEN_AUTH_CACHE=settings):
+            other_worker = SharedTokenCache('default', 300)
+            with patch('user.authentication._token_cache', other_worker):
+                self.client.get(PROFILE_URL)
+            self.token.delete()
+
+            with patch('user.authentication._token_cache', other_worker):
+                resp = self.client.get(PROFILE_URL)
+
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestLocalTokenCache(TestCase):
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted
+        """
+        cache = LocalTokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('time.monotonic')
+    def test_ttl_expiry(self, monotonic):
+        """
+        Test that entries expire after the TTL
+        """
+        monotonic.return_value = 100
+        cache = LocalTokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+
+        monotonic.return_value = 161
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
@@ -1,7 +1,8 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from .authentication import CachedTokenAuthentication
 from .serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -25,8 +26,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     Authenticate user profile management APIs
     """
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    # safe requests read from a replica, see core.middleware
+    replica_reads = True
 
     http_method_names = ["get", "patch"]
 